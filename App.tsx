@@ -83,13 +83,31 @@ const App: React.FC = () => {
     };
 
     useEffect(() => {
-        const fetchData = async () => {
-            try {
-                const API_BASE_URL = (import.meta as any).env.VITE_API_URL || '/api';
-                const response = await fetch(`${API_BASE_URL}/graph`);
-                const data = await response.json();
+        const API_BASE_URL = (import.meta as any).env.VITE_API_URL || '/api';
+
+        // Graph as last received from the server; deltas are applied to it
+        const graphNodes = new Map<string, any>();
+        const graphLinks = new Map<string, any>();
+        const linkKey = (l: any) => `${l.source}|${l.target}|${l.step}|${l.amount}`;
+
+        const resetGraph = (data: any) => {
+            graphNodes.clear();
+            graphLinks.clear();
+            data.nodes.forEach((n: any) => graphNodes.set(n.id, n));
+            data.links.forEach((l: any) => graphLinks.set(linkKey(l), l));
+        };
+
+        const applyDelta = (delta: any) => {
+            delta.nodes.remove.forEach((id: string) => graphNodes.delete(id));
+            delta.nodes.upsert.forEach((n: any) => graphNodes.set(n.id, n));
+            delta.links.remove.forEach((l: any) => graphLinks.delete(linkKey(l)));
+            delta.links.add.forEach((l: any) => graphLinks.set(linkKey(l), l));
+        };
 
-                const { nodes, links } = data;
+        const renderGraph = () => {
+            try {
+                const nodes = Array.from(graphNodes.values());
+                const links = Array.from(graphLinks.values());
 
                 // 1. Process Links first to build History and Volume
                 const nodeStats: Record<string, { totalVol: number; history: any[]; neighbors: Set<string> }> = {};
@@ -188,14 +206,58 @@ const App: React.FC = () => {
                     });
                 });
 
+            } catch (error) {
+                console.error("Failed to process backend data:", error);
+            }
+        };
+
+        const fetchData = async () => {
+            try {
+                const response = await fetch(`${API_BASE_URL}/graph`);
+                resetGraph(await response.json());
+                renderGraph();
             } catch (error) {
                 console.error("Failed to fetch backend data:", error);
             }
         };
 
-        fetchData();
-        const intervalId = setInterval(fetchData, 3000);
-        return () => clearInterval(intervalId);
+        let intervalId: ReturnType<typeof setInterval> | undefined;
+        const startPolling = () => {
+            fetchData();
+            intervalId = setInterval(fetchData, 3000);
+        };
+
+        // Without EventSource support, fall back to polling
+        if (typeof EventSource === 'undefined') {
+            startPolling();
+            return () => clearInterval(intervalId);
+        }
+
+        // Snapshot first, then only what changed; the browser reconnects on its
+        // own and sends Last-Event-ID, so the server resumes from that version
+        const source = new EventSource(`${API_BASE_URL}/graph/stream`);
+        source.addEventListener('snapshot', (e) => {
+            resetGraph(JSON.parse((e as MessageEvent).data));
+            renderGraph();
+        });
+        source.addEventListener('delta', (e) => {
+            applyDelta(JSON.parse((e as MessageEvent).data));
+            renderGraph();
+        });
+        source.onerror = () => {
+            // CLOSED: the server answered without a stream (204 when streaming
+            // is disabled, or an error status) and the browser will not retry
+            if (source.readyState === EventSource.CLOSED) {
+                console.warn("Graph stream unavailable, polling instead");
+                if (intervalId === undefined) startPolling();
+            } else {
+                console.warn("Graph stream interrupted, reconnecting...");
+            }
+        };
+        return () => {
+            source.close();
+            clearInterval(intervalId);
+        };
     }, [settings.currency]);
 
     // Theme and Accessibility Effects
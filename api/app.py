@@ -1,11 +1,13 @@
 import sys
 import os
+import json
+import threading
+import time
 import traceback
-import pandas as pd
+from datetime import datetime
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context, g
 from flask_cors import CORS
-from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
 # Load environment variables from .env file explicitly
@@ -17,14 +19,48 @@ load_dotenv(dotenv_path)
 # ======================================================
 # ml is now inside backend, so we can import directly if running from backend
 # or if backend is the root context.
+#
+# Only light modules are imported here. pandas, numpy, pyarrow and the neo4j
+# driver are imported inside the handlers that need them, so a cold start
+# answering a health check or a cached response never loads them.
 
 try:
-    from ml.fraud_data_pipeline import run_pipeline
+    from ml.graph_cache import GraphVersion, ResponseCache
+    from ml.graph_query import (
+        GraphQueryError, parse_graph_params, build_cypher, encode_cursor,
+        parse_neighborhood_params, neo4j_neighborhood, parse_ring_params,
+        parse_search_params, neo4j_search
+    )
+    from ml.jobs import JobManager, JobQueueFull, TERMINAL_STATUSES
+    from ml.uploads import (
+        UnsupportedUpload, save_upload, file_digest, run_key,
+        load_cached_run, record_run, publish_outputs, load_current_run
+    )
+    from ml.graph_stream import GraphFeed, stream_events
+    from ml.graph_codec import dumps, to_columnar, choose_encoding, compress
+    from ml.metrics import MetricsRegistry, STAGE_BUCKETS
+    from ml.neo4j_driver import LazyDriver
+    from ml.online_scoring import OnlineScorer, ScoringError, MAX_BATCH, RECENT_SIZE
 except ImportError:
     # Fallback if running from root without module context
     import sys
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from ml.fraud_data_pipeline import run_pipeline
+    from ml.graph_cache import GraphVersion, ResponseCache
+    from ml.graph_query import (
+        GraphQueryError, parse_graph_params, build_cypher, encode_cursor,
+        parse_neighborhood_params, neo4j_neighborhood, parse_ring_params,
+        parse_search_params, neo4j_search
+    )
+    from ml.jobs import JobManager, JobQueueFull, TERMINAL_STATUSES
+    from ml.uploads import (
+        UnsupportedUpload, save_upload, file_digest, run_key,
+        load_cached_run, record_run, publish_outputs, load_current_run
+    )
+    from ml.graph_stream import GraphFeed, stream_events
+    from ml.graph_codec import dumps, to_columnar, choose_encoding, compress
+    from ml.metrics import MetricsRegistry, STAGE_BUCKETS
+    from ml.neo4j_driver import LazyDriver
+    from ml.online_scoring import OnlineScorer, ScoringError, MAX_BATCH, RECENT_SIZE
 
 # ======================================================
 # FLASK APP
@@ -38,6 +74,9 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 import tempfile
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Vercel sets VERCEL=1 in its functions: no background work outlives a response
+SERVERLESS = bool(os.getenv("VERCEL"))
+
 # Use temporary directory for Vercel/Cloud functions (read-only filesystem elsewhere)
 TEMP_DIR = tempfile.gettempdir()
 UPLOAD_DIR = os.path.join(TEMP_DIR, "nexus_uploads")
@@ -46,6 +85,96 @@ OUTPUT_DIR = os.path.join(TEMP_DIR, "nexus_output")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# ======================================================
+# GRAPH RESPONSE CACHE
+# ======================================================
+# Version is bumped by every ingest / pipeline run; cached /api/graph bodies
+# of older versions are never served again.
+graph_version = GraphVersion(OUTPUT_DIR)
+graph_cache = ResponseCache()
+
+# Rows per chunk for streaming ingestion of large uploads (0 = load in memory)
+PIPELINE_CHUNKSIZE = int(os.getenv("PIPELINE_CHUNKSIZE", "0")) or None
+
+# Run /api/process-ml on the background job pool (clients poll /api/jobs/<id>).
+# Off by default on serverless, where the instance may be frozen or
+# recycled once the 202 is sent and the job would never finish.
+PIPELINE_ASYNC = os.getenv("PIPELINE_ASYNC", "0" if SERVERLESS else "1") != "0"
+JOBS_DIR = os.path.join(TEMP_DIR, "nexus_jobs")
+pipeline_jobs = JobManager(JOBS_DIR)
+
+# Finished pipeline runs, one directory per (input content, config) key
+RUNS_DIR = os.path.join(TEMP_DIR, "nexus_runs")
+os.makedirs(RUNS_DIR, exist_ok=True)
+# run key -> job id of the job currently computing it (this process only)
+inflight_runs = {}
+inflight_lock = threading.Lock()
+
+# csv | parquet | both  (Parquet needs pyarrow; readers prefer it when present)
+PIPELINE_OUTPUT_FORMAT = os.getenv("PIPELINE_OUTPUT_FORMAT", "both")
+
+# ======================================================
+# METRICS (/api/metrics, Prometheus text format)
+# ======================================================
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    "nexus_http_request_duration_seconds", "API request latency by endpoint",
+    labels=("endpoint", "method", "status")
+)
+pipeline_runs = metrics.counter(
+    "nexus_pipeline_runs_total", "Pipeline runs published by this process", labels=("source",)
+)
+pipeline_stage_seconds = metrics.histogram(
+    "nexus_pipeline_stage_seconds", "Wall time per pipeline stage",
+    labels=("stage",), buckets=STAGE_BUCKETS
+)
+pipeline_stage_rows = metrics.gauge(
+    "nexus_pipeline_stage_rows_per_second", "Input rows per second of each stage in the last run",
+    labels=("stage",)
+)
+pipeline_peak_rss = metrics.gauge(
+    "nexus_pipeline_peak_rss_bytes", "Peak RSS of the process that ran the last pipeline"
+)
+neo4j_ingest_seconds = metrics.histogram(
+    "nexus_neo4j_ingest_seconds", "Neo4j bulk load time", labels=("mode",), buckets=STAGE_BUCKETS
+)
+graph_cache_events = metrics.gauge(
+    "nexus_graph_cache_events", "Response cache lookups since start", labels=("event",)
+)
+graph_version_gauge = metrics.gauge("nexus_graph_version", "Current graph version")
+
+# Long-lived event streams would only skew the latency histogram
+UNTIMED_ENDPOINTS = {"graph_stream", "metrics_endpoint", "static"}
+
+
+def record_pipeline_profile(profile):
+    if not profile:
+        return
+    for stage, info in profile["stages"].items():
+        pipeline_stage_seconds.observe(info["seconds"], stage=stage)
+        if info.get("rowsPerSec"):
+            pipeline_stage_rows.set(info["rowsPerSec"], stage=stage)
+    if profile.get("peakRssBytes"):
+        pipeline_peak_rss.set(profile["peakRssBytes"])
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None and request.endpoint not in UNTIMED_ENDPOINTS:
+        request_latency.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "unmatched",
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
 # ======================================================
 # NEO4J CONNECTION
 # ======================================================
@@ -53,13 +182,19 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://127.0.0.1:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "test1234")
 
-driver = GraphDatabase.driver(
-    NEO4J_URI,
-    auth=(NEO4J_USER, NEO4J_PASSWORD)
-)
+# Pooled driver created on first use (see ml/neo4j_driver.py for pool tuning)
+driver = LazyDriver(NEO4J_URI, (NEO4J_USER, NEO4J_PASSWORD))
 
 NEO4J_DB = os.getenv("NEO4J_DB", "neo4j")
 
+# Open the pool and import the data stack in the background at startup, so
+# the first real request doesn't pay for them (off by default: cold starts
+# that only serve cached responses would pay for nothing)
+NEO4J_WARMUP = os.getenv("NEO4J_WARMUP", "0") == "1"
+
+# replace (wipe + reload) or incremental (upsert accounts, append new edges)
+NEO4J_INGEST_MODE = os.getenv("NEO4J_INGEST_MODE", "replace")
+
 # ======================================================
 # HEALTH CHECK
 # ======================================================
@@ -68,65 +203,88 @@ def health():
     return jsonify({"status": "Backend running"})
 
 
+def warm_up():
+    """Import the data stack and connect to Neo4j ahead of the first request."""
+    started = time.perf_counter()
+    import ml.graph_index  # noqa: F401  (pandas, numpy, pyarrow)
+    try:
+        driver.warm_up()
+        neo4j_ok = True
+    except Exception as e:
+        print(f"⚠️ Neo4j warmup failed: {str(e)}")
+        neo4j_ok = False
+    seconds = round(time.perf_counter() - started, 4)
+    print(f"🔥 Warmup done in {seconds}s")
+    return {"neo4j": neo4j_ok, "seconds": seconds}
+
+
+@app.route("/api/warmup", methods=["POST"])
+def warmup():
+    """Keep-warm hook for schedulers pinging a fresh serverless instance."""
+    return jsonify(warm_up())
+
+
+if NEO4J_WARMUP:
+    threading.Thread(target=warm_up, daemon=True).start()
+
+
 # ======================================================
 # NEO4J INGESTION
 # ======================================================
-def insert_into_neo4j(accounts_csv, links_csv):
+def insert_into_neo4j(accounts_csv, links_csv, mode=None):
+    from ml.table_io import read_table, table_exists
+    from ml.neo4j_loader import bulk_load
+    from ml.dashboard_stats import summarize, summarize_neo4j, write_stats
+
     try:
-        if not os.path.exists(accounts_csv) or not os.path.exists(links_csv):
+        if not table_exists(accounts_csv) or not table_exists(links_csv):
             raise FileNotFoundError("Processed CSV files not found for ingestion.")
 
-        with driver.session(database=NEO4J_DB) as session:
+        mode = mode or NEO4J_INGEST_MODE
 
-            print("🧹 Clearing old Neo4j data")
-            session.run("MATCH (n) DETACH DELETE n")
+        # -----------------------------
+        # LOAD + SANITIZE OUTPUTS
+        # -----------------------------
+        accounts = read_table(accounts_csv)
+        # Neo4j cannot handle NaN/Inf in parameters, sanitize it
+        accounts = accounts.fillna(0)
+        links = read_table(links_csv)
+        links = links.fillna(0)
+        # Per-transaction ledger written next to the accounts; lets an
+        # incremental ingest skip rows an earlier upload already counted
+        ledger_path = os.path.join(os.path.dirname(accounts_csv), "account_transactions.csv")
+        transactions = read_table(ledger_path).fillna(0) if table_exists(ledger_path) else None
 
-            # -----------------------------
-            # INSERT ACCOUNT NODES
-            # -----------------------------
-            accounts = pd.read_csv(accounts_csv)
-            # Neo4j cannot handle NaN/Inf in parameters, sanitize it
-            accounts = accounts.fillna(0)
-            
-            if not accounts.empty:
-                print(f"📥 Inserting {len(accounts)} accounts")
-                session.run("""
-                UNWIND $rows AS row
-                MERGE (a:Account {id: row.account_id})
-                SET
-                a.total_amount = row.total_amount,
-                a.avg_amount = row.avg_amount,
-                a.tx_count = row.tx_count,
-                a.avg_balance_diff = row.avg_balance_diff,
-                a.zero_balance_count = row.zero_balance_count,
-                a.riskScore = row.riskScore,
-                a.mlClass = row.class
-                """, rows=accounts.to_dict("records"))
-            else:
-                print("⚠️ Accounts CSV was empty")
+        if accounts.empty:
+            print("⚠️ Accounts CSV was empty")
+        if links.empty:
+            print("⚠️ Links CSV was empty")
 
-            # -----------------------------
-            # INSERT RELATIONSHIPS
-            # -----------------------------
-            links = pd.read_csv(links_csv)
-            links = links.fillna(0)
-            
-            if not links.empty:
-                print(f"🔗 Inserting {len(links)} relationships")
-                session.run("""
-                UNWIND $rows AS row
-                MATCH (src:Account {id: row.src})
-                MATCH (dst:Account {id: row.dst})
-                CREATE (src)-[:TRANSFERRED_TO {
-                amount: row.amount,
-                step: row.step,
-                fraudEdge: row.fraudEdge
-                }]->(dst)
-                """, rows=links.to_dict("records"))
+        # -----------------------------
+        # BATCHED ACCOUNTS + RELATIONSHIPS
+        # -----------------------------
+        print(f"📥 Inserting {len(accounts)} accounts, 🔗 {len(links)} relationships")
+        started = time.perf_counter()
+        stats = bulk_load(driver, NEO4J_DB, accounts, links, mode=mode, transactions=transactions)
+        neo4j_ingest_seconds.observe(time.perf_counter() - started, mode=mode)
+
+        # -----------------------------
+        # DASHBOARD SUMMARY
+        # -----------------------------
+        # replace: the graph is exactly these outputs; incremental: accounts
+        # were blended into stored ones, so aggregate what Neo4j now holds
+        try:
+            if mode == "incremental":
+                with driver.session(database=NEO4J_DB) as session:
+                    summary = summarize_neo4j(session)
             else:
-                print("⚠️ Links CSV was empty")
+                summary = summarize(accounts, links)
+            write_stats(summary, OUTPUT_DIR)
+        except Exception as e:
+            print(f"⚠️ Dashboard stats not refreshed: {str(e)}")
 
-            print("✅ Neo4j ingestion complete")
+        print("✅ Neo4j ingestion complete")
+        return stats
 
     except Exception as e:
         print(f"❌ Neo4j Ingestion Error: {str(e)}")
@@ -148,7 +306,7 @@ def log_error_to_file(e):
         log_path = os.path.join(log_dir, "backend_errors.log")
         
         with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"\n\n[{pd.Timestamp.now()}] ERROR:\n")
+            f.write(f"\n\n[{datetime.now()}] ERROR:\n")
             f.write(f"Type: {type(e).__name__}\n")
             f.write(f"Message: {str(e)}\n")
             f.write("Traceback:\n")
@@ -184,18 +342,27 @@ def upload_file():
         if file.filename == "":
             return jsonify({"error": "Empty filename"}), 400
             
-        if not file.filename.lower().endswith(".csv"):
-            return jsonify({"error": "Only CSV files allowed"}), 400
-            
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        file.save(file_path)
-        print(f"✅ API: File saved at {file_path}")
+        # Streamed to disk in chunks (decompressing .gz/.zst on the fly) and
+        # stored under its content hash, so re-uploads dedupe to one file
+        try:
+            upload = save_upload(file.stream, file.filename, UPLOAD_DIR)
+        except UnsupportedUpload as e:
+            return jsonify({"error": str(e)}), 400
+
+        file_path = upload["path"]
+        if upload["duplicate"]:
+            print(f"♻️ API: Identical upload already stored at {file_path}")
+        else:
+            print(f"✅ API: File saved at {file_path}")
         
         return jsonify({
             "status": "success",
             "message": "File uploaded successfully",
             "filePath": file_path,
-            "filename": file.filename
+            "filename": file.filename,
+            "contentHash": upload["contentHash"],
+            "bytes": upload["bytes"],
+            "duplicate": upload["duplicate"]
         })
         
     except Exception as e:
@@ -204,6 +371,22 @@ def upload_file():
         return jsonify({"error": str(e)}), 500
 
 
+def positive_int_option(data, name):
+    """data[name] as a positive int (ints or digit strings), None when unset."""
+    value = data.get(name)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{name} must be a positive integer")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a positive integer")
+    if number <= 0:
+        raise ValueError(f"{name} must be a positive integer")
+    return number
+
+
 @app.route("/api/process-ml", methods=["POST"])
 def process_ml():
     try:
@@ -213,12 +396,104 @@ def process_ml():
         if not file_path or not os.path.exists(file_path):
             return jsonify({"error": "File not found. Please upload again."}), 400
 
+        from ml.table_io import OUTPUT_FORMATS
+
+        # Checked here: a bad value would otherwise only fail inside the job
+        try:
+            chunksize = positive_int_option(data, "chunksize")
+            workers = positive_int_option(data, "workers")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        output_format = data.get("outputFormat") or PIPELINE_OUTPUT_FORMAT
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({"error": f"outputFormat must be one of: {', '.join(OUTPUT_FORMATS)}"}), 400
+        if not isinstance(data.get("config") or {}, dict):
+            return jsonify({"error": "config must be an object of pipeline options"}), 400
+
+        options = {
+            "chunksize": chunksize or PIPELINE_CHUNKSIZE,
+            "output_format": output_format,
+            # pipeline_config() overrides, e.g. {"sample_mode": "full"}
+            "config": data.get("config") or {},
+            # Aggregation processes; same outputs for any count, so not in the run key
+            "workers": workers
+        }
+
+        # -----------------------------
+        # RESULT CACHE (content hash + pipeline config)
+        # -----------------------------
+        try:
+            key = run_key(file_digest(file_path), options)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        run_dir = os.path.join(RUNS_DIR, key)
+
+        if not data.get("force") and load_cached_run(run_dir):
+            print(f"♻️ API: Reusing cached ML results for {file_path}")
+            result = publish_outputs(run_dir, OUTPUT_DIR)
+            graph_version.bump()
+            rebuild_search_index()
+            pipeline_runs.inc(source="cache")
+            return jsonify({
+                "status": "success",
+                "message": "ML Analysis loaded from cache",
+                "cached": True,
+                "data": result
+            })
+
+        os.makedirs(run_dir, exist_ok=True)
+        options["out_dir"] = run_dir
+
+        def finish_run(result):
+            # Timings describe this run only; cache hits don't replay them
+            result = dict(result)
+            profile = result.pop("profile", None)
+            record_run(run_dir, result)
+            published = publish_outputs(run_dir, OUTPUT_DIR)
+            # The CSV fallback of /api/graph reads these outputs
+            graph_version.bump()
+            rebuild_search_index()
+            record_pipeline_profile(profile)
+            pipeline_runs.inc(source="pipeline")
+            published["profile"] = profile
+            return published
+
+        if data.get("async", PIPELINE_ASYNC):
+            # Queue on the pipeline process pool and return immediately;
+            # clients poll /api/jobs/<id> for progress and the result paths.
+            with inflight_lock:
+                job_id = inflight_runs.get(key)
+                job = pipeline_jobs.get(job_id) if job_id else None
+                if job is None or job["status"] in TERMINAL_STATUSES:
+                    print(f"🚀 API: Queueing ML Pipeline on {file_path}")
+
+                    def on_success(job_id):
+                        finish_run(pipeline_jobs.get(job_id)["result"])
+
+                    try:
+                        job = pipeline_jobs.submit(file_path, options, on_success=on_success)
+                    except JobQueueFull as e:
+                        return jsonify({"error": str(e)}), 429
+                    inflight_runs[key] = job["id"]
+                else:
+                    print(f"⏳ API: Same input already processing in job {job_id}")
+
+            return jsonify({
+                "status": "accepted",
+                "message": "ML Analysis queued",
+                "jobId": job["id"],
+                "job": job
+            }), 202
+
+        from ml.fraud_data_pipeline import run_pipeline
+
         print(f"🚀 API: Running ML Pipeline on {file_path}")
-        result = run_pipeline(file_path, out_dir=OUTPUT_DIR)
+        result = finish_run(run_pipeline(file_path, **options))
         
         return jsonify({
             "status": "success",
             "message": "ML Analysis complete",
+            "cached": False,
             "data": result  # Contains paths to accounts and links CSVs
         })
 
@@ -228,22 +503,50 @@ def process_ml():
         return jsonify({"error": str(e)}), 500
 
 
+# ======================================================
+# PIPELINE JOBS
+# ======================================================
+@app.route("/api/jobs/<job_id>")
+def job_status(job_id):
+    job = pipeline_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify(job)
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = pipeline_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify(job)
+
+
 @app.route("/api/ingest-neo4j", methods=["POST"])
 def ingest_neo4j():
     try:
         data = request.json
         accounts_csv = data.get("accounts")
         links_csv = data.get("links")
+        mode = data.get("mode")
         
         if not accounts_csv or not links_csv:
             return jsonify({"error": "Missing input files for ingestion"}), 400
+
+        from ml.neo4j_loader import INGEST_MODES
+
+        if mode and mode not in INGEST_MODES:
+            return jsonify({"error": f"Unknown ingest mode: {mode}"}), 400
             
         print("📤 API: Ingesting into Neo4j...")
-        insert_into_neo4j(accounts_csv, links_csv)
+        stats = insert_into_neo4j(accounts_csv, links_csv, mode=mode)
+        stats["graphVersion"] = graph_version.bump()
+        rebuild_search_index()
         
         return jsonify({
             "status": "success", 
-            "message": "Graph ingestion complete"
+            "message": "Graph ingestion complete",
+            "stats": stats
         })
 
     except Exception as e:
@@ -262,31 +565,22 @@ def upload_csv_legacy():
 # ======================================================
 # GRAPH API (FOR FRONTEND)
 # ======================================================
-@app.route("/api/graph")
-def graph():
+def build_graph_payload(params):
+    """Returns (payload, status) for one /api/graph page, from Neo4j or the local fallback."""
     try:
         with driver.session(database=NEO4J_DB) as session:
-            query = """
-            MATCH (a:Account)-[t:TRANSFERRED_TO]->(b:Account)
-            RETURN
-              a.id AS source,
-              b.id AS target,
-              a.riskScore AS sourceRisk,
-              b.riskScore AS targetRisk,
-              a.mlClass AS sourceMLClass,
-              b.mlClass AS targetMLClass,
-              t.amount AS amount,
-              t.step AS step,
-              t.fraudEdge AS fraudEdge
-            LIMIT 500
-            """
-
-            result = session.run(query)
+            query, values = build_cypher(params)
+            records = list(session.run(query, **values))
+
+            next_cursor = None
+            if len(records) > params["limit"]:
+                records = records[:params["limit"]]
+                next_cursor = encode_cursor(records[-1]["step"], records[-1]["key"])
 
             nodes = {}
             links = []
 
-            for r in result:
+            for r in records:
                 if r["source"] not in nodes:
                     nodes[r["source"]] = {
                         "id": r["source"],
@@ -309,43 +603,490 @@ def graph():
                     "fraud": r["fraudEdge"]
                 })
 
-            return jsonify({
+            payload = {
                 "nodes": list(nodes.values()),
-                "links": links
-            })
+                "links": links,
+                "nextCursor": next_cursor
+            }
+            if params["format"] == "columnar":
+                payload = to_columnar(payload)
+            return payload, 200
     except Exception as e:
+        from ml.table_io import table_exists
+        from ml.graph_index import load_graph_store
+
         print("Falling back to local CSV due to Neo4j error:", str(e))
         accounts_path = os.path.join(OUTPUT_DIR, "final_accounts.csv")
         links_path = os.path.join(OUTPUT_DIR, "fraud_links.csv")
         
-        if not os.path.exists(accounts_path) or not os.path.exists(links_path):
-            return jsonify({"error": "Neo4j unavailable and local CSVs not found."}), 500
-            
-        accounts_df = pd.read_csv(accounts_path).fillna(0)
-        links_df = pd.read_csv(links_path).head(500).fillna(0)
-        
-        nodes = {}
-        for _, r in accounts_df.iterrows():
-            nodes[r["account_id"]] = {
-                "id": str(r["account_id"]),
-                "riskScore": r.get("riskScore", 0),
-                "mlClass": r.get("class", "NORMAL")
+        if not table_exists(accounts_path) or not table_exists(links_path):
+            return {"error": "Neo4j unavailable and local CSVs not found."}, 500
+
+        # Array-backed store, loaded once per output-file change
+        store = load_graph_store(accounts_path, links_path)
+        return store.graph_page(params), 200
+
+
+def cached_json_response(entry):
+    """
+    Serve a cached body, or an empty 304 when the client already has it.
+
+    Bodies are compressed per Accept-Encoding (br/gzip) once and kept on the
+    cache entry; each coding gets its own ETag.
+    """
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"), len(entry["body"]))
+    etag = f"{entry['etag']}-{encoding}" if encoding else entry["etag"]
+
+    if request.if_none_match.contains(etag):
+        graph_cache.record_not_modified()
+        response = app.response_class(status=304)
+    else:
+        body = entry["body"]
+        if encoding:
+            encoded = entry.setdefault("encoded", {})
+            if encoding not in encoded:
+                encoded[encoding] = compress(body, encoding)
+            body = encoded[encoding]
+        response = app.response_class(body, mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    # Clients must revalidate every poll; unchanged graphs cost a 304
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/api/graph")
+def graph():
+    try:
+        params = parse_graph_params(request.args)
+    except GraphQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = graph_version.current()
+    key = request.query_string.decode()
+
+    entry = graph_cache.get(version, key)
+    if entry is None:
+        payload, status = build_graph_payload(params)
+        if status != 200:
+            return jsonify(payload), status
+        entry = graph_cache.put(version, key, dumps(payload))
+
+    return cached_json_response(entry)
+
+
+# ======================================================
+# ACCOUNT NEIGHBORHOOD (EGO NETWORK)
+# ======================================================
+def build_neighborhood_payload(account_id, params):
+    """Returns (payload, status) for a k-hop neighborhood around one account."""
+    try:
+        with driver.session(database=NEO4J_DB) as session:
+            result = neo4j_neighborhood(
+                session, account_id, params["hops"], params["limit"], params["fanout"]
+            )
+    except Exception as e:
+        from ml.table_io import table_exists
+        from ml.graph_index import load_graph_store
+
+        print("Falling back to local graph store due to Neo4j error:", str(e))
+        accounts_path = os.path.join(OUTPUT_DIR, "final_accounts.csv")
+        links_path = os.path.join(OUTPUT_DIR, "fraud_links.csv")
+
+        if not table_exists(accounts_path) or not table_exists(links_path):
+            return {"error": "Neo4j unavailable and local CSVs not found."}, 500
+
+        store = load_graph_store(accounts_path, links_path)
+        result = store.neighborhood(
+            account_id, params["hops"], params["limit"], params["fanout"]
+        )
+
+    if result is None:
+        return {"error": f"Account not found: {account_id}"}, 404
+
+    result["hops"] = params["hops"]
+    return result, 200
+
+
+@app.route("/api/account/<account_id>/neighborhood")
+def account_neighborhood(account_id):
+    try:
+        params = parse_neighborhood_params(request.args)
+    except GraphQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = graph_version.current()
+    key = request.full_path
+
+    entry = graph_cache.get(version, key)
+    if entry is None:
+        payload, status = build_neighborhood_payload(account_id, params)
+        if status != 200:
+            return jsonify(payload), status
+        entry = graph_cache.put(version, key, app.json.dumps(payload).encode("utf-8"))
+
+    return cached_json_response(entry)
+
+
+# ======================================================
+# FRAUD RINGS
+# ======================================================
+def build_rings_payload(params):
+    """Returns (payload, status) for one page of the fraud_rings pipeline output."""
+    from ml.table_io import read_table, table_exists
+
+    rings_path = os.path.join(OUTPUT_DIR, "fraud_rings.csv")
+    if not table_exists(rings_path):
+        return {"error": "No fraud rings found. Run the pipeline first."}, 404
+
+    filters = []
+    if params["minLength"] is not None:
+        filters.append(("length", ">=", params["minLength"]))
+    if params["maxLength"] is not None:
+        filters.append(("length", "<=", params["maxLength"]))
+    if params["minRisk"] is not None:
+        filters.append(("avg_risk", ">=", params["minRisk"]))
+    rings = read_table(rings_path, filters=filters or None)
+
+    if params["account"]:
+        member = (">" + rings["accounts"].astype(str) + ">").str.contains(
+            f">{params['account']}>", regex=False
+        )
+        rings = rings[member]
+
+    rings = rings.sort_values(["avg_risk", "ring_id"], ascending=[False, True], kind="stable")
+    page = rings.iloc[params["offset"]:params["offset"] + params["limit"]]
+
+    return {
+        "rings": [
+            {
+                "ringId": int(r.ring_id),
+                "length": int(r.length),
+                "accounts": str(r.accounts).split(">"),
+                "firstStep": int(r.first_step),
+                "lastStep": int(r.last_step),
+                "totalAmount": float(r.total_amount),
+                "fraudEdges": int(r.fraud_edges),
+                "sccId": int(r.scc_id),
+                "sccSize": int(r.scc_size),
+                "avgRisk": float(r.avg_risk)
             }
-            
-        links = []
-        for _, r in links_df.iterrows():
-            links.append({
-                "source": str(r["src"]),
-                "target": str(r["dst"]),
-                "amount": r["amount"],
-                "step": r["step"],
-                "fraud": r.get("fraudEdge", 0)
-            })
-            
-        return jsonify({
-            "nodes": list(nodes.values()),
-            "links": links
-        })
+            for r in page.itertuples(index=False)
+        ],
+        "total": len(rings),
+        "offset": params["offset"],
+        "limit": params["limit"]
+    }, 200
+
+
+@app.route("/api/rings")
+def fraud_rings():
+    try:
+        params = parse_ring_params(request.args)
+    except GraphQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = graph_version.current()
+    key = request.full_path
+
+    entry = graph_cache.get(version, key)
+    if entry is None:
+        payload, status = build_rings_payload(params)
+        if status != 200:
+            return jsonify(payload), status
+        entry = graph_cache.put(version, key, app.json.dumps(payload).encode("utf-8"))
+
+    return cached_json_response(entry)
+
+
+# ======================================================
+# ACCOUNT SEARCH
+# ======================================================
+def warm_search_index():
+    """Build the local search index for the published outputs ahead of the first search."""
+    from ml.table_io import table_exists
+    from ml.search_index import load_search_index
+
+    accounts_path = os.path.join(OUTPUT_DIR, "final_accounts.csv")
+    try:
+        if table_exists(accounts_path):
+            load_search_index(accounts_path)
+    except Exception as e:
+        print(f"⚠️ Search index not rebuilt: {str(e)}")
+
+
+def rebuild_search_index():
+    """Called when a pipeline run is published or an ingest completes."""
+    threading.Thread(target=warm_search_index, daemon=True).start()
+
+
+def build_search_payload(params):
+    """Returns (payload, status) for /api/search, from Neo4j or the local index."""
+    try:
+        with driver.session(database=NEO4J_DB) as session:
+            return neo4j_search(session, params), 200
+    except Exception as e:
+        from ml.table_io import table_exists
+        from ml.search_index import load_search_index
+
+        print("Falling back to local search index due to Neo4j error:", str(e))
+        accounts_path = os.path.join(OUTPUT_DIR, "final_accounts.csv")
+
+        if not table_exists(accounts_path):
+            return {"error": "Neo4j unavailable and local CSVs not found."}, 500
+
+        # Sorted prefix / secondary indexes, built once per output-file change
+        index = load_search_index(accounts_path)
+        return index.search(params), 200
+
+
+@app.route("/api/search")
+def search_accounts():
+    try:
+        params = parse_search_params(request.args)
+    except GraphQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = graph_version.current()
+    key = request.full_path
+
+    entry = graph_cache.get(version, key)
+    if entry is None:
+        payload, status = build_search_payload(params)
+        if status != 200:
+            return jsonify(payload), status
+        entry = graph_cache.put(version, key, app.json.dumps(payload).encode("utf-8"))
+
+    return cached_json_response(entry)
+
+
+# ======================================================
+# DASHBOARD STATS
+# ======================================================
+@app.route("/api/stats")
+def dashboard_stats():
+    """Summary written by the last pipeline run or ingest; independent of graph size."""
+    version = graph_version.current()
+    key = request.full_path
+
+    entry = graph_cache.get(version, key)
+    if entry is None:
+        from ml.dashboard_stats import load_stats
+
+        stats = load_stats(OUTPUT_DIR)
+        if stats is None:
+            return jsonify({"error": "No dashboard stats yet. Run the pipeline first."}), 404
+        stats["graphVersion"] = version
+        entry = graph_cache.put(version, key, app.json.dumps(stats).encode("utf-8"))
+
+    return cached_json_response(entry)
+
+
+# ======================================================
+# GRAPH STREAM (SNAPSHOT + DELTAS)
+# ======================================================
+class GraphSnapshotError(Exception):
+    pass
+
+
+def build_graph_snapshot():
+    """Default /api/graph page, the view the dashboard renders."""
+    payload, status = build_graph_payload(parse_graph_params({}))
+    if status != 200:
+        raise GraphSnapshotError(payload["error"])
+    return payload
+
+
+# Shared by every open stream in this process
+graph_feed = GraphFeed(graph_version, build_graph_snapshot)
+
+# A stream holds its request thread for up to GRAPH_STREAM_MAX_SECONDS, so it
+# needs threaded workers (see gunicorn.conf.py). Off by default on serverless,
+# where a function would be billed and capped for the whole stream; clients
+# then poll /api/graph instead.
+GRAPH_STREAM_ENABLED = os.getenv("GRAPH_STREAM", "0" if SERVERLESS else "1") != "0"
+
+
+@app.route("/api/graph/stream")
+def graph_stream():
+    """
+    Server-sent events replacing /api/graph polling: one snapshot, then a
+    delta per graph version change. Reconnecting clients send Last-Event-ID
+    (or ?since=) and only receive what changed since that version.
+    ?format=ndjson streams the same events as JSON lines.
+    204 when streaming is disabled: EventSource stops and clients poll.
+    """
+    if not GRAPH_STREAM_ENABLED:
+        return "", 204
+
+    fmt = request.args.get("format", "sse")
+    if fmt not in ("sse", "ndjson"):
+        return jsonify({"error": "format must be 'sse' or 'ndjson'"}), 400
+
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({"error": "since must be an integer graph version"}), 400
+
+    try:
+        graph_feed.refresh()
+    except GraphSnapshotError as e:
+        return jsonify({"error": str(e)}), 500
+
+    response = app.response_class(
+        stream_with_context(stream_events(graph_feed, since, fmt)),
+        mimetype="text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the event stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ======================================================
+# ONLINE SCORING
+# ======================================================
+SCORE_ACCOUNT_COLUMNS = ["account_id", "total_amount", "tx_count", "avg_balance_diff", "zero_balance_count"]
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+
+online_scorer = None
+online_scorer_lock = threading.Lock()
+
+
+def outputs_signature():
+    """Identity of the published final_accounts files (changes on every publish)."""
+    parts = []
+    for ext in (".csv", ".parquet"):
+        try:
+            st = os.stat(os.path.join(OUTPUT_DIR, "final_accounts" + ext))
+        except OSError:
+            continue
+        parts.append(f"{ext}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}")
+    return "|".join(parts) or None
+
+
+def get_online_scorer():
+    """
+    The process-wide scorer, restored from its checkpoint or seeded from the
+    published accounts; a newly published pipeline run starts a fresh one.
+    """
+    global online_scorer
+    source = outputs_signature()
+    if online_scorer is not None and online_scorer.source == source:
+        return online_scorer
+
+    with online_scorer_lock:
+        if online_scorer is None or online_scorer.source != source:
+            from ml.fraud_data_pipeline import FRAUD_THRESHOLD, AT_RISK_THRESHOLD
+            from ml.table_io import read_table
+
+            # Thresholds the published run was classified with; runs recorded
+            # before they were stored used the defaults
+            run = load_current_run(OUTPUT_DIR) or {}
+            thresholds = run.get("thresholds") or {}
+            scorer = OnlineScorer(thresholds.get("fraud", FRAUD_THRESHOLD),
+                                  thresholds.get("atRisk", AT_RISK_THRESHOLD),
+                                  source=source)
+            if scorer.load(OUTPUT_DIR):
+                print(f"♻️ Online scorer restored: {len(scorer.accounts):,} accounts")
+            elif source is not None:
+                accounts = read_table(os.path.join(OUTPUT_DIR, "final_accounts.csv"),
+                                      columns=SCORE_ACCOUNT_COLUMNS).fillna(0)
+                scorer.bootstrap(accounts.to_dict("records"))
+                print(f"🧮 Online scorer seeded with {len(scorer.accounts):,} accounts")
+            online_scorer = scorer
+        return online_scorer
+
+
+def parse_score_body():
+    """Transactions of a /api/score request and whether it was a batch."""
+    raw = request.get_data(as_text=True)
+    if request.mimetype in NDJSON_TYPES:
+        return [json.loads(line) for line in raw.splitlines() if line.strip()], True
+    body = json.loads(raw)
+    if isinstance(body, list):
+        return body, True
+    return [body], False
+
+
+@app.route("/api/score", methods=["POST"])
+def score_transactions():
+    """
+    Score one transaction (JSON object) or a micro-batch (JSON array or
+    NDJSON) in the input CSV schema against the running account state.
+    """
+    try:
+        transactions, batch = parse_score_body()
+    except ValueError:
+        return jsonify({"error": "Body must be a JSON object, a JSON array or NDJSON"}), 400
+    if not transactions:
+        return jsonify({"error": "No transactions"}), 400
+    if len(transactions) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} transactions per request"}), 413
+
+    scorer = get_online_scorer()
+    if not scorer.ready:
+        # A made-up mid-scale score would show up in LiveMonitor as a real flag
+        return jsonify({"error": "No pipeline outputs to score against yet. Run the pipeline first."}), 409
+    try:
+        results = scorer.score(transactions)
+    except ScoringError as e:
+        return jsonify({"error": str(e)}), 400
+    scorer.maybe_checkpoint(OUTPUT_DIR)
+
+    if batch:
+        return jsonify({"results": results, "count": len(results)})
+    return jsonify(results[0])
+
+
+@app.route("/api/score/recent")
+def recent_scores():
+    """Scored transactions after sequence number `since` (LiveMonitor feed)."""
+    try:
+        since = int(request.args.get("since") or 0)
+        limit = int(request.args.get("limit") or 100)
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if since < 0 or limit < 1:
+        return jsonify({"error": "since must not be negative and limit must be positive"}), 400
+    scorer = get_online_scorer()
+    return jsonify({
+        "transactions": scorer.recent_since(since, min(limit, RECENT_SIZE)),
+        "sequence": scorer.sequence
+    })
+
+
+@app.route("/api/score/state")
+def score_state():
+    return jsonify(get_online_scorer().stats())
+
+
+@app.route("/api/score/checkpoint", methods=["POST"])
+def score_checkpoint():
+    scorer = get_online_scorer()
+    path = scorer.checkpoint(OUTPUT_DIR)
+    return jsonify({"path": path, "accounts": len(scorer.accounts)})
+
+
+@app.route("/api/metrics")
+def metrics_endpoint():
+    """Prometheus scrape target: request latency, pipeline stages, ingest, cache."""
+    cache = graph_cache.stats()
+    for event in ("hits", "misses", "notModified", "evictions"):
+        graph_cache_events.set(cache[event], event=event)
+    graph_version_gauge.set(graph_version.current())
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/graph/cache")
+def graph_cache_stats():
+    stats = graph_cache.stats()
+    stats["graphVersion"] = graph_version.current()
+    return jsonify(stats)
 
 
 # ======================================================
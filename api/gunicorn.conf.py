@@ -0,0 +1,12 @@
+import os
+
+# Loaded by gunicorn when started from api/, e.g. `gunicorn app:app`.
+#
+# /api/graph/stream holds its request thread for up to
+# GRAPH_STREAM_MAX_SECONDS; with the default sync workers every open stream
+# would block a whole worker. Threaded workers keep answering other requests
+# (set GUNICORN_WORKER_CLASS=gevent with gevent installed for many streams).
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
@@ -0,0 +1,620 @@
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ml.fraud_data_pipeline import (
+        extract_real_links, generate_synthetic_links, prepare_transactions,
+        partial_aggregates, merge_partials, finalize_aggregates, bucket_moments,
+        add_velocity_features, score_weights, read_transactions, run_pipeline, HAS_ARROW_CSV, SEED,
+        PIPELINE_VERSION
+    )
+    from ml.parallel_agg import aggregate_parallel
+    from ml.velocity_features import partial_velocity, velocity_features, parse_windows, WINDOWS, SKETCH_PRECISION
+    from ml.ring_detection import detect_rings, strongly_connected_components
+    from ml.table_io import write_table, read_table, HAS_PARQUET
+    from ml.graph_index import GraphStore
+    from ml.search_index import AccountSearchIndex
+    from ml.graph_query import parse_search_params
+    from ml.graph_codec import dumps, HAS_ORJSON, HAS_BROTLI
+except ImportError:
+    from fraud_data_pipeline import (
+        extract_real_links, generate_synthetic_links, prepare_transactions,
+        partial_aggregates, merge_partials, finalize_aggregates, bucket_moments,
+        add_velocity_features, score_weights, read_transactions, run_pipeline, HAS_ARROW_CSV, SEED,
+        PIPELINE_VERSION
+    )
+    from parallel_agg import aggregate_parallel
+    from velocity_features import partial_velocity, velocity_features, parse_windows, WINDOWS, SKETCH_PRECISION
+    from ring_detection import detect_rings, strongly_connected_components
+    from table_io import write_table, read_table, HAS_PARQUET
+    from graph_index import GraphStore
+    from search_index import AccountSearchIndex
+    from graph_query import parse_search_params
+    from graph_codec import dumps, HAS_ORJSON, HAS_BROTLI
+
+# ======================================================
+# CONFIG
+# ======================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_CSV = os.path.join(BASE_DIR, "uploads", "transactions_small.csv")
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+DEFAULT_WORKERS = [1, 2, 4, 8, 16, 32]
+# Edges per /api/graph response in the serialization benchmark
+SERIALIZE_SIZES = [500, 10_000, 100_000]
+
+# /api/search queries timed against the index and a pandas scan
+SEARCH_QUERIES = {
+    "prefix": {"q": "C12"},
+    "prefix-id": {"q": "C12", "sort": "id"},
+    "min-risk": {"minRisk": "90"},
+    "class-amount": {"class": "FRAUD", "sort": "amount"},
+    "prefix-risk-count": {"q": "C1", "minRisk": "99", "sort": "txCount"},
+}
+
+# Requests timed right after a fresh `import app` (the cold-start benchmark)
+COLD_START_PATHS = [
+    ("health", "/api/"),
+    ("job_status", "/api/jobs/" + "0" * 32),
+    ("graph", "/api/graph"),
+    ("graph_cached", "/api/graph"),
+]
+
+# Fields that identify a result row when comparing against a saved baseline;
+# "seconds" and every "*_s" field are the timings compared
+BASELINE_KEYS = ("rows", "edges", "table", "format", "mode", "variant", "workers", "window", "stage")
+
+# ======================================================
+# SYNTHETIC PAYSIM INPUT
+# ======================================================
+def make_paysim_frame(n_rows, n_accounts=None, seed=SEED, sample_csv=SAMPLE_CSV):
+    """
+    Synthesize a PaySim-shaped transaction frame with n_rows rows.
+
+    Numeric columns and `type` are bootstrapped from the bundled sample upload so
+    value distributions match real data. Account ids are drawn from a pool of
+    n_accounts (default n_rows // 4) so accounts repeat and links can form.
+    """
+    rng = np.random.default_rng(seed)
+    sample = pd.read_csv(sample_csv)
+
+    if n_accounts is None:
+        n_accounts = max(n_rows // 4, 1)
+
+    picks = rng.integers(0, len(sample), n_rows)
+    df = sample.iloc[picks].reset_index(drop=True)
+
+    pool = np.array([f"C{i}" for i in range(n_accounts)], dtype=object)
+    df["nameOrig"] = pool[rng.integers(0, n_accounts, n_rows)]
+    df["nameDest"] = pool[rng.integers(0, n_accounts, n_rows)]
+    df["step"] = rng.integers(1, 744, n_rows)
+    return df
+
+def write_paysim_csv(path, n_rows, block=1_000_000, seed=SEED):
+    """make_paysim_frame() written in blocks, so 10M+ row inputs fit in memory."""
+    n_accounts = max(n_rows // 4, 1)
+    with open(path, "w", newline="") as f:
+        for i, start in enumerate(range(0, n_rows, block)):
+            df = make_paysim_frame(min(block, n_rows - start), n_accounts=n_accounts, seed=seed + i)
+            df.to_csv(f, index=False, header=(i == 0))
+
+# ======================================================
+# BENCHMARKS
+# ======================================================
+def bench_real_links(sizes=DEFAULT_SIZES, sample_accounts=2000, repeat=3):
+    """Rows/sec of extract_real_links over synthetic inputs of each size."""
+    results = []
+    for n in sizes:
+        df = make_paysim_frame(n)
+        ids = pd.unique(df["nameOrig"])[:sample_accounts].tolist()
+        risk_ids = set(ids[: max(len(ids) // 13, 1)])
+
+        best = float("inf")
+        links = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            links = extract_real_links(df, ids, risk_ids)
+            best = min(best, time.perf_counter() - t0)
+
+        results.append({
+            "rows": n,
+            "links": len(links),
+            "seconds": round(best, 4),
+            "rows_per_sec": int(n / best) if best > 0 else 0
+        })
+        print(f"⏱️  real-links {n:>12,} rows: {best:8.4f}s  ({results[-1]['rows_per_sec']:,} rows/s)")
+        del df
+    return results
+
+def make_output_frames(n_rows, seed=SEED):
+    """Accounts and links frames shaped like the pipeline outputs."""
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"C{i}" for i in range(n_rows)], dtype=object)
+
+    risk = rng.uniform(0, 100, n_rows).round(2)
+    accounts = pd.DataFrame({
+        "account_id": ids,
+        "total_amount": rng.lognormal(11, 1.5, n_rows).round(2),
+        "avg_amount": rng.lognormal(10, 1.5, n_rows),
+        "tx_count": rng.integers(1, 50, n_rows),
+        "avg_balance_diff": rng.normal(0, 5e4, n_rows),
+        "zero_balance_count": rng.integers(0, 10, n_rows),
+        "riskScore": risk,
+        "class": np.select([risk >= 65, risk >= 40], ["FRAUD", "AT_RISK"], "NORMAL")
+    })
+    links = pd.DataFrame({
+        "src": ids[rng.integers(0, n_rows, n_rows)],
+        "dst": ids[rng.integers(0, n_rows, n_rows)],
+        "amount": rng.uniform(500, 300000, n_rows).round(2),
+        "step": np.arange(1, n_rows + 1),
+        "fraudEdge": rng.integers(0, 2, n_rows)
+    })
+    return {"final_accounts": accounts, "fraud_links": links}
+
+
+def bench_outputs(sizes=DEFAULT_SIZES):
+    """Write time, read time and disk size of CSV vs Parquet pipeline outputs."""
+    formats = ["csv", "parquet"] if HAS_PARQUET else ["csv"]
+    results = []
+    for n in sizes:
+        frames = make_output_frames(n)
+        for name, df in frames.items():
+            for fmt in formats:
+                with tempfile.TemporaryDirectory() as tmp:
+                    t0 = time.perf_counter()
+                    path = write_table(df, tmp, name, fmt)
+                    write_s = time.perf_counter() - t0
+
+                    t0 = time.perf_counter()
+                    read_table(path)
+                    read_s = time.perf_counter() - t0
+
+                    size_mb = os.path.getsize(path) / 1e6
+
+                results.append({
+                    "rows": n, "table": name, "format": fmt,
+                    "write_s": round(write_s, 4), "read_s": round(read_s, 4),
+                    "size_mb": round(size_mb, 2)
+                })
+                print(f"⏱️  {name:<15} {fmt:<8} {n:>12,} rows: "
+                      f"write {write_s:8.4f}s  read {read_s:8.4f}s  {size_mb:9.2f} MB")
+        del frames
+    return results
+
+
+def bench_synthetic(sizes=DEFAULT_SIZES, repeat=3):
+    """Edges/sec of generate_synthetic_links for graphs of n accounts."""
+    results = []
+    for n in sizes:
+        rng = np.random.default_rng(SEED)
+        ids = np.array([f"C{i}" for i in range(n)], dtype=object)
+        # Same class mix the pipeline forces: ~3% FRAUD, ~4.5% AT_RISK
+        classes = rng.choice(["FRAUD", "AT_RISK", "NORMAL"], n, p=[0.03, 0.045, 0.925])
+
+        best = float("inf")
+        links = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            links, _ = generate_synthetic_links(ids, classes, 1, np.random.default_rng(SEED))
+            best = min(best, time.perf_counter() - t0)
+
+        results.append({
+            "accounts": n,
+            "links": len(links),
+            "seconds": round(best, 4),
+            "links_per_sec": int(len(links) / best) if best > 0 else 0
+        })
+        print(f"⏱️  synthetic {n:>12,} accounts: {best:8.4f}s  "
+              f"({len(links):,} links, {results[-1]['links_per_sec']:,} links/s)")
+        del links
+    return results
+
+def bench_parallel(sizes=DEFAULT_SIZES, workers=DEFAULT_WORKERS):
+    """
+    Wall time of steps 0-3.5 (+ score moments) serially vs aggregate_parallel
+    per worker count, checking each parallel result is bit-identical.
+    """
+    windows = parse_windows(WINDOWS)
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transactions.csv")
+            make_paysim_frame(n).to_csv(path, index=False)
+
+            t0 = time.perf_counter()
+            df = prepare_transactions(pd.read_csv(path))
+            accounts = finalize_aggregates(merge_partials([partial_aggregates(df)]))
+            accounts = add_velocity_features(accounts, partial_velocity(df), windows)
+            moments = bucket_moments(accounts, list(score_weights(windows)))
+            serial_s = time.perf_counter() - t0
+            del df
+            print(f"⏱️  aggregate {n:>12,} rows  serial      : {serial_s:8.4f}s")
+
+            for w in workers:
+                t0 = time.perf_counter()
+                par_accounts, par_moments, _ = aggregate_parallel(path, w, windows=windows)
+                par_s = time.perf_counter() - t0
+
+                identical = par_accounts.equals(accounts) and all(
+                    a[0] == b[0] and np.array_equal(a[1], b[1]) and np.array_equal(a[2], b[2])
+                    for a, b in zip(par_moments, moments)
+                )
+                results.append({
+                    "rows": n, "workers": w,
+                    "serial_s": round(serial_s, 4), "parallel_s": round(par_s, 4),
+                    "speedup": round(serial_s / par_s, 2) if par_s > 0 else 0,
+                    "identical": identical
+                })
+                print(f"⏱️  aggregate {n:>12,} rows  {w:>3} workers : {par_s:8.4f}s  "
+                      f"(x{results[-1]['speedup']:.2f}, identical={identical})")
+    return results
+
+READ_MODES = ["untyped", "schema-c"] + (["schema-pyarrow"] if HAS_ARROW_CSV else [])
+
+def _measure_read(path, mode):
+    """Runs in a fresh process so ru_maxrss is the peak of this read alone."""
+    t0 = time.perf_counter()
+    if mode == "untyped":
+        # What run_pipeline did before the input schema
+        df = pd.read_csv(path)
+        for col in ["amount", "oldbalanceOrg", "newbalanceOrig"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    else:
+        df = read_transactions(path, engine=mode.split("-")[1])
+    seconds = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return seconds, peak_mb, df.memory_usage(deep=True).sum() / 1e6
+
+
+def bench_read(sizes=DEFAULT_SIZES):
+    """Parse time, peak RSS and frame size of the untyped vs schema reads."""
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transactions.csv")
+            write_paysim_csv(path, n)
+            for mode in READ_MODES:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    seconds, peak_mb, frame_mb = pool.submit(_measure_read, path, mode).result()
+                results.append({
+                    "rows": n, "mode": mode, "seconds": round(seconds, 4),
+                    "peak_rss_mb": round(peak_mb, 1), "frame_mb": round(frame_mb, 1)
+                })
+                print(f"⏱️  read {mode:<15} {n:>12,} rows: {seconds:8.4f}s  "
+                      f"peak RSS {peak_mb:8.1f} MB  frame {frame_mb:8.1f} MB")
+    return results
+
+RING_WINDOWS = [0, 24]
+
+def bench_rings(sizes=DEFAULT_SIZES):
+    """
+    SCC and ring-detection time on random graphs of n transfers between
+    n / 4 accounts, untimed and with a 24-step window.
+    """
+    results = []
+    for n in sizes:
+        rng = np.random.default_rng(SEED)
+        n_accounts = max(n // 4, 2)
+        src = rng.integers(0, n_accounts, n)
+        dst = rng.integers(0, n_accounts, n)
+        step = rng.integers(1, 744, n)
+        amount = rng.uniform(1, 10_000, n)
+        fraud = (rng.random(n) < 0.01).astype(np.int64)
+        ids = np.array([f"C{i}" for i in range(n_accounts)], dtype=object)
+
+        t0 = time.perf_counter()
+        labels = strongly_connected_components(src, dst, n_accounts)
+        scc_s = time.perf_counter() - t0
+
+        for window in RING_WINDOWS:
+            t0 = time.perf_counter()
+            rings, truncated = detect_rings(ids, src, dst, step, amount, fraud, window=window)
+            seconds = time.perf_counter() - t0
+            results.append({
+                "edges": n, "window": window, "scc_s": round(scc_s, 4),
+                "cyclic_accounts": int((labels >= 0).sum()),
+                "seconds": round(seconds, 4), "rings": len(rings), "truncated": truncated
+            })
+            print(f"⏱️  rings {n:>12,} edges  window {window:>3}: {seconds:8.4f}s  "
+                  f"(SCC {scc_s:.4f}s, {len(rings):,} rings{', capped' if truncated else ''})")
+    return results
+
+def bench_velocity(sizes=DEFAULT_SIZES):
+    """
+    Windowed velocity / fan feature time (state build + features) with exact
+    and sketched distinct counts, the state size each keeps, and the sketch's
+    mean relative error on the degrees.
+    """
+    windows = parse_windows(WINDOWS)
+    results = []
+    for n in sizes:
+        df = prepare_transactions(make_paysim_frame(n))
+        account_ids = finalize_aggregates(merge_partials([partial_aggregates(df)]))["account_id"]
+
+        exact = None
+        for mode, precision in (("exact", None), ("sketch", SKETCH_PRECISION)):
+            t0 = time.perf_counter()
+            state = partial_velocity(df, precision)
+            features = velocity_features(state, account_ids, windows, precision)
+            seconds = time.perf_counter() - t0
+
+            row = {
+                "rows": n, "mode": mode, "seconds": round(seconds, 4),
+                "rows_per_sec": int(n / seconds) if seconds > 0 else 0,
+                "state_rows": sum(len(f) for name, f in state.items() if name != "ids")
+            }
+            if exact is None:
+                exact = features
+            else:
+                row["degree_error"] = round(float(np.mean([
+                    ((features[c] - exact[c]).abs() / exact[c].clip(lower=1)).mean()
+                    for c in ("in_degree", "out_degree")
+                ])), 4)
+            results.append(row)
+            print(f"⏱️  velocity {n:>12,} rows  {mode:<6}: {seconds:8.4f}s  "
+                  f"({row['rows_per_sec']:,} rows/s, {row['state_rows']:,} state rows"
+                  + (f", degree error {row['degree_error']:.2%})" if "degree_error" in row else ")"))
+        del df
+    return results
+
+def _best_time(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def bench_serialize(sizes=SERIALIZE_SIZES, repeat=5):
+    """
+    Build + encode time and raw / gzip / brotli size of one /api/graph response
+    with n edges: object shape through the stdlib encoder (what jsonify did),
+    object shape through graph_codec.dumps, and the columnar shape.
+    """
+    results = []
+    for n in sizes:
+        frames = make_output_frames(n)
+        store = GraphStore(frames["final_accounts"], frames["fraud_links"])
+        edges = np.arange(n, dtype=np.int64)
+        endpoints = pd.unique(np.concatenate([store.src[edges], store.dst[edges]]))
+
+        def objects():
+            return {"nodes": store.node_dicts(endpoints), "links": store.link_dicts(edges), "nextCursor": None}
+
+        variants = {
+            "objects-stdlib": lambda: json.dumps(objects(), sort_keys=True, separators=(",", ":")).encode("utf-8"),
+            "objects-fast": lambda: dumps(objects()),
+            "columnar-fast": lambda: dumps(store.graph_columns(edges)),
+        }
+        for name, encode in variants.items():
+            seconds, body = _best_time(encode, repeat)
+            row = {
+                "edges": n, "variant": name, "seconds": round(seconds, 5),
+                "bytes": len(body), "gzip_bytes": len(gzip.compress(body, compresslevel=6))
+            }
+            if HAS_BROTLI:
+                import brotli
+                row["br_bytes"] = len(brotli.compress(body, quality=5))
+            results.append(row)
+            print(f"⏱️  serialize {n:>9,} edges  {name:<15} {seconds * 1000:9.2f} ms  "
+                  f"{row['bytes'] / 1024:10.1f} KiB  gzip {row['gzip_bytes'] / 1024:9.1f} KiB"
+                  + (f"  br {row['br_bytes'] / 1024:9.1f} KiB" if HAS_BROTLI else ""))
+    if not HAS_ORJSON:
+        print("ℹ️ orjson not installed: the *-fast variants used the stdlib encoder")
+    return results
+
+def _scan_search(accounts, params):
+    """What the CSV fallback did without an index: filter and sort the frame."""
+    columns = {"risk": "riskScore", "amount": "total_amount", "txCount": "tx_count"}
+    d = accounts
+    if params["q"]:
+        d = d[d["account_id"].str.startswith(params["q"])]
+    if params["minRisk"] is not None:
+        d = d[d["riskScore"] >= params["minRisk"]]
+    if params["classes"]:
+        d = d[d["class"].isin(params["classes"])]
+    if params["sort"] == "id":
+        d = d.sort_values("account_id")
+    else:
+        d = d.sort_values([columns[params["sort"]], "account_id"], ascending=[False, True], kind="stable")
+    return d.head(params["limit"] + 1)
+
+
+def bench_search(sizes=DEFAULT_SIZES, repeat=5):
+    """Index build time, then per-query time of the search index vs a pandas scan."""
+    results = []
+    for n in sizes:
+        accounts = make_output_frames(n)["final_accounts"]
+        accounts["account_id"] = accounts["account_id"].astype("string")
+
+        t0 = time.perf_counter()
+        index = AccountSearchIndex(accounts)
+        seconds = time.perf_counter() - t0
+        results.append({"rows": n, "mode": "build", "variant": "index", "seconds": round(seconds, 4)})
+        print(f"⏱️  search {n:>12,} accounts  build              : {seconds:9.4f}s")
+
+        for name, args in SEARCH_QUERIES.items():
+            params = parse_search_params(args)
+            for variant, run in (("index", lambda: index.search(params)),
+                                 ("scan", lambda: _scan_search(accounts, params))):
+                seconds, _ = _best_time(run, repeat)
+                results.append({"rows": n, "mode": name, "variant": variant, "seconds": round(seconds, 6)})
+                print(f"⏱️  search {n:>12,} accounts  {name:<18} {variant:<5}: {seconds * 1000:9.3f} ms")
+        del index, accounts
+    return results
+
+
+def _profile_pipeline(path, out_dir):
+    """Runs in a fresh process so the stage peak RSS belongs to this run alone."""
+    return run_pipeline(path, out_dir=out_dir)["profile"]
+
+
+def bench_pipeline(sizes=DEFAULT_SIZES):
+    """
+    End-to-end run_pipeline (default config) on synthetic PaySim inputs:
+    wall time, rows/sec and peak RSS of every stage, plus the total.
+    """
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transactions.csv")
+            write_paysim_csv(path, n)
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                profile = pool.submit(_profile_pipeline, path, os.path.join(tmp, "out")).result()
+
+        stages = dict(profile["stages"])
+        stages["total"] = {
+            "seconds": profile["totalSeconds"], "rows": n, "peakRssBytes": profile["peakRssBytes"]
+        }
+        for stage, info in stages.items():
+            rows = info.get("rows")
+            results.append({
+                "rows": n, "stage": stage, "seconds": info["seconds"],
+                "input_rows": rows,
+                "rows_per_sec": int(rows / info["seconds"]) if rows and info["seconds"] > 0 else None,
+                "peak_rss_mb": round(info["peakRssBytes"] / 2**20, 1) if info.get("peakRssBytes") else None
+            })
+            rate = f"{results[-1]['rows_per_sec']:>14,} rows/s" if results[-1]["rows_per_sec"] else " " * 21
+            print(f"⏱️  pipeline {n:>12,} rows  {stage:<10} {info['seconds']:9.3f}s  {rate}  "
+                  f"peak {results[-1]['peak_rss_mb'] or 0:8.1f} MB")
+    return results
+
+_COLD_START_SCRIPT = '''
+import json, sys, time
+t0 = time.perf_counter()
+import app
+timings = {"import": time.perf_counter() - t0}
+client = app.app.test_client()
+for name, path in PATHS:
+    t0 = time.perf_counter()
+    client.get(path)
+    timings[name] = time.perf_counter() - t0
+print(json.dumps(timings))
+'''
+
+
+def bench_cold_start(repeat=5):
+    """
+    `import app` and first-request latency in fresh interpreters, as a
+    serverless cold start sees them (best of `repeat`). Uses the NEO4J_*
+    settings of the environment; /api/graph falls back to the local outputs
+    when Neo4j is unreachable.
+    """
+    script = f"PATHS = {COLD_START_PATHS!r}\n" + _COLD_START_SCRIPT
+    runs = []
+    for _ in range(repeat):
+        done = subprocess.run([sys.executable, "-c", script], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True)
+        runs.append(json.loads(done.stdout.strip().splitlines()[-1]))
+
+    results = []
+    for name in runs[0]:
+        seconds = min(r[name] for r in runs)
+        results.append({"variant": name, "seconds": round(seconds, 4)})
+        print(f"⏱️  cold start  {name:<13} {seconds * 1000:9.1f} ms")
+    return results
+
+# ======================================================
+# BASELINES
+# ======================================================
+def save_baseline(path, name, results):
+    """Write results with enough context to tell whether a comparison is fair."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "benchmark": name,
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "pipelineVersion": PIPELINE_VERSION,
+            "results": results
+        }, f, indent=2)
+    print(f"💾 Baseline saved to {path}")
+
+
+def _baseline_key(row):
+    return tuple((k, row[k]) for k in BASELINE_KEYS if k in row)
+
+
+def compare_baseline(path, results):
+    """Print each timing next to the baseline's (ratio > 1 means slower now)."""
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    baseline = {_baseline_key(r): r for r in saved["results"]}
+
+    if saved.get("pipelineVersion") != PIPELINE_VERSION:
+        print(f"⚠️ Baseline is from pipeline version {saved.get('pipelineVersion')}, "
+              f"this tree is {PIPELINE_VERSION}; re-record it")
+    if saved.get("cpus") != os.cpu_count():
+        print(f"⚠️ Baseline was recorded on {saved.get('cpus')} CPUs, this host has {os.cpu_count()}")
+
+    compared = []
+    for row in results:
+        old = baseline.get(_baseline_key(row))
+        label = " ".join(f"{k}={v}" for k, v in _baseline_key(row))
+        if old is None:
+            # A new stage or size: say so instead of silently skipping it
+            print(f"❔ {label:<40} no baseline row")
+            continue
+        for field, value in row.items():
+            if (field == "seconds" or field.endswith("_s")) and old.get(field) and value is not None:
+                ratio = value / old[field]
+                compared.append({"key": label, "field": field, "baseline": old[field], "now": value, "ratio": round(ratio, 3)})
+                flag = "🐢" if ratio > 1.1 else "🚀" if ratio < 0.9 else "  "
+                print(f"{flag} {label:<40} {field:<12} {old[field]:10.4f}s -> {value:10.4f}s  x{ratio:.2f}")
+    return compared
+
+BENCHMARKS = {
+    "links": bench_real_links,
+    "outputs": bench_outputs,
+    "synthetic": bench_synthetic,
+    "parallel": bench_parallel,
+    "read": bench_read,
+    "rings": bench_rings,
+    "velocity": bench_velocity,
+    "serialize": bench_serialize,
+    "search": bench_search,
+    "pipeline": bench_pipeline,
+    "coldstart": bench_cold_start,
+}
+
+# ======================================================
+# CLI SUPPORT
+# ======================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEXUS pipeline benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, nargs="+", help="input sizes (default per benchmark)")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (parallel)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare timings with a saved baseline")
+    args = parser.parse_args()
+
+    kwargs = {"workers": args.workers} if args.workers else {}
+    if args.rows:
+        kwargs["sizes"] = args.rows
+    results = BENCHMARKS[args.name](**kwargs)
+
+    if args.compare:
+        compare_baseline(args.compare, results)
+    if args.save:
+        save_baseline(args.save, args.name, results)
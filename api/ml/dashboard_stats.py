@@ -0,0 +1,244 @@
+import json
+import os
+
+import numpy as np
+
+# ======================================================
+# CONFIG
+# ======================================================
+STATS_NAME = "dashboard_stats.json"
+
+# Accounts listed in the top-by-risk / top-by-volume tables
+TOP_N = int(os.getenv("DASHBOARD_TOP_N", "50"))
+# Equal-width buckets the link step range is cut into
+STEP_BUCKETS = int(os.getenv("DASHBOARD_STEP_BUCKETS", "48"))
+
+ML_CLASSES = ("FRAUD", "AT_RISK", "NORMAL")
+
+# riskScore histogram: ten buckets of width 10 over 0-100 (100 is in the last)
+RISK_BIN_EDGES = list(range(0, 101, 10))
+
+# Severity bands of the fraud dashboard: score above the bound, first match wins
+RISK_BANDS = [("critical", 90), ("high", 70), ("medium", 40)]
+
+# ======================================================
+# CYPHER (graph-wide totals after an incremental ingest)
+# ======================================================
+ACCOUNT_TOTALS_QUERY = """
+MATCH (a:Account)
+RETURN count(a) AS accounts, avg(a.riskScore) AS avg_risk
+"""
+
+CLASS_COUNTS_QUERY = """
+MATCH (a:Account)
+RETURN a.mlClass AS class, count(*) AS count
+"""
+
+RISK_HISTOGRAM_QUERY = """
+MATCH (a:Account)
+WITH CASE
+  WHEN coalesce(a.riskScore, 0.0) >= 100 THEN 9
+  WHEN coalesce(a.riskScore, 0.0) <= 0 THEN 0
+  ELSE toInteger(floor(a.riskScore / 10))
+END AS bin,
+CASE
+  WHEN a.riskScore > 90 THEN 'critical'
+  WHEN a.riskScore > 70 THEN 'high'
+  WHEN a.riskScore > 40 THEN 'medium'
+  ELSE 'low'
+END AS band
+RETURN bin, band, count(*) AS count
+"""
+
+LINK_TOTALS_QUERY = """
+MATCH ()-[t:TRANSFERRED_TO]->()
+RETURN count(t) AS links,
+       sum(t.fraudEdge) AS fraud_links,
+       sum(t.amount) AS volume,
+       min(t.step) AS step_min,
+       max(t.step) AS step_max
+"""
+
+STEP_BUCKETS_QUERY = """
+MATCH ()-[t:TRANSFERRED_TO]->()
+WITH toInteger((t.step - $step_min) * $buckets / $span) AS bucket, t
+RETURN bucket,
+       count(t) AS count,
+       sum(t.amount) AS amount,
+       sum(t.fraudEdge) AS fraud_count,
+       sum(CASE WHEN t.fraudEdge = 1 THEN t.amount ELSE 0.0 END) AS fraud_amount
+"""
+
+TOP_ACCOUNTS_QUERY = """
+MATCH (a:Account)
+RETURN a.id AS id, a.riskScore AS riskScore, a.mlClass AS class,
+       a.total_amount AS totalAmount, a.tx_count AS txCount
+ORDER BY {order} DESC, a.id
+LIMIT $limit
+"""
+
+# ======================================================
+# SUMMARY FROM PIPELINE OUTPUTS
+# ======================================================
+def step_bucket_bounds(step_min, step_max, buckets=STEP_BUCKETS):
+    """
+    Inclusive (first, last) step of each bucket; step s falls in bucket
+    (s - step_min) * n // span, the same integer formula Neo4j evaluates.
+    """
+    span = step_max - step_min + 1
+    n = min(buckets, span)
+    return [(step_min + -(-i * span // n), step_min + -(-(i + 1) * span // n) - 1) for i in range(n)]
+
+
+def _step_buckets(step, amount, fraud, buckets=STEP_BUCKETS):
+    """Per-bucket transfer count, amount and the fraud share of both."""
+    if len(step) == 0:
+        return []
+    step_min, step_max = int(step.min()), int(step.max())
+    bounds = step_bucket_bounds(step_min, step_max, buckets)
+    n = len(bounds)
+    bucket = (step - step_min) * n // (step_max - step_min + 1)
+
+    count = np.bincount(bucket, minlength=n)
+    total = np.bincount(bucket, weights=amount, minlength=n)
+    fraud_count = np.bincount(bucket, weights=fraud, minlength=n)
+    fraud_total = np.bincount(bucket, weights=amount * fraud, minlength=n)
+    return [
+        {
+            "stepStart": first,
+            "stepEnd": last,
+            "count": int(count[i]),
+            "amount": round(float(total[i]), 2),
+            "fraudCount": int(fraud_count[i]),
+            "fraudAmount": round(float(fraud_total[i]), 2)
+        }
+        for i, (first, last) in enumerate(bounds)
+    ]
+
+
+def _top_accounts(accounts, column, top_n):
+    top = accounts.sort_values([column, "account_id"], ascending=[False, True], kind="stable").head(top_n)
+    return [
+        {
+            "id": str(r["account_id"]),
+            "riskScore": round(float(r["riskScore"]), 2),
+            "class": str(r["class"]),
+            "totalAmount": round(float(r["total_amount"]), 2),
+            "txCount": int(r["tx_count"])
+        }
+        for r in top.to_dict("records")
+    ]
+
+
+def summarize(accounts, links, top_n=TOP_N, buckets=STEP_BUCKETS):
+    """
+    Dashboard summary of one pipeline output: totals, class counts, riskScore
+    histogram and severity bands, amount by step bucket and the top accounts
+    by risk and by volume. Plain JSON types, so it is written once and
+    served as is.
+    """
+    risk = accounts["riskScore"].to_numpy(dtype=np.float64)
+    counts, _ = np.histogram(np.clip(risk, 0, 100), bins=RISK_BIN_EDGES)
+    band = np.select([risk > bound for _, bound in RISK_BANDS], [name for name, _ in RISK_BANDS], "low")
+    bands = {name: int((band == name).sum()) for name in [n for n, _ in RISK_BANDS] + ["low"]}
+    classes = accounts["class"].astype(str).value_counts()
+
+    step = links["step"].to_numpy(dtype=np.int64)
+    amount = links["amount"].to_numpy(dtype=np.float64)
+    fraud = links["fraudEdge"].to_numpy(dtype=np.int64)
+
+    return {
+        "source": "pipeline",
+        "accounts": len(accounts),
+        "links": len(links),
+        "fraudLinks": int(fraud.sum()),
+        "fraudLinkRatio": round(float(fraud.mean()), 4) if len(fraud) else 0.0,
+        "totalVolume": round(float(amount.sum()), 2),
+        "avgRisk": round(float(risk.mean()), 2) if len(risk) else 0.0,
+        "classCounts": {c: int(classes.get(c, 0)) for c in ML_CLASSES},
+        "riskBands": bands,
+        "riskHistogram": {"edges": RISK_BIN_EDGES, "counts": counts.tolist()},
+        "amountByStep": _step_buckets(step, amount, fraud, buckets),
+        "topRisk": _top_accounts(accounts, "riskScore", top_n),
+        "topVolume": _top_accounts(accounts, "total_amount", top_n)
+    }
+
+# ======================================================
+# SUMMARY FROM NEO4J
+# ======================================================
+def summarize_neo4j(session, top_n=TOP_N, buckets=STEP_BUCKETS):
+    """
+    Same summary computed by aggregation queries over the stored graph.
+
+    Used after incremental ingests, where accounts are re-blended in Neo4j
+    and no single output file holds the merged state.
+    """
+    totals = session.run(ACCOUNT_TOTALS_QUERY).single()
+    links = session.run(LINK_TOTALS_QUERY).single()
+
+    classes = {r["class"]: r["count"] for r in session.run(CLASS_COUNTS_QUERY)}
+    histogram = [0] * (len(RISK_BIN_EDGES) - 1)
+    bands = {name: 0 for name, _ in RISK_BANDS}
+    bands["low"] = 0
+    for r in session.run(RISK_HISTOGRAM_QUERY):
+        histogram[r["bin"]] += r["count"]
+        bands[r["band"]] += r["count"]
+
+    amount_by_step = []
+    if links["links"]:
+        step_min, step_max = int(links["step_min"]), int(links["step_max"])
+        bounds = step_bucket_bounds(step_min, step_max, buckets)
+        rows = {r["bucket"]: r for r in session.run(
+            STEP_BUCKETS_QUERY, step_min=step_min, buckets=len(bounds), span=step_max - step_min + 1
+        )}
+        for i, (first, last) in enumerate(bounds):
+            r = rows.get(i)
+            amount_by_step.append({
+                "stepStart": first,
+                "stepEnd": last,
+                "count": r["count"] if r else 0,
+                "amount": round(r["amount"], 2) if r else 0.0,
+                "fraudCount": r["fraud_count"] if r else 0,
+                "fraudAmount": round(r["fraud_amount"], 2) if r else 0.0
+            })
+
+    def top(order):
+        query = TOP_ACCOUNTS_QUERY.format(order=order)
+        return [dict(r) for r in session.run(query, limit=top_n)]
+
+    n_links = links["links"] or 0
+    return {
+        "source": "neo4j",
+        "accounts": totals["accounts"],
+        "links": n_links,
+        "fraudLinks": links["fraud_links"] or 0,
+        "fraudLinkRatio": round((links["fraud_links"] or 0) / n_links, 4) if n_links else 0.0,
+        "totalVolume": round(links["volume"] or 0.0, 2),
+        "avgRisk": round(totals["avg_risk"] or 0.0, 2),
+        "classCounts": {c: classes.get(c, 0) for c in ML_CLASSES},
+        "riskBands": bands,
+        "riskHistogram": {"edges": RISK_BIN_EDGES, "counts": histogram},
+        "amountByStep": amount_by_step,
+        "topRisk": top("a.riskScore"),
+        "topVolume": top("a.total_amount")
+    }
+
+# ======================================================
+# STORAGE
+# ======================================================
+def write_stats(stats, out_dir):
+    """Write the summary next to the outputs it describes (atomic replace)."""
+    path = os.path.join(out_dir, STATS_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_stats(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATS_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -1,23 +1,141 @@
 import pandas as pd
 import numpy as np
-import random
+import math
 import os
+
+try:
+    from ml.table_io import write_table, add_edge_keys
+    from ml.risk_propagation import propagate_risk, ALPHA, TOLERANCE, MAX_ITER
+    from ml.ring_detection import detect_rings, MAX_LENGTH, WINDOW, MAX_RINGS
+    from ml.dashboard_stats import summarize, write_stats
+    from ml.metrics import StageProfiler
+    from ml.velocity_features import (
+        partial_velocity, merge_velocity, velocity_features, feature_weights, parse_windows,
+        WINDOWS, DISTINCT_MODES, DISTINCT_MODE, SKETCH_PRECISION, MIN_PRECISION, MAX_PRECISION
+    )
+except ImportError:
+    from table_io import write_table, add_edge_keys
+    from risk_propagation import propagate_risk, ALPHA, TOLERANCE, MAX_ITER
+    from ring_detection import detect_rings, MAX_LENGTH, WINDOW, MAX_RINGS
+    from dashboard_stats import summarize, write_stats
+    from metrics import StageProfiler
+    from velocity_features import (
+        partial_velocity, merge_velocity, velocity_features, feature_weights, parse_windows,
+        WINDOWS, DISTINCT_MODES, DISTINCT_MODE, SKETCH_PRECISION, MIN_PRECISION, MAX_PRECISION
+    )
+
+# pyarrow's multi-threaded CSV parser is optional, like Parquet output
+try:
+    import pyarrow.csv  # noqa: F401
+    HAS_ARROW_CSV = True
+except ImportError:
+    HAS_ARROW_CSV = False
 # from sklearn.preprocessing import StandardScaler
 # from sklearn.ensemble import IsolationForest
 
 # ======================================================
 # CONFIG
 # ======================================================
-SEED = 42
-MIN_ROWS = 1000
-MAX_ROWS = 2000
+# Defaults for every run; each can be overridden per run (see pipeline_config)
+SEED = int(os.getenv("PIPELINE_SEED", "42"))
+
+# "sample" keeps a random MIN_ROWS..MAX_ROWS subset of the accounts,
+# "full" scores and links every account in the input
+SAMPLE_MODES = ("sample", "full")
+SAMPLE_MODE = os.getenv("PIPELINE_SAMPLE_MODE", "sample")
+MIN_ROWS = int(os.getenv("PIPELINE_MIN_ROWS", "1000"))
+MAX_ROWS = int(os.getenv("PIPELINE_MAX_ROWS", "2000"))
 
 # graph density controls
-MIN_LINKS_PER_NODE = 2
-MAX_LINKS_PER_NODE = 8
+MIN_LINKS_PER_NODE = int(os.getenv("PIPELINE_MIN_LINKS_PER_NODE", "2"))
+MAX_LINKS_PER_NODE = int(os.getenv("PIPELINE_MAX_LINKS_PER_NODE", "8"))
+
+# riskScore thresholds for the FRAUD / AT_RISK classes
+FRAUD_THRESHOLD = float(os.getenv("FRAUD_THRESHOLD", "65")) # Lowered from 80 to catch more
+AT_RISK_THRESHOLD = float(os.getenv("AT_RISK_THRESHOLD", "40")) # Lowered from 55
+
+# Processes for steps 0-4 (1 = serial). Does not change the outputs, so it is
+# not part of pipeline_config()
+WORKERS = int(os.getenv("PIPELINE_WORKERS", "1"))
+# Chunk size of the real-link pass when the aggregation ran in parallel
+LINK_CHUNKSIZE = 1_000_000
+
+# Parser for whole-file reads: "pyarrow" parses ~3x faster, "c" peaks at
+# less than half the memory; "auto" takes pyarrow when installed.
+# Chunked (streaming) reads always use the C parser.
+CSV_ENGINES = ("auto", "pyarrow", "c")
+CSV_ENGINE = os.getenv("PIPELINE_CSV_ENGINE", "auto")
+
+# Bump when a change alters what run_pipeline writes for the same input, so
+# cached results of older pipeline code are not reused.
+PIPELINE_VERSION = 11
+
+def pipeline_config(overrides=None):
+    """
+    Everything besides the input that shapes the pipeline outputs.
+
+    Starts from the env-backed module defaults; overrides (e.g. from a CLI
+    flag or the /api/process-ml body) replace single entries. Raises
+    ValueError for unknown names or inconsistent values.
+    """
+    config = {
+        "version": PIPELINE_VERSION,
+        "seed": SEED,
+        "sample_mode": SAMPLE_MODE,
+        "min_rows": MIN_ROWS,
+        "max_rows": MAX_ROWS,
+        "min_links_per_node": MIN_LINKS_PER_NODE,
+        "max_links_per_node": MAX_LINKS_PER_NODE,
+        "fraud_threshold": FRAUD_THRESHOLD,
+        "at_risk_threshold": AT_RISK_THRESHOLD,
+        "propagation_alpha": ALPHA,
+        "propagation_tol": TOLERANCE,
+        "propagation_max_iter": MAX_ITER,
+        "ring_max_length": MAX_LENGTH,
+        "ring_window": WINDOW,
+        "ring_max_count": MAX_RINGS,
+        "velocity_windows": WINDOWS,
+        "distinct_counting": DISTINCT_MODE,
+        "sketch_precision": SKETCH_PRECISION
+    }
+
+    if overrides is not None and not isinstance(overrides, dict):
+        raise ValueError("config must be an object of pipeline options")
+
+    for name, value in (overrides or {}).items():
+        if name not in config or name == "version":
+            raise ValueError(f"Unknown pipeline option: {name}")
+        try:
+            config[name] = type(config[name])(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Invalid value for {name}: {value}")
+        # float("nan") / float("inf") parse fine but break every comparison below
+        if isinstance(config[name], float) and not math.isfinite(config[name]):
+            raise ValueError(f"Invalid value for {name}: {value}")
 
-random.seed(SEED)
-np.random.seed(SEED)
+    if config["sample_mode"] not in SAMPLE_MODES:
+        raise ValueError(f"sample_mode must be one of {', '.join(SAMPLE_MODES)}")
+    if not 0 < config["min_rows"] <= config["max_rows"]:
+        raise ValueError("Need 0 < min_rows <= max_rows")
+    if not 0 < config["min_links_per_node"] <= config["max_links_per_node"]:
+        raise ValueError("Need 0 < min_links_per_node <= max_links_per_node")
+    if config["at_risk_threshold"] > config["fraud_threshold"]:
+        raise ValueError("at_risk_threshold must not exceed fraud_threshold")
+    if not 0 < config["propagation_alpha"] < 1:
+        raise ValueError("propagation_alpha must be between 0 and 1")
+    if config["propagation_tol"] <= 0 or config["propagation_max_iter"] < 1:
+        raise ValueError("propagation_tol and propagation_max_iter must be positive")
+    if config["ring_max_length"] < 2:
+        raise ValueError("ring_max_length must be at least 2")
+    if config["ring_window"] < 0 or config["ring_max_count"] < 0:
+        raise ValueError("ring_window and ring_max_count must not be negative")
+    # Normalized, so "24,1" and "1,24" are the same configuration
+    config["velocity_windows"] = ",".join(str(w) for w in parse_windows(config["velocity_windows"]))
+    if config["distinct_counting"] not in DISTINCT_MODES:
+        raise ValueError(f"distinct_counting must be one of {', '.join(DISTINCT_MODES)}")
+    if not MIN_PRECISION <= config["sketch_precision"] <= MAX_PRECISION:
+        raise ValueError(f"sketch_precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+    return config
 
 # ======================================================
 # SAFE COLUMN CREATOR
@@ -27,23 +145,71 @@ def ensure_column(df, col, fn):
         df[col] = fn(len(df))
     return df
 
+def account_labels(numbers):
+    return ("ACC_" + pd.Series(numbers).astype(str)).to_numpy(dtype=object)
+
 # ======================================================
-# MAIN PIPELINE
+# INPUT SCHEMA
 # ======================================================
-def run_pipeline(input_csv, out_dir="backend/output"):
-    print("🚀 fraud_data_pipeline started")
-    print("📂 Input CSV:", input_csv)
+# The only input columns the pipeline uses; everything else (type,
+# destination balances, fraud flags) is never parsed. Ids are parsed straight
+# into pandas' Arrow-backed str dtype instead of one Python object per cell.
+# Money stays float64: amounts carry cents up to ~1e8, past float32's ~7
+# significant digits. Numbers are inferred and coerced afterwards (see
+# to_number) so a stray non-numeric cell becomes 0 instead of failing.
+INPUT_SCHEMA = {
+    "nameOrig": "str",
+    "nameDest": "str",
+    "step": "int64",
+    "amount": "float64",
+    "oldbalanceOrg": "float64",
+    "newbalanceOrig": "float64"
+}
 
-    # 1. Resolve Output Directory
-    # If out_dir is not absolute, make it relative to the parent of this script (api/)
-    if not os.path.isabs(out_dir):
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        out_dir = os.path.join(BASE_DIR, out_dir)
-    
-    os.makedirs(out_dir, exist_ok=True)
-    print("📂 Output Dir:", out_dir)
+def read_transactions(source, chunksize=None, engine=None):
+    """
+    Read a PaySim-style CSV (path or file object) with the declared schema.
+
+    Returns a DataFrame, or an iterator of them when chunksize is set.
+    Inputs with none of the schema columns are read whole, as before.
+    """
+    columns = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    usecols = [c for c in columns if c.strip() in INPUT_SCHEMA]
+    if not usecols:
+        return pd.read_csv(source, chunksize=chunksize)
 
-    df = pd.read_csv(input_csv)
+    dtype = {c: INPUT_SCHEMA[c.strip()] for c in usecols if INPUT_SCHEMA[c.strip()] == "str"}
+
+    engine = engine or CSV_ENGINE
+    if engine == "auto":
+        engine = "pyarrow" if HAS_ARROW_CSV else "c"
+    if chunksize or engine not in CSV_ENGINES:
+        engine = "c"
+
+    return pd.read_csv(source, usecols=usecols, dtype=dtype, chunksize=chunksize, engine=engine)
+
+def to_number(values):
+    """Coerce to numbers with NaN -> 0, skipping the work for clean numeric columns."""
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values, errors="coerce")
+    return values.fillna(0) if values.hasnans else values
+
+# ======================================================
+# TRANSACTION PREPARATION
+# ======================================================
+def prepare_transactions(df, row_offset=0, seed=SEED):
+    """
+    Cleanup, normalization and per-transaction features for one frame.
+
+    Works on the whole upload or on a single streamed chunk; row_offset keeps
+    generated account ids unique across chunks. Columns missing from the
+    input are drawn from a generator seeded by (seed, row_offset), so the
+    same chunk gets the same values in every pass over it.
+    """
+    rng = np.random.default_rng([seed, row_offset])
 
     # --------------------------------------------------
     # 0. CLEANUP & NORMALIZATION
@@ -52,81 +218,598 @@ def run_pipeline(input_csv, out_dir="backend/output"):
     df.columns = [c.strip() for c in df.columns]
     
     # Ensure critical columns are numeric if they exist
-    for col in ["amount", "oldbalanceOrg", "newbalanceOrig"]:
+    for col in ["step", "amount", "oldbalanceOrg", "newbalanceOrig"]:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df[col] = to_number(df[col])
 
     # --------------------------------------------------
     # 1. ENSURE RAW TRANSACTION FIELDS
     # --------------------------------------------------
-    df = ensure_column(df, "nameOrig", lambda n: [f"ACC_{i}" for i in range(n)])
-    df = ensure_column(df, "nameDest", lambda n: [f"ACC_{random.randint(0, n)}" for _ in range(n)])
-    df = ensure_column(df, "amount", lambda n: np.random.lognormal(4, 1, n))
-    df = ensure_column(df, "oldbalanceOrg", lambda n: np.random.uniform(0, 1e5, n))
+    df = ensure_column(df, "nameOrig", lambda n: account_labels(np.arange(row_offset, row_offset + n)))
+    df = ensure_column(df, "nameDest", lambda n: account_labels(rng.integers(0, n + 1, n)))
+    # Without timestamps every transfer falls in one step (velocity = lifetime)
+    df = ensure_column(df, "step", lambda n: np.ones(n, dtype=np.int64))
+    df = ensure_column(df, "amount", lambda n: rng.lognormal(4, 1, n))
+    df = ensure_column(df, "oldbalanceOrg", lambda n: rng.uniform(0, 1e5, n))
     
     # Re-ensure numeric after ensure_column in case it was created or modified
-    df["amount"] = pd.to_numeric(df["amount"], errors='coerce').fillna(0)
-    df["oldbalanceOrg"] = pd.to_numeric(df["oldbalanceOrg"], errors='coerce').fillna(0)
+    df["amount"] = to_number(df["amount"])
+    df["oldbalanceOrg"] = to_number(df["oldbalanceOrg"])
 
     df = ensure_column(
         df,
         "newbalanceOrig",
-        lambda n: df["oldbalanceOrg"] - df["amount"] * np.random.uniform(0.1, 0.9, n)
+        lambda n: df["oldbalanceOrg"] - df["amount"] * rng.uniform(0.1, 0.9, n)
     )
     
-    df["newbalanceOrig"] = pd.to_numeric(df["newbalanceOrig"], errors='coerce').fillna(0)
+    df["newbalanceOrig"] = to_number(df["newbalanceOrig"])
 
     # --------------------------------------------------
     # 2. FEATURE ENGINEERING
     # --------------------------------------------------
+    df["step"] = np.round(df["step"].to_numpy(dtype=np.float64)).astype(np.int64)
     df["balance_diff"] = df["oldbalanceOrg"] - df["newbalanceOrig"]
-    df["zero_balance"] = (df["oldbalanceOrg"] == 0).astype(int)
+    df["zero_balance"] = (df["oldbalanceOrg"] == 0).astype(np.int8)
 
-    # --------------------------------------------------
-    # 3. AGGREGATE PER ACCOUNT
-    # --------------------------------------------------
-    accounts = df.groupby("nameOrig").agg({
-        "amount": ["sum", "mean", "count"],
-        "balance_diff": "mean",
+    return df
+
+# ======================================================
+# PER-ACCOUNT PARTIAL AGGREGATES
+# ======================================================
+# Means are carried as (sum, count) so partials from any number of chunks
+# can be merged before the final division. Money is summed as integer cents:
+# integer addition is exact and order-independent, so streamed and in-memory
+# runs produce bit-identical aggregates.
+PARTIAL_COLUMNS = ["amount_cents", "tx_count", "balance_diff_cents", "zero_balance_count"]
+
+def to_cents(values):
+    return np.round(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+def partial_aggregates(df):
+    cents = pd.DataFrame({
+        "nameOrig": df["nameOrig"].to_numpy(),
+        "amount_cents": to_cents(df["amount"]),
+        "balance_diff_cents": to_cents(df["balance_diff"]),
+        "zero_balance": df["zero_balance"].to_numpy()
+    })
+
+    partial = cents.groupby("nameOrig").agg({
+        "amount_cents": ["sum", "count"],
+        "balance_diff_cents": "sum",
         "zero_balance": "sum"
     })
+    partial.columns = PARTIAL_COLUMNS
+    return partial
 
-    accounts.columns = [
-        "total_amount",
-        "avg_amount",
-        "tx_count",
-        "avg_balance_diff",
-        "zero_balance_count"
-    ]
+def merge_partials(partials):
+    if not partials:
+        return pd.DataFrame(columns=PARTIAL_COLUMNS)
+    if len(partials) == 1:
+        return partials[0]
+    return pd.concat(partials).groupby(level=0).sum()
+
+def finalize_aggregates(state):
+    total_amount = state["amount_cents"] / 100
+    total_balance_diff = state["balance_diff_cents"] / 100
+
+    accounts = pd.DataFrame({
+        "total_amount": total_amount,
+        "avg_amount": total_amount / state["tx_count"],
+        "tx_count": state["tx_count"],
+        "avg_balance_diff": total_balance_diff / state["tx_count"],
+        "zero_balance_count": state["zero_balance_count"]
+    })
 
+    accounts.index.name = "account_id"
     accounts.reset_index(inplace=True)
-    accounts.rename(columns={"nameOrig": "account_id"}, inplace=True)
+    return accounts
+
+def velocity_options(config):
+    """(windows, sketch precision or None) of a pipeline_config()."""
+    windows = parse_windows(config["velocity_windows"])
+    precision = config["sketch_precision"] if config["distinct_counting"] == "sketch" else None
+    return windows, precision
+
+def add_velocity_features(accounts, state, windows, precision=None):
+    """Join the windowed velocity and fan-in / fan-out features onto finalized accounts."""
+    features = velocity_features(state, accounts["account_id"], windows, precision)
+    return pd.concat([accounts, features.set_index(accounts.index)], axis=1)
+
+# ======================================================
+# SCORE MOMENTS (MERGEABLE)
+# ======================================================
+# Accounts are hashed into a fixed number of buckets whatever the worker
+# count; each bucket's (count, mean, M2) is merged in bucket order, so the
+# z-score mean/std come out bit-identical in serial and parallel runs.
+MOMENT_BUCKETS = 64
+# Composite z-score weights of the lifetime aggregates; the windowed
+# features' weights come from velocity_features (see score_weights)
+SCORE_WEIGHTS = {
+    "total_amount": 0.5,
+    "tx_count": 0.4,
+    "avg_balance_diff": 0.3,
+    "zero_balance_count": 0.2
+}
+SCORE_FEATURES = list(SCORE_WEIGHTS)
+
+def score_weights(windows):
+    """Weight of every score feature, in moment order."""
+    return {**SCORE_WEIGHTS, **feature_weights(windows)}
+
+def account_buckets(ids):
+    hashes = pd.util.hash_pandas_object(pd.Series(np.asarray(ids, dtype=object)), index=False)
+    return (hashes.to_numpy() % MOMENT_BUCKETS).astype(np.int64)
+
+def partial_moments(accounts, features=SCORE_FEATURES):
+    """(count, mean, M2) of each score feature over one bucket of accounts."""
+    values = accounts[features].to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        zeros = np.zeros(len(features))
+        return 0, zeros, zeros
+    mean = values.mean(axis=0)
+    return len(values), mean, ((values - mean) ** 2).sum(axis=0)
+
+def bucket_moments(accounts, features=SCORE_FEATURES):
+    """partial_moments() of every bucket; accounts keep their row order within a bucket."""
+    buckets = account_buckets(accounts["account_id"])
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.searchsorted(buckets[order], np.arange(MOMENT_BUCKETS + 1))
+    return [
+        partial_moments(accounts.iloc[order[bounds[b]:bounds[b + 1]]], features)
+        for b in range(MOMENT_BUCKETS)
+    ]
+
+def merge_moments(moments, size=len(SCORE_FEATURES)):
+    """Pairwise (Chan et al.) combination of partial moments, in list order."""
+    n = 0
+    mean = np.zeros(size)
+    m2 = np.zeros(size)
+    for n_b, mean_b, m2_b in moments:
+        if n_b == 0:
+            continue
+        total = n + n_b
+        delta = mean_b - mean
+        mean = mean + delta * (n_b / total)
+        m2 = m2 + m2_b + delta ** 2 * (n * n_b / total)
+        n = total
+    return n, mean, m2
+
+# ======================================================
+# REAL LINK EXTRACTION (COLUMNAR)
+# ======================================================
+EDGE_COLUMNS = ["src", "dst", "amount", "step", "fraudEdge"]
+# fraud_links also carries each edge's stable key and whether it was generated
+LINK_COLUMNS = EDGE_COLUMNS + ["key", "synthetic"]
+
+# One row per input transaction of a kept account; incremental Neo4j ingests
+# fold only the rows whose key is not stored yet into the account aggregates
+TRANSACTION_COLUMNS = ["key", "account_id", "amount", "balance_diff", "zero_balance"]
+
+class OccurrenceCounter:
+    """
+    How often each 64-bit row hash was seen in earlier streamed chunks.
+
+    Kept as sorted (hash, count) runs, merged whenever a run is not much
+    smaller than the one before it, so there are O(log n) runs to search
+    and every hash is re-merged O(log n) times.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def seen(self, hashes):
+        total = np.zeros(len(hashes), dtype=np.int64)
+        for keys, counts in self.runs:
+            pos = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+            hit = keys[pos] == hashes
+            total[hit] += counts[pos[hit]]
+        return total
+
+    def add(self, hashes):
+        if len(hashes) == 0:
+            return
+        self.runs.append(np.unique(hashes, return_counts=True))
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+            (k1, c1), (k2, c2) = self.runs.pop(), self.runs.pop()
+            keys, inverse = np.unique(np.concatenate([k2, k1]), return_inverse=True)
+            self.runs.append((keys, np.bincount(inverse, weights=np.concatenate([c2, c1])).astype(np.int64)))
+
+def transaction_keys(df, counter=None):
+    """
+    Stable 64-bit key per input row, hashed from the row's own identity
+    (nameOrig, nameDest, input step, amount in cents) plus its occurrence
+    number among identical rows, so repeated rows stay distinct like in the
+    account aggregates. The same transaction gets the same key in every
+    upload that contains it, wherever it sits in the file. counter carries
+    the occurrence counts across streamed chunks.
+    """
+    identity = pd.DataFrame({
+        "nameOrig": df["nameOrig"].to_numpy(dtype=object),
+        "nameDest": df["nameDest"].to_numpy(dtype=object),
+        "step": df["step"].to_numpy(dtype=np.int64),
+        "amount_cents": to_cents(df["amount"])
+    })
+    base = pd.util.hash_pandas_object(identity, index=False).to_numpy().view(np.int64)
+
+    ordinal = pd.Series(base).groupby(base, sort=False).cumcount().to_numpy(dtype=np.int64, copy=True)
+    if counter is not None:
+        ordinal += counter.seen(base)
+        counter.add(base)
+
+    repeat = ordinal > 0
+    if not repeat.any():
+        return base
+    # First occurrences keep the plain identity hash
+    keys = base.copy()
+    keys[repeat] = pd.util.hash_pandas_object(
+        pd.DataFrame({"base": base[repeat], "ordinal": ordinal[repeat]}), index=False
+    ).to_numpy().view(np.int64)
+    return keys
+
+def id_lookup(ids):
+    """
+    Unique object-dtype index of account ids for get_indexer() membership.
+
+    Its hash table is built on first use and cached on the index; object
+    dtype keeps lookups in the C hash engine (isin() on Arrow-backed string
+    columns falls back to a Python loop).
+    """
+    index = pd.Index(np.asarray(ids, dtype=object), dtype=object)
+    return index if index.is_unique else index.unique()
+
+def extract_real_links(df, all_ids, risk_ids, start_step=1, keys=None):
+    """
+    Build the edge frame for transactions whose both ends are sampled accounts.
+
+    Membership is resolved with hash lookups over the whole column instead
+    of per-row list lookups, so the cost is O(transactions + accounts).
+    Steps are assigned sequentially from start_step in input order; each
+    edge's key is its input row's transaction_keys() value (keys, if given,
+    holds them for all of df).
+    all_ids / risk_ids may be id_lookup() indexes, built once and reused
+    across streamed chunks.
+    """
+    src = df["nameOrig"]
+    dst = df["nameDest"]
+
+    id_index = all_ids if isinstance(all_ids, pd.Index) else id_lookup(all_ids)
+    mask = (src != dst) & (id_index.get_indexer(src) >= 0) & (id_index.get_indexer(dst) >= 0)
+
+    src = src[mask]
+    dst = dst[mask]
+
+    risk_index = risk_ids if isinstance(risk_ids, pd.Index) else id_lookup(list(risk_ids))
+    fraud_edge = ((risk_index.get_indexer(src) >= 0) | (risk_index.get_indexer(dst) >= 0)).astype(int)
+
+    return pd.DataFrame({
+        "src": src.to_numpy(),
+        "dst": dst.to_numpy(),
+        "amount": df.loc[mask, "amount"].astype(float).round(2).to_numpy(),
+        "step": np.arange(start_step, start_step + len(src), dtype=np.int64),
+        "fraudEdge": fraud_edge,
+        "key": (transaction_keys(df) if keys is None else keys)[np.asarray(mask)],
+        "synthetic": np.zeros(len(src), dtype=np.int8)
+    }, columns=LINK_COLUMNS)
+
+def extract_transactions(df, all_ids, keys=None):
+    """Ledger rows of the transactions sent by accounts in all_ids, in input order."""
+    id_index = all_ids if isinstance(all_ids, pd.Index) else id_lookup(all_ids)
+    kept = id_index.get_indexer(df["nameOrig"]) >= 0
+    rows = df[kept]
+    return pd.DataFrame({
+        "key": (transaction_keys(df) if keys is None else keys)[kept],
+        "account_id": rows["nameOrig"].to_numpy(),
+        # Cents, as the aggregates sum them
+        "amount": to_cents(rows["amount"]) / 100,
+        "balance_diff": to_cents(rows["balance_diff"]) / 100,
+        "zero_balance": rows["zero_balance"].to_numpy(dtype=np.int8)
+    }, columns=TRANSACTION_COLUMNS)
+
+# ======================================================
+# SYNTHETIC GRAPH GENERATION (VECTORIZED)
+# ======================================================
+# Rounds of re-drawing for sources whose sample came back short after dedupe
+MAX_SAMPLE_ROUNDS = 32
+
+def sample_distinct_targets(owner, degree, pool_size, rng):
+    """
+    Draw degree[i] distinct pool positions per source i, in whole arrays.
 
-# --------------------------------------------------
+    owner[i] is the source's own position in the pool (never drawn) or -1.
+    Candidates are drawn with replacement and deduped on the vectorized key
+    source * pool_size + target; sources left short are topped up in
+    further rounds. Returns (source_index, target_position) sorted by source.
+    """
+    owner = np.asarray(owner, dtype=np.int64)
+    available = np.where(owner >= 0, pool_size - 1, pool_size)
+    degree = np.minimum(np.asarray(degree, dtype=np.int64), available)
+
+    keys = np.empty(0, dtype=np.int64)
+    missing = degree
+    for _ in range(MAX_SAMPLE_ROUNDS):
+        rows = np.repeat(np.arange(len(owner)), missing)
+        if len(rows) == 0:
+            break
+        own = owner[rows]
+        # Offsets from the owner skip it without a rejection pass
+        draw = rng.integers(0, np.maximum(available[rows], 1))
+        dst = np.where(own >= 0, (own + 1 + draw) % pool_size, draw)
+
+        # Sort-based dedupe; later rounds append few keys to an already sorted array
+        keys = np.concatenate([keys, rows * pool_size + dst])
+        keys.sort(kind="stable")
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        missing = degree - np.bincount(keys // pool_size, minlength=len(owner))
+
+    return keys // pool_size, keys % pool_size
+
+
+def generate_synthetic_links(ids, classes, start_step, rng,
+                             min_links=MIN_LINKS_PER_NODE, max_links=MAX_LINKS_PER_NODE):
+    """
+    Build the dense synthetic graph, fraud rings and cross-type edges as one
+    columnar edge frame.
+
+    ids / classes are the sampled accounts and their class labels. Degrees,
+    targets, amounts and step increments are drawn per stage as whole arrays
+    from rng (a seeded np.random.Generator), so runs are reproducible and
+    the cost is linear in the number of edges. Returns (links, next_step).
+    """
+    ids = np.asarray(ids, dtype=object)
+    classes = np.asarray(classes, dtype=object)
+    n = len(ids)
+
+    risky = classes != "NORMAL"
+    fraud = np.flatnonzero(classes == "FRAUD")
+    at_risk = np.flatnonzero(classes == "AT_RISK")
+    normal = np.flatnonzero(classes == "NORMAL")
+
+    stages = []
+    step = start_step
+
+    def add_stage(src, dst, low, high, fraud_edge, increments):
+        nonlocal step
+        # Each edge's step is the running total of the increments before it
+        steps = step + (np.cumsum(increments) - increments).astype(np.int64)
+        step += int(increments.sum())
+        stages.append(pd.DataFrame({
+            "src": ids[src],
+            "dst": ids[dst],
+            "amount": rng.uniform(low, high).round(2),
+            "step": steps,
+            "fraudEdge": fraud_edge
+        }, columns=EDGE_COLUMNS))
+
+    # -------- DENSE SYNTHETIC GRAPH --------
+    if n > 1:
+        # Fraud nodes form bigger rings (higher degree)
+        degree = np.where(
+            risky,
+            rng.integers(min_links + 3, max_links + 6, n),
+            rng.integers(min_links, max_links + 1, n)
+        )
+        rows, dst = sample_distinct_targets(np.arange(n), degree, n, rng)
+
+        # fraud nodes act faster + higher amounts
+        is_fraud = risky[rows]
+        add_stage(
+            rows, dst,
+            np.where(is_fraud, 5000, 500), np.where(is_fraud, 300000, 50000),
+            is_fraud.astype(int),
+            rng.integers(1, np.where(is_fraud, 3, 6) + 1)
+        )
+
+    # -------- FRAUD RINGS (EXTRA DENSITY) --------
+    # Each fraud account sends laundering-sized amounts to 3-5 fraud peers
+    if len(fraud) > 1:
+        rows, peer = sample_distinct_targets(
+            np.arange(len(fraud)), rng.integers(3, 6, len(fraud)), len(fraud), rng
+        )
+        add_stage(fraud[rows], fraud[peer], np.full(len(rows), 25000), np.full(len(rows), 500000),
+                  1, np.ones(len(rows), dtype=np.int64))
+
+    # -------- CROSS-TYPE CONNECTIONS (MIXING) --------
+    # (sources, targets, fan-out range, amount range, fraudEdge)
+    mixing = [
+        (fraud, normal, (1, 2), (500, 5000), 1),       # Fraud -> Normal (Mules)
+        (fraud, at_risk, (1, 3), (10000, 50000), 1),   # Fraud -> Suspects (Layering)
+        (at_risk, normal, (1, 2), (500, 10000), 0),    # Suspects -> Normal (Integration)
+    ]
+    for sources, targets, (lo_deg, hi_deg), (low, high), fraud_edge in mixing:
+        if len(sources) == 0 or len(targets) == 0:
+            continue
+        rows, dst = sample_distinct_targets(
+            np.full(len(sources), -1), rng.integers(lo_deg, hi_deg + 1, len(sources)),
+            len(targets), rng
+        )
+        add_stage(sources[rows], targets[dst], np.full(len(rows), low), np.full(len(rows), high),
+                  fraud_edge, np.ones(len(rows), dtype=np.int64))
+
+    if not stages:
+        return pd.DataFrame(columns=EDGE_COLUMNS), step
+    return pd.concat(stages, ignore_index=True), step
+
+# ======================================================
+# CLASSIFICATION
+# ======================================================
+def classify_scores(scores, fraud_threshold=FRAUD_THRESHOLD, at_risk_threshold=AT_RISK_THRESHOLD):
+    """FRAUD / AT_RISK / NORMAL label per riskScore, in one vectorized pass."""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select(
+        [scores >= fraud_threshold, scores >= at_risk_threshold],
+        ["FRAUD", "AT_RISK"],
+        "NORMAL"
+    ).astype(object)
+
+# ======================================================
+# MAIN PIPELINE
+# ======================================================
+PIPELINE_STAGES = [
+    "load", "features", "aggregate", "velocity", "scoring", "links", "propagate", "rings", "write"
+]
+
+def run_pipeline(input_csv, out_dir="backend/output", chunksize=None, output_format="csv",
+                 progress=None, config=None, workers=None):
+    """
+    progress, if given, is called as progress(stage, **detail) when each of
+    PIPELINE_STAGES starts; it may raise to abort the run (job cancellation).
+    config holds pipeline_config() overrides for this run. workers > 1 runs
+    the aggregation on a process pool (see parallel_agg).
+
+    The result carries a "profile": wall time, input rows, rows/sec and
+    peak RSS of each stage (see metrics.StageProfiler).
+    """
+    profiler = StageProfiler()
+
+    def report(stage, **detail):
+        profiler.stage(stage, **detail)
+        if progress:
+            progress(stage, **detail)
+
+    config = pipeline_config(config)
+    # Every random draw of the run comes from here, so a run depends only on
+    # its input and config, not on what ran before in the same process
+    rng = np.random.default_rng(config["seed"])
+    windows, precision = velocity_options(config)
+
+    print("🚀 fraud_data_pipeline started")
+    print("📂 Input CSV:", input_csv)
+
+    # 1. Resolve Output Directory
+    # If out_dir is not absolute, make it relative to the parent of this script (api/)
+    if not os.path.isabs(out_dir):
+        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out_dir = os.path.join(BASE_DIR, out_dir)
+    
+    os.makedirs(out_dir, exist_ok=True)
+    print("📂 Output Dir:", out_dir)
+
+    workers = workers or WORKERS
+    moments = None
+    if workers > 1:
+        # Generated ids (no nameOrig column) need global row offsets
+        header = [c.strip() for c in pd.read_csv(input_csv, nrows=0).columns]
+        if "nameOrig" not in header:
+            print("⚠️ No nameOrig column; aggregating serially")
+            workers = 1
+
+    if workers > 1:
+        # --------------------------------------------------
+        # 0-3. PARALLEL LOAD + PARTIAL AGGREGATES
+        # --------------------------------------------------
+        # Imported here: parallel_agg imports this module
+        try:
+            from ml.parallel_agg import aggregate_parallel
+        except ImportError:
+            from parallel_agg import aggregate_parallel
+
+        print(f"🧵 Aggregating on {workers} worker processes")
+        df = None
+        accounts, moments, rows = aggregate_parallel(
+            input_csv, workers, report=report, seed=config["seed"],
+            windows=windows, precision=precision
+        )
+        profiler.rows("aggregate", rows)
+        print(f"🧵 Aggregated {rows:,} transactions into {len(accounts):,} accounts")
+    elif chunksize:
+        # --------------------------------------------------
+        # 0-3. STREAMING LOAD + PARTIAL AGGREGATES
+        # --------------------------------------------------
+        # Only per-account running state is kept in memory; the transactions
+        # themselves are dropped after each chunk is folded in.
+        print(f"🌊 Streaming input in chunks of {chunksize:,} rows")
+        report("load", chunksize=chunksize)
+        df = None
+        state = None
+        velocity = None
+        pending = []
+        pending_velocity = []
+        pending_rows = 0
+        row_offset = 0
+
+        for chunk in read_transactions(input_csv, chunksize=chunksize):
+            report("aggregate", rows=row_offset)
+            chunk = prepare_transactions(chunk, row_offset=row_offset, seed=config["seed"])
+            row_offset += len(chunk)
+
+            part = partial_aggregates(chunk)
+            pending.append(part)
+            pending_velocity.append(partial_velocity(chunk, precision))
+            pending_rows += len(part)
+
+            # Compact once the buffered partials outgrow the merged state
+            if pending_rows >= max(chunksize, 0 if state is None else len(state)):
+                state = merge_partials(([state] if state is not None else []) + pending)
+                velocity = merge_velocity(([velocity] if velocity is not None else []) + pending_velocity)
+                pending = []
+                pending_velocity = []
+                pending_rows = 0
+
+        if pending or state is None:
+            state = merge_partials(([state] if state is not None else []) + pending)
+        if pending_velocity:
+            velocity = merge_velocity(([velocity] if velocity is not None else []) + pending_velocity)
+
+        accounts = finalize_aggregates(state)
+        profiler.rows("aggregate", row_offset)
+        print(f"🌊 Streamed {row_offset:,} transactions into {len(accounts):,} accounts")
+
+        report("velocity", accounts=len(accounts))
+        accounts = add_velocity_features(accounts, velocity, windows, precision)
+        del velocity
+    else:
+        report("load")
+        df = read_transactions(input_csv)
+        profiler.rows("load", len(df))
+
+        # --------------------------------------------------
+        # 0-2. CLEANUP, NORMALIZATION & FEATURE ENGINEERING
+        # --------------------------------------------------
+        report("features", rows=len(df))
+        df = prepare_transactions(df, seed=config["seed"])
+
+        # --------------------------------------------------
+        # 3. AGGREGATE PER ACCOUNT
+        # --------------------------------------------------
+        # Same partial-aggregate path as streaming mode (with a single
+        # partial), so both modes produce identical accounts.
+        report("aggregate", rows=len(df))
+        accounts = finalize_aggregates(merge_partials([partial_aggregates(df)]))
+
+        # --------------------------------------------------
+        # 3.5 WINDOWED VELOCITY & FAN-IN / FAN-OUT
+        # --------------------------------------------------
+        report("velocity", rows=len(df))
+        accounts = add_velocity_features(accounts, partial_velocity(df, precision), windows, precision)
+
+    report("scoring", accounts=len(accounts))
+
+    # --------------------------------------------------
     # 4. STATISTICAL RISK SCORING (Lightweight)
     # --------------------------------------------------
     # Replaced IsolationForest with robust Z-score analysis to save ~100MB
     # and fit within Serverless limits.
     
     # Calculate Z-scores for key features
-    features = ["total_amount", "tx_count", "avg_balance_diff", "zero_balance_count"]
-    
-    for col in features:
-        mean = accounts[col].mean()
-        std = accounts[col].std()
+    weights = score_weights(windows)
+    features = list(weights)
+
+    # Global mean / sample std from merged per-bucket moments
+    if moments is None:
+        moments = bucket_moments(accounts, features)
+    n, means, m2 = merge_moments(moments, len(features))
+    stds = np.sqrt(m2 / (n - 1)) if n > 1 else np.zeros(len(features))
+
+    for col, mean, std in zip(features, means, stds):
         if std == 0:
             accounts[f"{col}_z"] = 0
         else:
             accounts[f"{col}_z"] = (accounts[col] - mean) / std
 
     # Composite risk score (weighted avg of z-scores)
-    # Weighted towards high amounts and suspicious balance changes
-    accounts["raw_score"] = (
-        accounts["total_amount_z"] * 0.5 + 
-        accounts["avg_balance_diff_z"] * 0.3 + 
-        accounts["tx_count_z"] * 0.4 + 
-        accounts["zero_balance_count_z"] * 0.2
-    )
+    # Weighted towards high amounts and suspicious balance changes, then
+    # bursts of activity and many distinct counterparties (mule fan-in/out)
+    accounts["raw_score"] = sum(accounts[f"{col}_z"] * w for col, w in weights.items())
 
     # Normalize to 0-100 range using Min-Max scaling
     min_score = accounts["raw_score"].min()
@@ -148,7 +831,7 @@ def run_pipeline(input_csv, out_dir="backend/output"):
         # Boost the top candidates to guaranteed Fraud range (85-99)
         top_idx = accounts.nlargest(fraud_target_count, "riskScore").index
         # Use numpy correctly with .values for assignment if needed, but loc works directly
-        accounts.loc[top_idx, "riskScore"] = np.random.uniform(85, 99, size=fraud_target_count)
+        accounts.loc[top_idx, "riskScore"] = rng.uniform(85, 99, size=fraud_target_count)
 
     # 4.6 FORCE AT_RISK RATIO (User Req: 23:1 -> ~4.3%)
     risk_target_count = int(len(accounts) * 0.045)
@@ -162,179 +845,185 @@ def run_pipeline(input_csv, out_dir="backend/output"):
         # Boost to At-Risk range (55-75 seems safe given fraud starts at 65/80, 
         # let's respect the classify threshold which defines 'AT_RISK' around 40+.
         # To make them distinctly yellow, let's put them in 50-64 range.
-        accounts.loc[risk_idx, "riskScore"] = np.random.uniform(50, 64, size=len(risk_idx))
-
-    # Cleanup temp columns
-    accounts.drop(columns=[f"{c}_z" for c in features] + ["raw_score"], inplace=True)
+        accounts.loc[risk_idx, "riskScore"] = rng.uniform(50, 64, size=len(risk_idx))
 
+    # Cleanup temp columns (raw_score seeds the risk propagation, step 7)
+    accounts.drop(columns=[f"{c}_z" for c in features], inplace=True)
 
-    def classify(score):
-        if score >= 65: # Lowered from 80 to catch more
-            return "FRAUD"
-        elif score >= 40: # Lowered from 55
-            return "AT_RISK"
-        return "NORMAL"
-
-    accounts["class"] = accounts["riskScore"].apply(classify)
+    accounts["class"] = classify_scores(
+        accounts["riskScore"], config["fraud_threshold"], config["at_risk_threshold"]
+    )
 
     # --------------------------------------------------
     # 5. LIMIT ACCOUNT COUNT
     # --------------------------------------------------
-    # Ensure target_size doesn't exceed available population
-    target_size = random.randint(MIN_ROWS, MAX_ROWS)
-    if len(accounts) < target_size:
-        target_size = len(accounts)
-        
-    final_accounts = accounts.sample(n=target_size, random_state=SEED).reset_index(drop=True)
+    if config["sample_mode"] == "full":
+        final_accounts = accounts.reset_index(drop=True)
+    else:
+        # Ensure target_size doesn't exceed available population
+        target_size = int(rng.integers(config["min_rows"], config["max_rows"] + 1))
+        if len(accounts) < target_size:
+            target_size = len(accounts)
 
-    accounts_path = os.path.join(out_dir, "final_accounts.csv")
-    final_accounts.to_csv(accounts_path, index=False)
+        final_accounts = accounts.sample(n=target_size, random_state=rng).reset_index(drop=True)
 
     # --------------------------------------------------
     # 6. DENSE GRAPH LINK GENERATION
     # --------------------------------------------------
     print("🔗 Generating dense transaction graph")
+    report("links", accounts=len(final_accounts))
 
-    all_ids = final_accounts["account_id"].tolist()
-    risk_ids = set(final_accounts[final_accounts["class"] != "NORMAL"]["account_id"])
-    fraud_ids = list(final_accounts[final_accounts["class"] == "FRAUD"]["account_id"])
-    at_risk_ids = list(final_accounts[final_accounts["class"] == "AT_RISK"]["account_id"])
-    normal_ids = list(final_accounts[final_accounts["class"] == "NORMAL"]["account_id"])
+    # Hash indexes built once; membership tests against them stay O(1) per
+    # transaction even with millions of accounts
+    all_ids = id_lookup(final_accounts["account_id"])
+    risk_ids = id_lookup(final_accounts.loc[final_accounts["class"] != "NORMAL", "account_id"])
 
-    edges = []
     step = 1
-    used = set()
 
     # -------- REAL LINKS (EXPANDED) --------
-    if "nameOrig" in df.columns and "nameDest" in df.columns:
-        for _, r in df.iterrows():
-            src, dst = r["nameOrig"], r["nameDest"]
-            if src != dst and src in all_ids and dst in all_ids:
-                edges.append({
-                    "src": src,
-                    "dst": dst,
-                    "amount": round(float(r["amount"]), 2),
-                    "step": step,
-                    "fraudEdge": int(src in risk_ids or dst in risk_ids)
-                })
-                step += 1
+    if df is None:
+        # Streaming / parallel mode: second pass over the input, keeping only matches
+        real_parts = []
+        ledger_parts = []
+        row_offset = 0
+        # Repeated rows are numbered across chunks, as in one in-memory pass
+        occurrences = OccurrenceCounter()
+        for chunk in read_transactions(input_csv, chunksize=chunksize or LINK_CHUNKSIZE):
+            chunk = prepare_transactions(chunk, row_offset=row_offset, seed=config["seed"])
+            row_offset += len(chunk)
+            keys = transaction_keys(chunk, occurrences)
 
-    # -------- DENSE SYNTHETIC GRAPH --------
-    for src in all_ids:
-        # Fraud nodes form bigger rings (higher degree)
-        is_fraud_node = src in risk_ids
-        
-        if is_fraud_node:
-            degree = random.randint(MIN_LINKS_PER_NODE + 3, MAX_LINKS_PER_NODE + 5)
-        else:
-            degree = random.randint(MIN_LINKS_PER_NODE, MAX_LINKS_PER_NODE)
+            part = extract_real_links(chunk, all_ids, risk_ids, start_step=step, keys=keys)
+            step += len(part)
+            real_parts.append(part)
+            ledger_parts.append(extract_transactions(chunk, all_ids, keys=keys))
 
-        targets = random.sample(all_ids, min(degree, len(all_ids)))
-        for dst in targets:
-            if src == dst:
-                continue
-
-            key = (src, dst, step // 10)
-            if key in used:
-                continue
+        profiler.rows("links", row_offset)
+        real_links = pd.concat(real_parts, ignore_index=True) if real_parts else pd.DataFrame(columns=LINK_COLUMNS)
+        transactions = (pd.concat(ledger_parts, ignore_index=True) if ledger_parts
+                        else pd.DataFrame(columns=TRANSACTION_COLUMNS))
+    else:
+        keys = transaction_keys(df)
+        real_links = extract_real_links(df, all_ids, risk_ids, start_step=step, keys=keys)
+        step += len(real_links)
+        transactions = extract_transactions(df, all_ids, keys=keys)
+        profiler.rows("links", len(df))
 
-            # fraud nodes act faster + higher amounts
-            is_fraud = src in risk_ids
-            amount = random.uniform(5000, 300000) if is_fraud else random.uniform(500, 50000)
+    # -------- SYNTHETIC GRAPH (DENSE + RINGS + MIXING) --------
+    synthetic_links, step = generate_synthetic_links(
+        final_accounts["account_id"].to_numpy(dtype=object),
+        final_accounts["class"].to_numpy(dtype=object),
+        step, rng,
+        min_links=config["min_links_per_node"],
+        max_links=config["max_links_per_node"]
+    )
+    # Generated edges differ between uploads; incremental ingests skip them
+    synthetic_links = add_edge_keys(synthetic_links).assign(synthetic=np.int8(1))
 
-            edges.append({
-                "src": src,
-                "dst": dst,
-                "amount": round(amount, 2),
-                "step": step,
-                "fraudEdge": int(is_fraud)
-            })
+    links_df = pd.concat(
+        [real_links, synthetic_links],
+        ignore_index=True
+    )
 
-            used.add(key)
+    # --------------------------------------------------
+    # 7. GRAPH RISK PROPAGATION
+    # --------------------------------------------------
+    # Personalized PageRank over the link graph, restarting at accounts with
+    # an above-average z-score composite (weighted by how far above), so risk
+    # flows to accounts that move money with them.
+    report("propagate", links=len(links_df))
+    seed = final_accounts.pop("raw_score").clip(lower=0).to_numpy()
+    src = all_ids.get_indexer(links_df["src"])
+    dst = all_ids.get_indexer(links_df["dst"])
+    known = (src >= 0) & (dst >= 0)
 
-            # time behavior
-            step += random.randint(1, 3 if is_fraud else 6)
+    scores, iterations, converged = propagate_risk(
+        src[known], dst[known], links_df["amount"].to_numpy(dtype=np.float64)[known], seed,
+        alpha=config["propagation_alpha"],
+        tol=config["propagation_tol"],
+        max_iter=config["propagation_max_iter"]
+    )
+    top = scores.max() if len(scores) else 0
+    final_accounts["propagatedRisk"] = (scores / top * 100).round(2) if top > 0 else 0.0
+    print(f"🌐 Risk propagated in {iterations} iterations"
+          + ("" if converged else " (iteration cap reached)"))
 
-    # -------- FRAUD RINGS (EXTRA DENSITY) --------
-    # Explicitly connect fraud accounts to each other to form "rings"
-    if len(fraud_ids) > 1:
-        for src in fraud_ids:
-            # Connect to 3-5 other random fraud accounts
-            ring_size = random.randint(3, 5)
-            # Filter self out
-            peers = [x for x in fraud_ids if x != src]
-            
-            if not peers: continue
-            
-            targets = random.sample(peers, min(ring_size, len(peers)))
-            
-            for dst in targets:
-                key = (src, dst)
-                # We don't check 'key in used' strictly here to ensure density, 
-                # or we just allow multiple edges for different amounts
-                
-                amount = random.uniform(25000, 500000) # Laundering large amounts
-                
-                edges.append({
-                    "src": src,
-                    "dst": dst,
-                    "amount": round(amount, 2),
-                    "step": step,
-                    "fraudEdge": 1
-                })
-                step += 1
+    # --------------------------------------------------
+    # 8. FRAUD RING DETECTION
+    # --------------------------------------------------
+    # Short directed cycles of transfers inside strongly connected components
+    # (money that comes back to where it started); with ring_window > 0 the
+    # transfers must also follow each other in time. Only real transfers
+    # count: the synthetic stage plants ring-shaped cycles of its own.
+    real = known & (links_df["synthetic"].to_numpy() == 0)
+    report("rings", links=int(real.sum()))
+    rings, truncated = detect_rings(
+        all_ids.to_numpy(), src[real], dst[real],
+        links_df["step"].to_numpy(dtype=np.int64)[real],
+        links_df["amount"].to_numpy(dtype=np.float64)[real],
+        links_df["fraudEdge"].to_numpy(dtype=np.int64)[real],
+        risk=final_accounts["riskScore"].to_numpy(dtype=np.float64),
+        max_length=config["ring_max_length"],
+        window=config["ring_window"],
+        max_rings=config["ring_max_count"]
+    )
+    print(f"💍 Fraud rings found: {len(rings)}" + (" (ring cap reached)" if truncated else ""))
 
-    # -------- CROSS-TYPE CONNECTIONS (MIXING) --------
-    # Fraud -> Normal (Mules)
-    if len(fraud_ids) > 0 and len(normal_ids) > 0:
-        for src in fraud_ids:
-            # Connect to 1-2 random normal accounts relative to population
-            targets = random.sample(normal_ids, min(random.randint(1, 2), len(normal_ids)))
-            for dst in targets:
-                amount = random.uniform(500, 5000) # Smaller amounts to normal people
-                edges.append({ "src": src, "dst": dst, "amount": round(amount, 2), "step": step, "fraudEdge": 1 })
-                step += 1
-
-    # Fraud -> Suspects (Layering)
-    if len(fraud_ids) > 0 and len(at_risk_ids) > 0:
-        for src in fraud_ids:
-            targets = random.sample(at_risk_ids, min(random.randint(1, 3), len(at_risk_ids)))
-            for dst in targets:
-                amount = random.uniform(10000, 50000)
-                edges.append({ "src": src, "dst": dst, "amount": round(amount, 2), "step": step, "fraudEdge": 1 })
-                step += 1
-
-    # Suspects -> Normal (Integration)
-    if len(at_risk_ids) > 0 and len(normal_ids) > 0:
-        for src in at_risk_ids:
-            targets = random.sample(normal_ids, min(random.randint(1, 2), len(normal_ids)))
-            for dst in targets:
-                amount = random.uniform(500, 10000)
-                edges.append({ "src": src, "dst": dst, "amount": round(amount, 2), "step": step, "fraudEdge": 0 }) # Not strictly fraud edge yet
-                step += 1
-
-    links_path = os.path.join(out_dir, "fraud_links.csv")
-    pd.DataFrame(edges).to_csv(links_path, index=False)
+    report("write", links=len(links_df))
+    accounts_path = write_table(final_accounts, out_dir, "final_accounts", output_format)
+    links_path = write_table(links_df, out_dir, "fraud_links", output_format)
+    rings_path = write_table(rings, out_dir, "fraud_rings", output_format)
+    transactions_path = write_table(transactions, out_dir, "account_transactions", output_format)
+    # Dashboard summary, computed once here instead of by every client
+    stats_path = write_stats(summarize(final_accounts, links_df), out_dir)
 
     # --------------------------------------------------
     # FINAL LOG
     # --------------------------------------------------
     print("✅ PIPELINE COMPLETE")
     print(f"📄 Accounts: {len(final_accounts)}")
-    print(f"🔗 Links   : {len(edges)}")
+    print(f"🔗 Links   : {len(links_df)}")
+    print(f"💍 Rings   : {len(rings)}")
+
+    profile = profiler.finish()
+    for name, info in profile["stages"].items():
+        rate = f"  ({info['rowsPerSec']:,} rows/s)" if info["rowsPerSec"] else ""
+        print(f"⏱️  {name:<10} {info['seconds']:9.3f}s{rate}")
+    print(f"⏱️  total      {profile['totalSeconds']:9.3f}s")
 
     return {
         "accounts": accounts_path,
-        "links": links_path
+        "links": links_path,
+        "rings": rings_path,
+        "transactions": transactions_path,
+        "stats": stats_path,
+        # Classification cut-offs of this run, for scoring against its outputs
+        "thresholds": {"fraud": config["fraud_threshold"], "atRisk": config["at_risk_threshold"]},
+        "profile": profile
     }
 
 # ======================================================
 # CLI SUPPORT
 # ======================================================
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 2:
-        print("❌ Usage: python fraud_data_pipeline.py <csv_path>")
-        exit(1)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NEXUS fraud data pipeline")
+    parser.add_argument("input_csv")
+    parser.add_argument("chunksize", type=int, nargs="?", default=None)
+    parser.add_argument("--out-dir", default="backend/output")
+    parser.add_argument("--output-format", default="csv")
+    parser.add_argument("--full", action="store_true", help="keep every account (no sampling)")
+    parser.add_argument("--min-rows", type=int)
+    parser.add_argument("--max-rows", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, help="processes for the aggregation")
+    args = parser.parse_args()
+
+    overrides = {"sample_mode": "full"} if args.full else {}
+    for name in ("min_rows", "max_rows", "seed"):
+        if getattr(args, name) is not None:
+            overrides[name] = getattr(args, name)
 
-    run_pipeline(sys.argv[1])
+    run_pipeline(args.input_csv, out_dir=args.out_dir, chunksize=args.chunksize,
+                 output_format=args.output_format, config=overrides, workers=args.workers)
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ======================================================
+# CONFIG
+# ======================================================
+CACHE_TTL_SECONDS = float(os.getenv("GRAPH_CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "64"))
+
+# ======================================================
+# GRAPH VERSION
+# ======================================================
+class GraphVersion:
+    """
+    Monotonic graph version shared by every worker process on the host.
+
+    Stored as a tiny file next to the pipeline outputs; bump() is called
+    whenever ingestion or the pipeline changes what /api/graph would return.
+    """
+
+    def __init__(self, directory, name="graph_version"):
+        self.path = os.path.join(directory, name)
+        self._lock = threading.Lock()
+
+    def current(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self):
+        with self._lock:
+            version = self.current() + 1
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(str(version))
+            os.replace(tmp_path, self.path)
+            return version
+
+# ======================================================
+# RESPONSE CACHE
+# ======================================================
+def make_etag(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of serialized responses keyed by (graph version, request key).
+
+    Entries of an older version simply stop being looked up and age out of
+    the LRU, so invalidation is just a version bump.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+    def get(self, version, key):
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None and time.monotonic() - entry["created"] > self.ttl:
+                del self._entries[(version, key)]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end((version, key))
+            self.hits += 1
+            return entry
+
+    def put(self, version, key, body):
+        entry = {"body": body, "etag": make_etag(body), "created": time.monotonic()}
+        with self._lock:
+            self._entries[(version, key)] = entry
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "notModified": self.not_modified,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl
+            }
@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+
+# orjson and brotli are optional: without them responses fall back to the
+# stdlib encoder and gzip.
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+# ======================================================
+# ENCODING
+# ======================================================
+def _default(obj):
+    """
+    numpy values the encoder has no native support for (object arrays, and
+    every numpy value for the stdlib encoder). Duck-typed so this module
+    stays importable without loading numpy.
+    """
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """JSON bytes; numpy arrays and scalars are encoded directly."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+# ======================================================
+# COLUMNAR GRAPH PAYLOAD
+# ======================================================
+def columnar_graph(ids, risk, classes, source, target, amount, step, fraud, next_cursor=None):
+    """
+    /api/graph page as parallel arrays; links refer to nodes by their index
+    in nodes.id, so ids are sent once instead of in every link object.
+    """
+    return {
+        "format": "columnar",
+        "nodes": {"id": ids, "riskScore": risk, "mlClass": classes},
+        "links": {
+            "source": source,
+            "target": target,
+            "amount": amount,
+            "step": step,
+            "fraud": fraud
+        },
+        "nextCursor": next_cursor
+    }
+
+
+def to_columnar(payload):
+    """Columnar form of an object-shaped {"nodes", "links", "nextCursor"} payload."""
+    nodes = payload["nodes"]
+    links = payload["links"]
+    position = {n["id"]: i for i, n in enumerate(nodes)}
+    return columnar_graph(
+        [n["id"] for n in nodes],
+        [n["riskScore"] for n in nodes],
+        [n["mlClass"] for n in nodes],
+        [position[l["source"]] for l in links],
+        [position[l["target"]] for l in links],
+        [l["amount"] for l in links],
+        [l["step"] for l in links],
+        [l["fraud"] for l in links],
+        payload.get("nextCursor")
+    )
+
+# ======================================================
+# CONTENT ENCODING
+# ======================================================
+def accepted_encodings(header):
+    """Codings the client accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header, size):
+    """br when available and accepted, else gzip, else None (identity)."""
+    if size < COMPRESS_MIN_BYTES:
+        return None
+    accepted = accepted_encodings(header)
+    if HAS_BROTLI and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
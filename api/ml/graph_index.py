@@ -0,0 +1,301 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ml.table_io import read_table, columnar_path, add_edge_keys
+    from ml.graph_query import ACCOUNT_FIELDS, ML_CLASSES, encode_cursor
+    from ml.graph_codec import columnar_graph
+except ImportError:
+    from table_io import read_table, columnar_path, add_edge_keys
+    from graph_query import ACCOUNT_FIELDS, ML_CLASSES, encode_cursor
+    from graph_codec import columnar_graph
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Edges examined per vectorized filter pass while filling a page
+SCAN_BLOCK = 8192
+
+# ======================================================
+# CSR HELPERS
+# ======================================================
+def build_csr(rows, n_nodes, order_key):
+    """
+    Compressed sparse row layout of edge ids grouped by `rows` (node codes).
+
+    Within a node, edges are ordered by descending order_key so fan-out caps
+    keep the largest transfers. Returns (indptr, edge_ids).
+    """
+    order = np.lexsort((-order_key, rows))
+    counts = np.bincount(rows, minlength=n_nodes)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, order.astype(np.int64)
+
+# ======================================================
+# GRAPH STORE
+# ======================================================
+class GraphStore:
+    """
+    Read-only, array-backed copy of the pipeline outputs for the Neo4j-down path.
+
+    Account ids are interned to dense int codes. Node attributes (riskScore,
+    class code) and edge columns (src, dst, amount, step, fraudEdge, key) are
+    flat NumPy arrays; outgoing and incoming adjacency are CSR arrays over
+    edge ids, and edges are pre-sorted by (step, key) for cursor paging.
+    """
+
+    def __init__(self, accounts, links):
+        links = add_edge_keys(links)
+
+        ids = pd.Index(pd.unique(pd.concat([
+            accounts["account_id"], links["src"], links["dst"]
+        ], ignore_index=True)))
+        self.id_index = ids
+        self.ids = ids.to_numpy(dtype=object)
+        n = len(ids)
+
+        # -------- NODE COLUMNS --------
+        account_codes = ids.get_indexer(accounts["account_id"])
+        self.accounts = accounts.reset_index(drop=True)
+        self.account_row = np.full(n, -1, dtype=np.int64)
+        self.account_row[account_codes] = np.arange(len(accounts))
+
+        self.risk = np.zeros(n, dtype=np.float64)
+        self.risk[account_codes] = accounts["riskScore"].to_numpy(dtype=np.float64)
+
+        self.class_names = np.array(ML_CLASSES, dtype=object)
+        self.class_code = np.full(n, ML_CLASSES.index("NORMAL"), dtype=np.int8)
+        class_codes = pd.Index(ML_CLASSES).get_indexer(accounts["class"])
+        self.class_code[account_codes] = np.where(class_codes >= 0, class_codes, ML_CLASSES.index("NORMAL"))
+
+        # -------- EDGE COLUMNS --------
+        self.src = ids.get_indexer(links["src"]).astype(np.int64)
+        self.dst = ids.get_indexer(links["dst"]).astype(np.int64)
+        self.amount = links["amount"].to_numpy(dtype=np.float64)
+        self.step = links["step"].to_numpy(dtype=np.int64)
+        self.fraud = links["fraudEdge"].to_numpy(dtype=np.int8)
+        self.key = links["key"].to_numpy(dtype=np.int64)
+
+        # -------- ADJACENCY --------
+        self.out_ptr, self.out_edges = build_csr(self.src, n, self.amount)
+        self.in_ptr, self.in_edges = build_csr(self.dst, n, self.amount)
+
+        # -------- PAGING ORDER --------
+        self.page_order = np.lexsort((self.key, self.step))
+        self.sorted_step = self.step[self.page_order]
+        self.sorted_key = self.key[self.page_order]
+
+    @property
+    def n_nodes(self):
+        return len(self.ids)
+
+    @property
+    def n_edges(self):
+        return len(self.src)
+
+    # --------------------------------------------------
+    # LOOKUPS
+    # --------------------------------------------------
+    def code(self, account_id):
+        return int(self.id_index.get_indexer([account_id])[0])
+
+    def account(self, code):
+        row = self.account_row[code]
+        if row < 0:
+            return None
+        # Outputs written before a field existed simply lack it
+        fields = [f for f in ACCOUNT_FIELDS if f in self.accounts.columns]
+        return self.accounts.iloc[[row]][fields].to_dict("records")[0]
+
+    def node_dicts(self, codes, depth=None):
+        codes = np.asarray(codes, dtype=np.int64)
+        ids = self.ids[codes].tolist()
+        risk = self.risk[codes].tolist()
+        classes = self.class_names[self.class_code[codes]].tolist()
+        if depth is None:
+            return [{"id": i, "riskScore": r, "mlClass": c}
+                    for i, r, c in zip(ids, risk, classes)]
+        return [{"id": i, "riskScore": r, "mlClass": c, "depth": d}
+                for i, r, c, d in zip(ids, risk, classes, depth)]
+
+    def link_dicts(self, edges):
+        edges = np.asarray(edges, dtype=np.int64)
+        return [{"source": s, "target": t, "amount": a, "step": st, "fraud": f}
+                for s, t, a, st, f in zip(
+                    self.ids[self.src[edges]].tolist(),
+                    self.ids[self.dst[edges]].tolist(),
+                    self.amount[edges].tolist(),
+                    self.step[edges].tolist(),
+                    self.fraud[edges].tolist()
+                )]
+
+    # --------------------------------------------------
+    # PAGED EDGE QUERY (/api/graph)
+    # --------------------------------------------------
+    def _cursor_position(self, cursor):
+        if cursor is None:
+            return 0
+        step, key = cursor
+        lo = np.searchsorted(self.sorted_step, step, side="left")
+        hi = np.searchsorted(self.sorted_step, step, side="right")
+        return lo + np.searchsorted(self.sorted_key[lo:hi], key, side="right")
+
+    def _edge_mask(self, edges, params):
+        mask = np.ones(len(edges), dtype=bool)
+        if params["fraudOnly"]:
+            mask &= self.fraud[edges] == 1
+        if params["stepMin"] is not None:
+            mask &= self.step[edges] >= params["stepMin"]
+        if params["stepMax"] is not None:
+            mask &= self.step[edges] <= params["stepMax"]
+        if params["amountMin"] is not None:
+            mask &= self.amount[edges] >= params["amountMin"]
+        if params["amountMax"] is not None:
+            mask &= self.amount[edges] <= params["amountMax"]
+        # Node filters match either end, same as the Cypher
+        if params["minRisk"] is not None:
+            mask &= (self.risk[self.src[edges]] >= params["minRisk"]) | \
+                    (self.risk[self.dst[edges]] >= params["minRisk"])
+        if params["classes"]:
+            wanted = np.isin(np.arange(len(ML_CLASSES)),
+                             [ML_CLASSES.index(c) for c in params["classes"]])
+            mask &= wanted[self.class_code[self.src[edges]]] | \
+                    wanted[self.class_code[self.dst[edges]]]
+        return mask
+
+    def graph_page(self, params):
+        """One /api/graph page: scans forward from the cursor in vectorized blocks."""
+        limit = params["limit"]
+        pos = self._cursor_position(params["cursor"])
+        if params["stepMin"] is not None:
+            pos = max(pos, np.searchsorted(self.sorted_step, params["stepMin"], side="left"))
+
+        end = self.n_edges
+        if params["stepMax"] is not None:
+            end = np.searchsorted(self.sorted_step, params["stepMax"], side="right")
+
+        picked = []
+        found = 0
+        block = max(SCAN_BLOCK, limit + 1)
+        while pos < end and found <= limit:
+            edges = self.page_order[pos:min(pos + block, end)]
+            hits = edges[self._edge_mask(edges, params)]
+            picked.append(hits)
+            found += len(hits)
+            pos += block
+
+        edges = np.concatenate(picked)[:limit + 1] if picked else np.empty(0, dtype=np.int64)
+        next_cursor = None
+        if len(edges) > limit:
+            edges = edges[:limit]
+            next_cursor = encode_cursor(self.step[edges[-1]], self.key[edges[-1]])
+
+        if params.get("format") == "columnar":
+            return self.graph_columns(edges, next_cursor)
+
+        endpoints = pd.unique(np.concatenate([self.src[edges], self.dst[edges]]))
+        return {
+            "nodes": self.node_dicts(endpoints),
+            "links": self.link_dicts(edges),
+            "nextCursor": next_cursor
+        }
+
+    def graph_columns(self, edges, next_cursor=None):
+        """Columnar page straight from the arrays, no per-row dicts."""
+        position, endpoints = pd.factorize(np.concatenate([self.src[edges], self.dst[edges]]))
+        endpoints = np.asarray(endpoints, dtype=np.int64)
+        return columnar_graph(
+            self.ids[endpoints],
+            self.risk[endpoints],
+            self.class_names[self.class_code[endpoints]],
+            position[:len(edges)],
+            position[len(edges):],
+            self.amount[edges],
+            self.step[edges],
+            self.fraud[edges],
+            next_cursor
+        )
+
+    # --------------------------------------------------
+    # NEIGHBORHOOD
+    # --------------------------------------------------
+    def incident_edges(self, code, fanout):
+        out_e = self.out_edges[self.out_ptr[code]:self.out_ptr[code + 1]]
+        in_e = self.in_edges[self.in_ptr[code]:self.in_ptr[code + 1]]
+        edges = np.concatenate([out_e, in_e])
+        if len(edges) > fanout:
+            # Both halves are amount-sorted; keep the largest overall
+            edges = edges[np.argsort(-self.amount[edges], kind="stable")[:fanout]]
+        return edges
+
+    def neighborhood(self, account_id, hops, limit, fanout):
+        """BFS over both edge directions with depth, fan-out and edge caps."""
+        root = self.code(account_id)
+        if root < 0:
+            return None
+
+        depth = {root: 0}
+        seen_edges = set()
+        edges = []
+        frontier = [root]
+        truncated = False
+
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for node in frontier:
+                for e in self.incident_edges(node, fanout).tolist():
+                    if e in seen_edges:
+                        continue
+                    if len(edges) >= limit:
+                        truncated = True
+                        break
+                    seen_edges.add(e)
+                    edges.append(e)
+                    for other in (int(self.src[e]), int(self.dst[e])):
+                        if other not in depth:
+                            depth[other] = hop
+                            next_frontier.append(other)
+                if truncated:
+                    break
+            if truncated or not next_frontier:
+                break
+            frontier = next_frontier
+
+        return {
+            "account": self.account(root),
+            "nodes": self.node_dicts(list(depth.keys()), depth=list(depth.values())),
+            "links": self.link_dicts(edges),
+            "truncated": truncated
+        }
+
+# ======================================================
+# LOADED-ONCE CACHE
+# ======================================================
+_store_lock = threading.Lock()
+_store_cache = {"signature": None, "store": None}
+
+
+def _signature(*paths):
+    sig = []
+    for path in paths:
+        resolved = columnar_path(path) or path
+        sig.append((resolved, os.path.getmtime(resolved)))
+    return tuple(sig)
+
+
+def load_graph_store(accounts_path, links_path):
+    """Return the shared store, rebuilding it only when the output files changed."""
+    signature = _signature(accounts_path, links_path)
+    with _store_lock:
+        if _store_cache["signature"] != signature:
+            accounts = read_table(accounts_path).fillna(0)
+            links = read_table(links_path).fillna(0)
+            _store_cache["store"] = GraphStore(accounts, links)
+            _store_cache["signature"] = signature
+            print(f"🗂️ Graph store loaded: {_store_cache['store'].n_nodes:,} nodes, "
+                  f"{_store_cache['store'].n_edges:,} edges")
+        return _store_cache["store"]
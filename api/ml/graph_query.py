@@ -0,0 +1,376 @@
+import base64
+import json
+import os
+
+# ======================================================
+# CONFIG
+# ======================================================
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+ML_CLASSES = ("FRAUD", "AT_RISK", "NORMAL")
+
+# objects: {"nodes": [{...}], "links": [{...}]}; columnar: parallel arrays
+GRAPH_FORMATS = ("objects", "columnar")
+
+# Ego-network caps
+MAX_HOPS = 3
+DEFAULT_HOPS = 1
+DEFAULT_NEIGHBORHOOD_LIMIT = 200
+MAX_NEIGHBORHOOD_LIMIT = 2000
+# Edges expanded per visited node and hop; keeps hubs from flooding a response
+MAX_FANOUT = int(os.getenv("NEIGHBORHOOD_MAX_FANOUT", "50"))
+
+# Fraud ring listing
+DEFAULT_RING_LIMIT = 100
+MAX_RING_LIMIT = 1000
+
+# Account search (autocomplete-sized pages)
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+# Descending riskScore / total_amount / tx_count, or ascending account_id;
+# ties always by account_id
+SEARCH_SORTS = ("risk", "amount", "txCount", "id")
+
+ACCOUNT_FIELDS = [
+    "account_id", "total_amount", "avg_amount", "tx_count",
+    "avg_balance_diff", "zero_balance_count", "riskScore", "class", "propagatedRisk"
+]
+
+# ======================================================
+# REQUEST PARSING
+# ======================================================
+class GraphQueryError(ValueError):
+    pass
+
+
+def _number(args, name, cast):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise GraphQueryError(f"Invalid value for {name}: {value}")
+
+
+def _count(args, name, default, minimum=1):
+    """Integer parameter, default only when absent; an explicit 0 is not 'unset'."""
+    value = _number(args, name, int)
+    if value is None:
+        return default
+    if value < minimum:
+        raise GraphQueryError(f"{name} must be at least {minimum}")
+    return value
+
+
+def _classes(args, name):
+    if not args.get(name):
+        return None
+    classes = [c.strip().upper() for c in args[name].split(",") if c.strip()]
+    unknown = [c for c in classes if c not in ML_CLASSES]
+    if unknown:
+        raise GraphQueryError(f"Unknown {name}: {', '.join(unknown)}")
+    return classes
+
+
+def encode_cursor(step, key):
+    raw = json.dumps([int(step), int(key)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        step, key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(step), int(key)
+    except (ValueError, TypeError):
+        raise GraphQueryError("Invalid cursor")
+
+
+def parse_graph_params(args):
+    """
+    Validate /api/graph query parameters.
+
+    limit, cursor               page size and opaque position from nextCursor
+    minRisk, mlClass            node filters; an edge matches if either end does
+    fraudOnly                   only edges with fraudEdge = 1
+    stepMin/stepMax             inclusive step range
+    amountMin/amountMax         inclusive amount range
+    format                      objects (default) or columnar
+    """
+    limit = _count(args, "limit", DEFAULT_LIMIT)
+
+    classes = _classes(args, "mlClass")
+
+    fmt = args.get("format") or "objects"
+    if fmt not in GRAPH_FORMATS:
+        raise GraphQueryError(f"format must be one of: {', '.join(GRAPH_FORMATS)}")
+
+    return {
+        "limit": min(limit, MAX_LIMIT),
+        "cursor": decode_cursor(args["cursor"]) if args.get("cursor") else None,
+        "minRisk": _number(args, "minRisk", float),
+        "classes": classes,
+        "fraudOnly": str(args.get("fraudOnly", "")).lower() in ("1", "true", "yes"),
+        "stepMin": _number(args, "stepMin", int),
+        "stepMax": _number(args, "stepMax", int),
+        "amountMin": _number(args, "amountMin", float),
+        "amountMax": _number(args, "amountMax", float),
+        "format": fmt,
+    }
+
+def parse_neighborhood_params(args):
+    hops = _count(args, "hops", DEFAULT_HOPS)
+    limit = _count(args, "limit", DEFAULT_NEIGHBORHOOD_LIMIT)
+    return {
+        "hops": min(hops, MAX_HOPS),
+        "limit": min(limit, MAX_NEIGHBORHOOD_LIMIT),
+        "fanout": MAX_FANOUT
+    }
+
+def parse_ring_params(args):
+    """
+    Validate /api/rings query parameters.
+
+    limit, offset               page of rings, riskiest (avg_risk) first
+    minLength/maxLength         inclusive ring length (accounts) range
+    minRisk                     minimum average riskScore of the ring members
+    account                     only rings this account is part of
+    """
+    limit = _count(args, "limit", DEFAULT_RING_LIMIT)
+    offset = _count(args, "offset", 0, minimum=0)
+    return {
+        "limit": min(limit, MAX_RING_LIMIT),
+        "offset": offset,
+        "minLength": _number(args, "minLength", int),
+        "maxLength": _number(args, "maxLength", int),
+        "minRisk": _number(args, "minRisk", float),
+        "account": args.get("account") or None
+    }
+
+def parse_search_params(args):
+    """
+    Validate /api/search query parameters.
+
+    q                           account_id prefix (case-sensitive, like the id index)
+    minRisk                     minimum riskScore
+    class                       comma-separated mlClass values
+    sort                        risk (default), amount, txCount or id
+    limit                       results per response
+    """
+    limit = _count(args, "limit", DEFAULT_SEARCH_LIMIT)
+
+    sort = args.get("sort") or "risk"
+    if sort not in SEARCH_SORTS:
+        raise GraphQueryError(f"sort must be one of: {', '.join(SEARCH_SORTS)}")
+
+    classes = _classes(args, "class")
+    return {
+        "q": (args.get("q") or "").strip() or None,
+        "minRisk": _number(args, "minRisk", float),
+        # Each class listed once, so per-class results never overlap
+        "classes": list(dict.fromkeys(classes)) if classes else None,
+        "sort": sort,
+        "limit": min(limit, MAX_SEARCH_LIMIT)
+    }
+
+# ======================================================
+# CYPHER
+# ======================================================
+def build_cypher(params):
+    """
+    Build the paginated edge query with only the active filters in WHERE.
+
+    Values always travel as query parameters; only fixed clause text is
+    concatenated. Fetches limit + 1 rows so the caller knows if more exist.
+    """
+    where = []
+    values = {"limit": params["limit"] + 1}
+
+    if params["minRisk"] is not None:
+        where.append("(a.riskScore >= $minRisk OR b.riskScore >= $minRisk)")
+        values["minRisk"] = params["minRisk"]
+    if params["classes"]:
+        where.append("(a.mlClass IN $classes OR b.mlClass IN $classes)")
+        values["classes"] = params["classes"]
+    if params["fraudOnly"]:
+        where.append("t.fraudEdge = 1")
+    if params["stepMin"] is not None:
+        where.append("t.step >= $stepMin")
+        values["stepMin"] = params["stepMin"]
+    if params["stepMax"] is not None:
+        where.append("t.step <= $stepMax")
+        values["stepMax"] = params["stepMax"]
+    if params["amountMin"] is not None:
+        where.append("t.amount >= $amountMin")
+        values["amountMin"] = params["amountMin"]
+    if params["amountMax"] is not None:
+        where.append("t.amount <= $amountMax")
+        values["amountMax"] = params["amountMax"]
+    if params["cursor"] is not None:
+        where.append(
+            "(t.step > $cursorStep OR (t.step = $cursorStep AND coalesce(t.key, 0) > $cursorKey))"
+        )
+        values["cursorStep"], values["cursorKey"] = params["cursor"]
+
+    query = "MATCH (a:Account)-[t:TRANSFERRED_TO]->(b:Account)\n"
+    if where:
+        query += "WHERE " + "\n  AND ".join(where) + "\n"
+    query += """RETURN
+  a.id AS source,
+  b.id AS target,
+  a.riskScore AS sourceRisk,
+  b.riskScore AS targetRisk,
+  a.mlClass AS sourceMLClass,
+  b.mlClass AS targetMLClass,
+  t.amount AS amount,
+  t.step AS step,
+  t.fraudEdge AS fraudEdge,
+  coalesce(t.key, 0) AS key
+ORDER BY step, key
+LIMIT $limit
+"""
+    return query, values
+
+# Fixed ORDER BY text per sort key; the id / riskScore / total_amount /
+# tx_count indexes serve the prefix seek and the ordered scans.
+SEARCH_ORDERS = {
+    "risk": "a.riskScore DESC, a.id",
+    "amount": "a.total_amount DESC, a.id",
+    "txCount": "a.tx_count DESC, a.id",
+    "id": "a.id"
+}
+
+
+def build_search_cypher(params):
+    """Account search with only the active filters in WHERE; fetches limit + 1 rows."""
+    where = []
+    values = {"limit": params["limit"] + 1}
+
+    if params["q"]:
+        where.append("a.id STARTS WITH $q")
+        values["q"] = params["q"]
+    if params["minRisk"] is not None:
+        where.append("a.riskScore >= $minRisk")
+        values["minRisk"] = params["minRisk"]
+    if params["classes"]:
+        where.append("a.mlClass IN $classes")
+        values["classes"] = params["classes"]
+
+    query = "MATCH (a:Account)\n"
+    if where:
+        query += "WHERE " + "\n  AND ".join(where) + "\n"
+    query += f"""RETURN
+  a.id AS id,
+  a.riskScore AS riskScore,
+  a.mlClass AS class,
+  a.total_amount AS totalAmount,
+  a.tx_count AS txCount
+ORDER BY {SEARCH_ORDERS[params["sort"]]}
+LIMIT $limit
+"""
+    return query, values
+
+
+def neo4j_search(session, params):
+    """/api/search payload from Neo4j, shaped like the in-process index's."""
+    query, values = build_search_cypher(params)
+    records = list(session.run(query, **values))
+    return {
+        "results": [
+            {
+                "id": r["id"],
+                "riskScore": round(float(r["riskScore"] or 0), 2),
+                "class": r["class"],
+                "totalAmount": round(float(r["totalAmount"] or 0), 2),
+                "txCount": int(r["txCount"] or 0)
+            }
+            for r in records[:params["limit"]]
+        ],
+        "more": len(records) > params["limit"],
+        "q": params["q"],
+        "sort": params["sort"],
+        "limit": params["limit"]
+    }
+
+
+ACCOUNT_QUERY = "MATCH (a:Account {id: $id}) RETURN properties(a) AS props"
+
+# One BFS hop: every frontier id is an index seek on :Account(id); each node
+# contributes at most $fanout of its largest transfers in either direction.
+NEIGHBORHOOD_HOP_QUERY = """
+UNWIND $frontier AS fid
+MATCH (n:Account {id: fid})-[t:TRANSFERRED_TO]-(m:Account)
+WITH n, t, m ORDER BY t.amount DESC
+WITH n, collect({t: t, m: m})[..$fanout] AS nbrs
+UNWIND nbrs AS x
+WITH x.t AS t, x.m AS m
+RETURN
+  elementId(t) AS eid,
+  startNode(t).id AS source,
+  endNode(t).id AS target,
+  t.amount AS amount,
+  t.step AS step,
+  t.fraudEdge AS fraudEdge,
+  m.id AS neighbor,
+  m.riskScore AS riskScore,
+  m.mlClass AS mlClass
+"""
+
+
+def neo4j_neighborhood(session, account_id, hops, limit, fanout):
+    """Hop-by-hop BFS in Cypher with the same caps as the in-process index."""
+    record = session.run(ACCOUNT_QUERY, id=account_id).single()
+    if record is None:
+        return None
+
+    props = record["props"]
+    account = {field: props.get(field) for field in ACCOUNT_FIELDS}
+    account["account_id"] = props.get("id")
+    account["class"] = props.get("mlClass")
+
+    nodes = {account_id: {
+        "id": account_id,
+        "riskScore": props.get("riskScore"),
+        "mlClass": props.get("mlClass"),
+        "depth": 0
+    }}
+    seen_edges = set()
+    links = []
+    frontier = [account_id]
+    truncated = False
+
+    for hop in range(1, hops + 1):
+        next_frontier = []
+        for r in session.run(NEIGHBORHOOD_HOP_QUERY, frontier=frontier, fanout=fanout):
+            if r["eid"] in seen_edges:
+                continue
+            if len(links) >= limit:
+                truncated = True
+                break
+            seen_edges.add(r["eid"])
+            links.append({
+                "source": r["source"],
+                "target": r["target"],
+                "amount": r["amount"],
+                "step": r["step"],
+                "fraud": r["fraudEdge"]
+            })
+            if r["neighbor"] not in nodes:
+                nodes[r["neighbor"]] = {
+                    "id": r["neighbor"],
+                    "riskScore": r["riskScore"],
+                    "mlClass": r["mlClass"],
+                    "depth": hop
+                }
+                next_frontier.append(r["neighbor"])
+        if truncated or not next_frontier:
+            break
+        frontier = next_frontier
+
+    return {
+        "account": account,
+        "nodes": list(nodes.values()),
+        "links": links,
+        "truncated": truncated
+    }
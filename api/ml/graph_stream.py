@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# ======================================================
+# CONFIG
+# ======================================================
+# How often an open stream checks the graph version (one small file read)
+POLL_SECONDS = float(os.getenv("GRAPH_STREAM_POLL", "1"))
+# Comment line sent on idle streams so proxies keep the connection open
+KEEPALIVE_SECONDS = float(os.getenv("GRAPH_STREAM_KEEPALIVE", "15"))
+# Streams end after this long; clients reconnect and resume from their version
+MAX_STREAM_SECONDS = float(os.getenv("GRAPH_STREAM_MAX_SECONDS", "300"))
+# Deltas kept for resuming clients; older clients get a fresh snapshot
+HISTORY = int(os.getenv("GRAPH_STREAM_HISTORY", "64"))
+
+# ======================================================
+# GRAPH DIFF
+# ======================================================
+def link_key(link):
+    return (link["source"], link["target"], link["step"], link["amount"])
+
+
+def diff_graph(old, new):
+    """
+    Node and link changes turning payload old into payload new
+    ({"nodes": [...], "links": [...]} as served by /api/graph).
+
+    Nodes are matched by id and sent whole when added or changed; links are
+    immutable transfers, matched on (source, target, step, amount).
+    """
+    old_nodes = {n["id"]: n for n in old["nodes"]}
+    new_nodes = {n["id"]: n for n in new["nodes"]}
+    old_links = {link_key(l): l for l in old["links"]}
+    new_links = {link_key(l): l for l in new["links"]}
+
+    return {
+        "nodes": {
+            "upsert": [n for i, n in new_nodes.items() if old_nodes.get(i) != n],
+            "remove": [i for i in old_nodes if i not in new_nodes]
+        },
+        "links": {
+            "add": [l for k, l in new_links.items() if k not in old_links],
+            "remove": [l for k, l in old_links.items() if k not in new_links]
+        }
+    }
+
+
+def is_empty(delta):
+    return not any(delta["nodes"].values()) and not any(delta["links"].values())
+
+# ======================================================
+# SHARED FEED
+# ======================================================
+class GraphFeed:
+    """
+    Latest graph snapshot plus a bounded history of version-to-version deltas.
+
+    One instance per process is shared by every open stream: the snapshot is
+    rebuilt (and diffed against the previous one) at most once per graph
+    version, however many clients are connected.
+    """
+
+    def __init__(self, graph_version, build_snapshot, history=HISTORY):
+        self.graph_version = graph_version
+        self.build_snapshot = build_snapshot
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = None
+        # (from_version, to_version, delta), oldest first
+        self._history = deque(maxlen=history)
+
+    def refresh(self):
+        """Bring the snapshot up to the current graph version; returns that version."""
+        version = self.graph_version.current()
+        with self._lock:
+            if version != self._version:
+                snapshot = self.build_snapshot()
+                if self._snapshot is not None:
+                    self._history.append((self._version, version, diff_graph(self._snapshot, snapshot)))
+                self._snapshot = snapshot
+                self._version = version
+            return self._version
+
+    def snapshot(self):
+        with self._lock:
+            return self._version, self._snapshot
+
+    def changes_since(self, version):
+        """
+        Deltas leading from version to the current one, or None when the
+        history no longer reaches back that far (the client needs a snapshot).
+        """
+        with self._lock:
+            if version == self._version:
+                return []
+            chain = []
+            for start, end, delta in self._history:
+                if start == version or chain:
+                    chain.append((end, delta))
+            if not chain or chain[-1][0] != self._version:
+                return None
+            return chain
+
+# ======================================================
+# WIRE FORMATS
+# ======================================================
+def sse_event(kind, version, payload):
+    data = json.dumps(payload, separators=(",", ":"))
+    return f"id: {version}\nevent: {kind}\ndata: {data}\n\n"
+
+
+def ndjson_event(kind, version, payload):
+    return json.dumps({"type": kind, "version": version, "data": payload}, separators=(",", ":")) + "\n"
+
+
+def stream_events(feed, since=None, fmt="sse", max_seconds=MAX_STREAM_SECONDS,
+                  poll=POLL_SECONDS, keepalive=KEEPALIVE_SECONDS):
+    """
+    Generator behind /api/graph/stream.
+
+    Starts with the deltas since the client's last seen version when the
+    history still covers it, else with a full snapshot; afterwards yields
+    one delta event per graph version change. Each event carries its version
+    (the SSE id), so a reconnecting client resumes where it left off.
+    """
+    event = sse_event if fmt == "sse" else ndjson_event
+    version = feed.refresh()
+
+    changes = feed.changes_since(since) if since is not None else None
+    if changes is None:
+        version, snapshot = feed.snapshot()
+        yield event("snapshot", version, snapshot)
+    else:
+        for end, delta in changes:
+            if not is_empty(delta):
+                yield event("delta", end, delta)
+        version = changes[-1][0] if changes else version
+
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < max_seconds:
+        time.sleep(poll)
+        current = feed.refresh()
+        if current != version:
+            changes = feed.changes_since(version)
+            if changes is None:
+                version, snapshot = feed.snapshot()
+                yield event("snapshot", version, snapshot)
+            else:
+                for end, delta in changes:
+                    if not is_empty(delta):
+                        yield event("delta", end, delta)
+                version = changes[-1][0] if changes else current
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= keepalive:
+            yield ": keepalive\n\n" if fmt == "sse" else "\n"
+            last_sent = time.monotonic()
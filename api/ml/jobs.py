@@ -0,0 +1,235 @@
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _pipeline():
+    # Imported on first use: the pipeline pulls in pandas/numpy, which job
+    # status polls in the web process never need
+    try:
+        from ml import fraud_data_pipeline
+    except ImportError:
+        import fraud_data_pipeline
+    return fraud_data_pipeline
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Pipeline runs are CPU-bound pandas/Python, so they get their own processes
+# and never occupy the threads serving /api/graph.
+MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "2"))
+# Jobs accepted (queued + running) per server process before returning 429
+MAX_PENDING = int(os.getenv("PIPELINE_MAX_PENDING", "8"))
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+# ======================================================
+# FILE-BACKED JOB RECORDS
+# ======================================================
+class JobStore:
+    """
+    One JSON record per job in a shared directory.
+
+    Files (not process memory) so any gunicorn worker can answer a status
+    poll and the pipeline process can report progress without a broker.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id, suffix="json"):
+        if not JOB_ID_PATTERN.match(job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def read(self, job_id):
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def write(self, record):
+        path = self._path(record["id"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+        return record
+
+    def request_cancel(self, job_id):
+        open(self._path(job_id, "cancel"), "w").close()
+
+    def cancel_requested(self, job_id):
+        return os.path.exists(self._path(job_id, "cancel"))
+
+
+def new_record(job_id, input_csv):
+    stages = _pipeline().PIPELINE_STAGES
+    return {
+        "id": job_id,
+        "status": "queued",
+        "input": os.path.basename(input_csv),
+        "stage": None,
+        "progress": 0,
+        "stages": {name: {"status": "pending"} for name in stages},
+        "submittedAt": time.time(),
+        "startedAt": None,
+        "finishedAt": None,
+        "result": None,
+        "error": None
+    }
+
+# ======================================================
+# WORKER PROCESS ENTRY POINT
+# ======================================================
+def _close_stage(record, now):
+    stage = record["stage"]
+    if stage and record["stages"][stage]["status"] == "running":
+        info = record["stages"][stage]
+        info["status"] = "done"
+        info["seconds"] = round(now - info["startedAt"], 4)
+
+
+def run_pipeline_job(jobs_dir, job_id, input_csv, options):
+    """Runs inside the process pool; all state goes through the job record."""
+    store = JobStore(jobs_dir)
+    record = store.read(job_id)
+    pipeline = _pipeline()
+    stages = pipeline.PIPELINE_STAGES
+
+    if store.cancel_requested(job_id):
+        record.update(status="cancelled", finishedAt=time.time())
+        store.write(record)
+        return record["status"]
+
+    record.update(status="running", startedAt=time.time())
+    store.write(record)
+
+    def progress(stage, **detail):
+        if store.cancel_requested(job_id):
+            raise JobCancelled()
+
+        now = time.time()
+        if stage != record["stage"]:
+            _close_stage(record, now)
+            # Stages a mode does not run separately (e.g. features while
+            # streaming) are folded into the next one
+            for name in stages[:stages.index(stage)]:
+                if record["stages"][name]["status"] == "pending":
+                    record["stages"][name]["status"] = "skipped"
+            record["stages"][stage] = {"status": "running", "startedAt": now}
+            record["stage"] = stage
+            record["progress"] = int(100 * stages.index(stage) / len(stages))
+
+        record["stages"][stage]["detail"] = detail
+        store.write(record)
+
+    try:
+        result = pipeline.run_pipeline(input_csv, progress=progress, **options)
+    except JobCancelled:
+        record["status"] = "cancelled"
+        print(f"🛑 Job {job_id} cancelled")
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = str(e)
+        record["traceback"] = traceback.format_exc()
+        print(f"❌ Job {job_id} failed: {e}")
+    else:
+        _close_stage(record, time.time())
+        record.update(status="succeeded", progress=100, result=result)
+
+    record["finishedAt"] = time.time()
+    store.write(record)
+    return record["status"]
+
+# ======================================================
+# JOB MANAGER
+# ======================================================
+class JobManager:
+    """Bounded process pool for pipeline runs plus the shared job records."""
+
+    def __init__(self, jobs_dir, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self.store = JobStore(jobs_dir)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # Created on first submit; spawn (not fork) so workers don't inherit
+        # the web process's driver connections and threads.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def pending_count(self):
+        return sum(1 for f in self._futures.values() if not f.done())
+
+    def submit(self, input_csv, options, on_success=None):
+        with self._lock:
+            if self.pending_count() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} pipeline jobs already pending")
+
+            job_id = uuid.uuid4().hex
+            record = self.store.write(new_record(job_id, input_csv))
+
+            future = self._executor().submit(
+                run_pipeline_job, self.store.directory, job_id, input_csv, options
+            )
+            self._futures[job_id] = future
+
+        def done(f):
+            with self._lock:
+                self._futures.pop(job_id, None)
+            if on_success and not f.cancelled() and f.exception() is None and f.result() == "succeeded":
+                try:
+                    on_success(job_id)
+                except Exception as e:
+                    print(f"⚠️ Job {job_id} completion hook failed: {e}")
+
+        future.add_done_callback(done)
+        return record
+
+    def get(self, job_id):
+        return self.store.read(job_id)
+
+    def cancel(self, job_id):
+        record = self.store.read(job_id)
+        if record is None or record["status"] in TERMINAL_STATUSES:
+            return record
+
+        with self._lock:
+            future = self._futures.get(job_id)
+
+        if future is not None and future.cancel():
+            # Never started: no worker will touch the record again
+            record.update(status="cancelled", finishedAt=time.time())
+            return self.store.write(record)
+
+        # Running (or owned by another server process): the worker checks
+        # this flag at every stage boundary
+        self.store.request_cancel(job_id)
+        record["cancelRequested"] = True
+        return record
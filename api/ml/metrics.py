@@ -0,0 +1,210 @@
+import math
+import sys
+import threading
+import time
+
+# resource (peak RSS) is Unix-only; elsewhere memory is simply not reported
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Request latency buckets (seconds) for the API histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Pipeline stages and Neo4j ingests run from sub-second to many minutes
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# Detail keys of progress(stage, **detail) that count a stage's input
+ROW_KEYS = ("rows", "links", "accounts")
+
+# ======================================================
+# MEMORY
+# ======================================================
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unknown."""
+    if not HAS_RESOURCE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# ======================================================
+# PIPELINE STAGE PROFILER
+# ======================================================
+class StageProfiler:
+    """
+    Wall time, input rows and peak RSS per pipeline stage.
+
+    Fed by the same progress(stage, **detail) calls run_pipeline already
+    makes when a stage starts: a new stage closes the previous one, and a
+    repeated call for the running stage (streaming chunks) only updates its
+    row count.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._current = None
+
+    def _close(self, now):
+        if self._current is None:
+            return
+        info = self.stages[self._current]
+        info["seconds"] = round(now - info.pop("_start"), 4)
+        info["peakRssBytes"] = peak_rss_bytes()
+        rows = info.get("rows")
+        info["rowsPerSec"] = int(rows / info["seconds"]) if rows and info["seconds"] > 0 else None
+        self._current = None
+
+    def stage(self, name, **detail):
+        now = time.perf_counter()
+        if name != self._current:
+            self._close(now)
+            self.stages[name] = {"_start": now, "rows": None}
+            self._current = name
+        for key in ROW_KEYS:
+            if detail.get(key) is not None:
+                self.stages[name]["rows"] = int(detail[key])
+                break
+
+    def rows(self, name, count):
+        """Set a stage's row count once it is known (e.g. after loading)."""
+        if name in self.stages:
+            self.stages[name]["rows"] = int(count)
+
+    def finish(self):
+        now = time.perf_counter()
+        self._close(now)
+        return {
+            "totalSeconds": round(now - self.started, 4),
+            "peakRssBytes": peak_rss_bytes(),
+            "stages": self.stages
+        }
+
+# ======================================================
+# PROMETHEUS METRICS
+# ======================================================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, key)} {_number(v)}" for key, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, dict(v, counts=list(v["counts"]))) for k, v in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                le = (("le", _number(bound)),)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(state['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics in the Prometheus text exposition format.
+
+    Values live in this process only; behind several gunicorn workers each
+    scrape sees the worker that answered it.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
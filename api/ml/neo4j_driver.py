@@ -0,0 +1,63 @@
+import os
+import threading
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Connections kept per process; serverless instances serve few requests at once
+MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "10"))
+# Pooled connections idle longer than this are pinged before reuse
+LIVENESS_CHECK_SECONDS = float(os.getenv("NEO4J_LIVENESS_CHECK_SECONDS", "30"))
+# Wait for a free pooled connection before failing the request
+ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "10"))
+# TCP connect timeout; keeps a down database from stalling the local fallback
+CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "5"))
+# Recycle connections before Aura / load balancers drop idle ones
+MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "300"))
+
+# ======================================================
+# LAZY DRIVER
+# ======================================================
+class LazyDriver:
+    """
+    Stand-in for neo4j.Driver that imports the driver package and opens the
+    connection pool on the first session() call, not at import time.
+
+    One pool per process, reused by every request; session() and close()
+    behave like the real driver's, so callers need not know it is lazy.
+    """
+
+    def __init__(self, uri, auth, **config):
+        self.uri = uri
+        self.auth = auth
+        self.config = {
+            "max_connection_pool_size": MAX_POOL_SIZE,
+            "liveness_check_timeout": LIVENESS_CHECK_SECONDS,
+            "connection_acquisition_timeout": ACQUISITION_TIMEOUT,
+            "connection_timeout": CONNECTION_TIMEOUT,
+            "max_connection_lifetime": MAX_CONNECTION_LIFETIME,
+            **config
+        }
+        self._driver = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._driver is None:
+            with self._lock:
+                if self._driver is None:
+                    from neo4j import GraphDatabase
+                    self._driver = GraphDatabase.driver(self.uri, auth=self.auth, **self.config)
+        return self._driver
+
+    def session(self, **kwargs):
+        return self.get().session(**kwargs)
+
+    def warm_up(self):
+        """Open the pool and check the server is reachable (raises if not)."""
+        self.get().verify_connectivity()
+
+    def close(self):
+        with self._lock:
+            if self._driver is not None:
+                self._driver.close()
+                self._driver = None
@@ -0,0 +1,419 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+import pandas as pd
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+try:
+    from ml.fraud_data_pipeline import FRAUD_THRESHOLD, AT_RISK_THRESHOLD
+    from ml.table_io import add_edge_keys
+except ImportError:
+    from fraud_data_pipeline import FRAUD_THRESHOLD, AT_RISK_THRESHOLD
+    from table_io import add_edge_keys
+
+# ======================================================
+# CONFIG
+# ======================================================
+BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "10000"))
+WRITE_WORKERS = int(os.getenv("NEO4J_WRITE_WORKERS", "4"))
+BATCH_RETRIES = int(os.getenv("NEO4J_BATCH_RETRIES", "3"))
+
+# replace: wipe the graph (in batches) and reload it
+# incremental: upsert the uploaded accounts and append deduplicated real edges
+INGEST_MODES = ("replace", "incremental")
+
+RETRYABLE_ERRORS = (ServiceUnavailable, SessionExpired, TransientError)
+
+# ======================================================
+# CYPHER
+# ======================================================
+SCHEMA_QUERIES = [
+    # Uniqueness constraint also creates the index every MERGE/MATCH on
+    # :Account(id) below is resolved through (no label scans).
+    "CREATE CONSTRAINT account_id_unique IF NOT EXISTS "
+    "FOR (a:Account) REQUIRE a.id IS UNIQUE",
+    "CREATE INDEX transfer_key IF NOT EXISTS "
+    "FOR ()-[t:TRANSFERRED_TO]-() ON (t.key)",
+    # Backs the ORDER BY step / step-range filters of paginated /api/graph
+    "CREATE INDEX transfer_step IF NOT EXISTS "
+    "FOR ()-[t:TRANSFERRED_TO]-() ON (t.step)",
+    "CREATE INDEX account_risk IF NOT EXISTS "
+    "FOR (a:Account) ON (a.riskScore)",
+    # /api/search: id prefixes (STARTS WITH) seek the constraint's range
+    # index; these back its class filter and amount / tx_count orders
+    "CREATE INDEX account_class IF NOT EXISTS "
+    "FOR (a:Account) ON (a.mlClass)",
+    "CREATE INDEX account_total_amount IF NOT EXISTS "
+    "FOR (a:Account) ON (a.total_amount)",
+    "CREATE INDEX account_tx_count IF NOT EXISTS "
+    "FOR (a:Account) ON (a.tx_count)",
+    "CREATE CONSTRAINT ingest_id_unique IF NOT EXISTS "
+    "FOR (i:Ingest) REQUIRE i.id IS UNIQUE",
+    # Transaction ledger: the key dedupes rows of overlapping uploads, and
+    # (account, ingest) finds the rows one ingest added for an account
+    "CREATE CONSTRAINT transaction_key_unique IF NOT EXISTS "
+    "FOR (x:Transaction) REQUIRE x.key IS UNIQUE",
+    "CREATE INDEX transaction_account_ingest IF NOT EXISTS "
+    "FOR (x:Transaction) ON (x.account, x.ingest)",
+]
+
+# Batched full reset: relationships first so no single node delete drags a
+# huge adjacency list into one transaction.
+DELETE_RELATIONSHIPS_QUERY = """
+MATCH ()-[r]->()
+WITH r LIMIT $limit
+DELETE r
+RETURN count(*) AS deleted
+"""
+
+DELETE_NODES_QUERY = """
+MATCH (n)
+WITH n LIMIT $limit
+DETACH DELETE n
+RETURN count(*) AS deleted
+"""
+
+ACCOUNTS_QUERY = """
+UNWIND $rows AS row
+MERGE (a:Account {id: row.account_id})
+SET
+a.total_amount = row.total_amount,
+a.avg_amount = row.avg_amount,
+a.tx_count = row.tx_count,
+a.avg_balance_diff = row.avg_balance_diff,
+a.zero_balance_count = row.zero_balance_count,
+a.riskScore = row.riskScore,
+a.mlClass = row.class,
+a.propagatedRisk = row.propagatedRisk
+"""
+
+# Folds an upload's per-account aggregates into the stored ones: sums and
+# counts add up, means are re-weighted by tx_count, and riskScore is the
+# tx_count-weighted blend of the stored and new scores (same for propagatedRisk).
+ACCOUNTS_MERGE_QUERY = """
+UNWIND $rows AS row
+MERGE (a:Account {id: row.account_id})
+WITH a, row,
+     coalesce(a.tx_count, 0) AS old_count,
+     coalesce(a.total_amount, 0.0) AS old_total,
+     coalesce(a.avg_balance_diff, 0.0) AS old_avg_diff,
+     coalesce(a.zero_balance_count, 0) AS old_zero,
+     coalesce(a.riskScore, 0.0) AS old_risk,
+     coalesce(a.propagatedRisk, 0.0) AS old_propagated
+WITH a, row, old_count, old_total, old_avg_diff, old_zero, old_risk, old_propagated,
+     old_count + row.tx_count AS tx_count
+WITH a, row, tx_count,
+     old_total + row.total_amount AS total_amount,
+     (old_avg_diff * old_count + row.avg_balance_diff * row.tx_count) / tx_count AS avg_balance_diff,
+     old_zero + row.zero_balance_count AS zero_balance_count,
+     round((old_risk * old_count + row.riskScore * row.tx_count) / tx_count, 2) AS risk,
+     round((old_propagated * old_count + coalesce(row.propagatedRisk, 0.0) * row.tx_count) / tx_count, 2) AS propagated
+SET
+a.total_amount = total_amount,
+a.avg_amount = total_amount / tx_count,
+a.tx_count = tx_count,
+a.avg_balance_diff = avg_balance_diff,
+a.zero_balance_count = zero_balance_count,
+a.riskScore = risk,
+a.propagatedRisk = propagated,
+a.mlClass = CASE
+  WHEN risk >= $fraud_threshold THEN 'FRAUD'
+  WHEN risk >= $at_risk_threshold THEN 'AT_RISK'
+  ELSE 'NORMAL'
+END
+"""
+
+# Per-account delta of the ledger rows this ingest added (see
+# TRANSACTIONS_MERGE_QUERY), folded in like ACCOUNTS_MERGE_QUERY. Rows seen in
+# an earlier upload were counted then, so overlapping uploads add nothing twice.
+ACCOUNTS_LEDGER_MERGE_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (x:Transaction {account: row.account_id, ingest: $ingest})
+WITH row,
+     count(x) AS new_count,
+     coalesce(sum(x.amount), 0.0) AS new_total,
+     coalesce(sum(x.balance_diff), 0.0) AS new_diff,
+     coalesce(sum(x.zero_balance), 0) AS new_zero
+MERGE (a:Account {id: row.account_id})
+WITH a, row, new_count, new_total, new_diff, new_zero,
+     coalesce(a.tx_count, 0) AS old_count,
+     coalesce(a.total_amount, 0.0) AS old_total,
+     coalesce(a.avg_balance_diff, 0.0) AS old_avg_diff,
+     coalesce(a.zero_balance_count, 0) AS old_zero,
+     coalesce(a.riskScore, 0.0) AS old_risk,
+     coalesce(a.propagatedRisk, 0.0) AS old_propagated
+WITH a, row, new_count, new_total, new_diff, new_zero,
+     old_count, old_total, old_avg_diff, old_zero, old_risk, old_propagated,
+     old_count + new_count AS tx_count
+WITH a, row, tx_count,
+     CASE tx_count WHEN 0 THEN 1 ELSE tx_count END AS divisor,
+     old_total + new_total AS total_amount,
+     old_avg_diff * old_count + new_diff AS total_diff,
+     old_zero + new_zero AS zero_balance_count,
+     old_risk * old_count + row.riskScore * new_count AS risk_sum,
+     old_propagated * old_count + coalesce(row.propagatedRisk, 0.0) * new_count AS propagated_sum
+WITH a, tx_count, total_amount, zero_balance_count, divisor,
+     total_diff / divisor AS avg_balance_diff,
+     round(risk_sum / divisor, 2) AS risk,
+     round(propagated_sum / divisor, 2) AS propagated
+SET
+a.total_amount = total_amount,
+a.avg_amount = total_amount / divisor,
+a.tx_count = tx_count,
+a.avg_balance_diff = avg_balance_diff,
+a.zero_balance_count = zero_balance_count,
+a.riskScore = risk,
+a.propagatedRisk = propagated,
+a.mlClass = CASE
+  WHEN risk >= $fraud_threshold THEN 'FRAUD'
+  WHEN risk >= $at_risk_threshold THEN 'AT_RISK'
+  ELSE 'NORMAL'
+END
+"""
+
+# Ledger rows are stamped with the ingest that first stored them; a row
+# whose key is already stored keeps its original stamp
+TRANSACTIONS_MERGE_QUERY = """
+UNWIND $rows AS row
+MERGE (x:Transaction {key: row.key})
+ON CREATE SET
+x.account = row.account_id,
+x.amount = row.amount,
+x.balance_diff = row.balance_diff,
+x.zero_balance = row.zero_balance,
+x.ingest = $ingest
+"""
+
+LINKS_QUERY = """
+UNWIND $rows AS row
+MATCH (src:Account {id: row.src})
+MATCH (dst:Account {id: row.dst})
+CREATE (src)-[:TRANSFERRED_TO {
+key: row.key,
+amount: row.amount,
+step: row.step,
+fraudEdge: row.fraudEdge
+}]->(dst)
+"""
+
+# Append-only: an edge whose key is already stored is left untouched
+LINKS_MERGE_QUERY = """
+UNWIND $rows AS row
+MATCH (src:Account {id: row.src})
+MATCH (dst:Account {id: row.dst})
+MERGE (src)-[t:TRANSFERRED_TO {key: row.key}]->(dst)
+ON CREATE SET
+t.amount = row.amount,
+t.step = row.step,
+t.fraudEdge = row.fraudEdge
+"""
+
+INGEST_EXISTS_QUERY = "MATCH (i:Ingest {id: $id}) RETURN count(i) > 0 AS applied"
+
+INGEST_RECORD_QUERY = """
+MERGE (i:Ingest {id: $id})
+ON CREATE SET i.created = timestamp(), i.accounts = $accounts, i.links = $links
+"""
+
+# ======================================================
+# HELPERS
+# ======================================================
+def ensure_schema(driver, database):
+    with driver.session(database=database) as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query).consume()
+
+
+def iter_batches(df, batch_size):
+    """Yield (index, rows) slices without materializing the whole frame as dicts."""
+    for i, start in enumerate(range(0, len(df), batch_size)):
+        yield i, df.iloc[start:start + batch_size].to_dict("records")
+
+
+def ingest_id(accounts, links):
+    """Content hash of an upload's outputs, used to apply it at most once."""
+    digest = hashlib.sha256()
+    for df in (accounts, links):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _run_batch(tx, query, rows, params):
+    tx.run(query, rows=rows, **params).consume()
+
+
+def write_batch(driver, database, query, rows, retries=BATCH_RETRIES, params=None):
+    """
+    Write one batch in a managed transaction.
+
+    execute_write() already retries transient failures inside its own time
+    budget; the outer loop additionally covers the session being dropped
+    (e.g. Aura routing changes) between attempts.
+    """
+    attempt = 0
+    while True:
+        try:
+            t0 = time.perf_counter()
+            with driver.session(database=database) as session:
+                session.execute_write(_run_batch, query, rows, params or {})
+            return time.perf_counter() - t0
+        except RETRYABLE_ERRORS:
+            attempt += 1
+            if attempt > retries:
+                raise
+            time.sleep(min(2 ** attempt * 0.25, 5))
+
+
+def _report(label, index, total, rows, seconds):
+    rate = int(rows / seconds) if seconds > 0 else 0
+    print(f"📦 {label} batch {index + 1}/{total}: {rows:,} rows in {seconds:.2f}s ({rate:,} rows/s)")
+    return {"batch": index, "rows": rows, "seconds": round(seconds, 4), "rows_per_sec": rate}
+
+# ======================================================
+# RESET
+# ======================================================
+def _delete_batch(tx, query, limit):
+    return tx.run(query, limit=limit).single()["deleted"]
+
+
+def reset_graph(driver, database, batch_size=BATCH_SIZE):
+    """Empty the graph in bounded transactions instead of one DETACH DELETE."""
+    deleted = 0
+    with driver.session(database=database) as session:
+        for query in (DELETE_RELATIONSHIPS_QUERY, DELETE_NODES_QUERY):
+            while True:
+                n = session.execute_write(_delete_batch, query, batch_size)
+                deleted += n
+                if n < batch_size:
+                    break
+    print(f"🧹 Cleared {deleted:,} graph entities")
+    return deleted
+
+# ======================================================
+# BULK LOADER
+# ======================================================
+def load_accounts(driver, database, accounts, batch_size=BATCH_SIZE,
+                  query=ACCOUNTS_QUERY, params=None):
+    # Node batches run sequentially: they are cheap once the constraint
+    # exists, and relationships must not start before all nodes are in.
+    total = -(-len(accounts) // batch_size)
+    stats = []
+    for i, rows in iter_batches(accounts, batch_size):
+        seconds = write_batch(driver, database, query, rows, params=params)
+        stats.append(_report("accounts", i, total, len(rows), seconds))
+    return stats
+
+
+def load_links(driver, database, links, batch_size=BATCH_SIZE, workers=WRITE_WORKERS,
+               query=LINKS_QUERY, params=None, label="links"):
+    """Write relationship (or ledger) batches on a bounded pool, at most 2*workers in flight."""
+    total = -(-len(links) // batch_size)
+    stats = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+
+        def drain(return_when):
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                i, n = in_flight.pop(future)
+                stats.append(_report(label, i, total, n, future.result()))
+
+        for i, rows in iter_batches(links, batch_size):
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+            future = pool.submit(write_batch, driver, database, query, rows, params=params)
+            in_flight[future] = (i, len(rows))
+
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+    stats.sort(key=lambda s: s["batch"])
+    return stats
+
+
+def bulk_load(driver, database, accounts, links, mode="replace",
+              batch_size=BATCH_SIZE, workers=WRITE_WORKERS, transactions=None):
+    """
+    transactions is the run's account_transactions ledger. Without it
+    (outputs written before it existed) incremental ingests fold the
+    uploaded aggregates in whole, as overlapping uploads cannot be told apart.
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode: {mode}")
+
+    t0 = time.perf_counter()
+    links = add_edge_keys(links)
+    upload_id = ingest_id(accounts, links)
+    ledger_params = {"ingest": upload_id}
+    ledger_stats = []
+
+    if mode == "replace":
+        reset_graph(driver, database, batch_size)
+    ensure_schema(driver, database)
+
+    if mode == "replace":
+        account_stats = load_accounts(driver, database, accounts, batch_size)
+        link_stats = load_links(driver, database, links, batch_size, workers)
+        if transactions is not None:
+            # Stored so later incremental ingests can recognize these rows
+            ledger_stats = load_links(driver, database, transactions, batch_size, workers,
+                                      query=TRANSACTIONS_MERGE_QUERY, params=ledger_params,
+                                      label="transactions")
+    else:
+        if "synthetic" in links.columns:
+            # Generated edges are redrawn for every upload; only real
+            # transfers are appended
+            links = links[links["synthetic"] == 0]
+
+        with driver.session(database=database) as session:
+            applied = session.run(INGEST_EXISTS_QUERY, id=upload_id).single()["applied"]
+
+        thresholds = {
+            "fraud_threshold": FRAUD_THRESHOLD,
+            "at_risk_threshold": AT_RISK_THRESHOLD
+        }
+        if applied:
+            # Aggregates are additive, so a re-sent upload must not be folded
+            # in twice; its edges still go through the deduplicating MERGE.
+            print("♻️ Upload already ingested, skipping account aggregates")
+            account_stats = []
+        elif transactions is not None:
+            # Ledger first: each account then folds in only the rows this
+            # ingest stored, not ones an overlapping earlier upload had
+            ledger_stats = load_links(driver, database, transactions, batch_size, workers,
+                                      query=TRANSACTIONS_MERGE_QUERY, params=ledger_params,
+                                      label="transactions")
+            account_stats = load_accounts(
+                driver, database, accounts, batch_size,
+                query=ACCOUNTS_LEDGER_MERGE_QUERY,
+                params=dict(thresholds, **ledger_params)
+            )
+        else:
+            account_stats = load_accounts(
+                driver, database, accounts, batch_size,
+                query=ACCOUNTS_MERGE_QUERY,
+                params=thresholds
+            )
+        link_stats = load_links(driver, database, links, batch_size, workers,
+                                query=LINKS_MERGE_QUERY)
+
+    with driver.session(database=database) as session:
+        session.run(INGEST_RECORD_QUERY, id=upload_id,
+                    accounts=len(accounts), links=len(links)).consume()
+
+    seconds = time.perf_counter() - t0
+    rows = len(accounts) + len(links)
+    print(f"✅ Bulk load ({mode}): {rows:,} rows in {seconds:.2f}s")
+
+    return {
+        "mode": mode,
+        "ingestId": upload_id,
+        "accounts": len(accounts),
+        "links": len(links),
+        "seconds": round(seconds, 4),
+        "rows_per_sec": int(rows / seconds) if seconds > 0 else 0,
+        "batches": {"accounts": account_stats, "links": link_stats, "transactions": ledger_stats}
+    }
@@ -0,0 +1,380 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# ======================================================
+# CONFIG
+# ======================================================
+STATE_NAME = "online_state.json"
+
+# Checkpoint the in-memory state at most this often (0 = only on demand)
+CHECKPOINT_SECONDS = float(os.getenv("SCORE_CHECKPOINT_SECONDS", "30"))
+# Scored transactions kept for /api/score/recent (LiveMonitor feed)
+RECENT_SIZE = int(os.getenv("SCORE_RECENT_SIZE", "500"))
+# Transactions accepted per /api/score request
+MAX_BATCH = int(os.getenv("SCORE_MAX_BATCH", "10000"))
+
+# Reported with every online score: it covers the lifetime-aggregate terms
+# only, so its 0-100 scale is not the pipeline's riskScore
+SCORE_MODEL = "lifetime-aggregates"
+
+
+def lifetime_weights():
+    """
+    run_pipeline's lifetime-aggregate score weights, in its feature order.
+    Its windowed velocity and fan-in / fan-out terms need each account's step
+    and counterparty history, which is not kept online, so they are left out.
+    """
+    # Imported here: the pipeline module loads pandas/numpy
+    try:
+        from ml.fraud_data_pipeline import SCORE_WEIGHTS
+    except ImportError:
+        from fraud_data_pipeline import SCORE_WEIGHTS
+    return dict(SCORE_WEIGHTS)
+
+
+class ScoringError(ValueError):
+    pass
+
+# ======================================================
+# RUNNING MOMENTS (WELFORD)
+# ======================================================
+class RunningMoments:
+    """
+    Count, mean and M2 of each score feature over all accounts.
+
+    An account's feature vector changes with every transaction, so an update
+    removes the old vector and adds the new one; both are O(features).
+    """
+
+    def __init__(self, size, n=0, mean=None, m2=None):
+        self.n = n
+        self.mean = list(mean) if mean is not None else [0.0] * size
+        self.m2 = list(m2) if m2 is not None else [0.0] * size
+
+    def add(self, x):
+        self.n += 1
+        for i, v in enumerate(x):
+            delta = v - self.mean[i]
+            self.mean[i] += delta / self.n
+            self.m2[i] += delta * (v - self.mean[i])
+
+    def remove(self, x):
+        if self.n <= 1:
+            self.n = 0
+            self.mean = [0.0] * len(self.mean)
+            self.m2 = [0.0] * len(self.m2)
+            return
+        n = self.n - 1
+        for i, v in enumerate(x):
+            mean = (self.n * self.mean[i] - v) / n
+            self.m2[i] = max(self.m2[i] - (v - mean) * (v - self.mean[i]), 0.0)
+            self.mean[i] = mean
+        self.n = n
+
+    def std(self):
+        """Sample standard deviation, as the pipeline's z-scores use."""
+        if self.n < 2:
+            return [0.0] * len(self.m2)
+        return [math.sqrt(m2 / (self.n - 1)) for m2 in self.m2]
+
+# ======================================================
+# TRANSACTION PARSING
+# ======================================================
+def _number(tx, name):
+    """Missing or unparsable numbers count as 0, like the pipeline's to_number()."""
+    value = tx.get(name)
+    if value in (None, ""):
+        return 0.0
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+def _text(tx, name):
+    value = tx.get(name)
+    return value if isinstance(value, str) else None
+
+
+def parse_transaction(tx):
+    """(account, amount_cents, balance_diff_cents, zero_balance) of one input-schema row."""
+    if not isinstance(tx, dict):
+        raise ScoringError("Each transaction must be a JSON object")
+    account = tx.get("nameOrig")
+    if account in (None, ""):
+        raise ScoringError("nameOrig is required")
+    if tx.get("amount") in (None, ""):
+        raise ScoringError("amount is required")
+
+    old_balance = _number(tx, "oldbalanceOrg")
+    new_balance = _number(tx, "newbalanceOrig")
+    # Integer cents, as the pipeline sums money (exact, order-independent)
+    return (
+        str(account).strip(),
+        round(_number(tx, "amount") * 100),
+        round((old_balance - new_balance) * 100),
+        1 if old_balance == 0 else 0
+    )
+
+# ======================================================
+# ONLINE SCORER
+# ======================================================
+class OnlineScorer:
+    """
+    Per-account running aggregates plus global feature moments, updated one
+    transaction at a time, so a transaction is scored without rerunning the
+    pipeline.
+
+    riskScore is the lifetime-aggregate part of the pipeline's weighted
+    z-score composite. The z-score moments and the min-max raw range are
+    frozen at bootstrap, so live traffic cannot shift the scale other
+    accounts are scored on; scores outside the bootstrap range are clamped to
+    0-100. The running moments are still kept, for /api/score/stats. The
+    pipeline's fixed FRAUD / AT_RISK quotas are a whole-population step and
+    are not applied online.
+
+    State lives in this process; checkpoint() writes it to disk (atomic
+    replace) and load() restores it after a restart.
+    """
+
+    def __init__(self, fraud_threshold, at_risk_threshold, source=None):
+        self.fraud_threshold = fraud_threshold
+        self.at_risk_threshold = at_risk_threshold
+        # Identifies the pipeline outputs this state was seeded from
+        self.source = source
+        self.weights = lifetime_weights()
+        self.score_features = list(self.weights)
+        # account -> (amount_cents, tx_count, balance_diff_cents, zero_balance_count);
+        # tuples are replaced, never mutated, so a shallow copy is a snapshot
+        self.accounts = {}
+        self.moments = RunningMoments(len(self.score_features))
+        # Bootstrap population's (mean, std) per feature and raw-score range
+        self.baseline = None
+        self.raw_min = None
+        self.raw_max = None
+        self.transactions = 0
+        self.sequence = 0
+        self.recent = deque(maxlen=RECENT_SIZE)
+        self.last_checkpoint = None
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+
+    # --------------------------------------------------
+    # FEATURES & SCORE
+    # --------------------------------------------------
+    def features(self, state):
+        """Score feature vector of one account state, in score_features order."""
+        amount_cents, count, diff_cents, zero = state
+        values = {
+            "total_amount": amount_cents / 100,
+            "tx_count": count,
+            "avg_balance_diff": diff_cents / 100 / count,
+            "zero_balance_count": zero
+        }
+        return tuple(values[name] for name in self.score_features)
+
+    def raw_score(self, x):
+        if self.baseline is None:
+            return 0.0
+        mean, std = self.baseline
+        raw = 0.0
+        for name, v, m, s in zip(self.score_features, x, mean, std):
+            if s > 0:
+                raw += self.weights[name] * (v - m) / s
+        return raw
+
+    def risk_score(self, raw):
+        if self.raw_min is None or self.raw_max <= self.raw_min:
+            return 50.0
+        score = (raw - self.raw_min) / (self.raw_max - self.raw_min) * 100
+        return round(min(max(score, 0.0), 100.0), 2)
+
+    @property
+    def ready(self):
+        """True once seeded: without a baseline there is no scale to score on."""
+        return self.baseline is not None
+
+    def classify(self, score):
+        if score >= self.fraud_threshold:
+            return "FRAUD"
+        if score >= self.at_risk_threshold:
+            return "AT_RISK"
+        return "NORMAL"
+
+    # --------------------------------------------------
+    # BOOTSTRAP
+    # --------------------------------------------------
+    def bootstrap(self, rows):
+        """
+        Seed from pipeline account rows (total_amount, tx_count,
+        avg_balance_diff, zero_balance_count), e.g. final_accounts records.
+        """
+        with self._lock:
+            self.accounts = {}
+            self.moments = RunningMoments(len(self.score_features))
+            for r in rows:
+                count = int(r["tx_count"])
+                if count <= 0:
+                    continue
+                state = (
+                    round(float(r["total_amount"]) * 100),
+                    count,
+                    round(float(r["avg_balance_diff"]) * count * 100),
+                    int(r["zero_balance_count"])
+                )
+                self.accounts[str(r["account_id"])] = state
+                self.moments.add(self.features(state))
+
+            self.baseline = (list(self.moments.mean), self.moments.std()) if self.accounts else None
+            raws = [self.raw_score(self.features(s)) for s in self.accounts.values()]
+            self.raw_min = min(raws) if raws else None
+            self.raw_max = max(raws) if raws else None
+        return len(self.accounts)
+
+    # --------------------------------------------------
+    # SCORING
+    # --------------------------------------------------
+    def _update(self, account, amount_cents, diff_cents, zero):
+        old = self.accounts.get(account)
+        if old is None:
+            state = (amount_cents, 1, diff_cents, zero)
+        else:
+            self.moments.remove(self.features(old))
+            state = (old[0] + amount_cents, old[1] + 1, old[2] + diff_cents, old[3] + zero)
+        self.accounts[account] = state
+
+        x = self.features(state)
+        self.moments.add(x)
+        score = self.risk_score(self.raw_score(x))
+        amount_cents, count, diff_cents, zero = state
+        self.transactions += 1
+        self.sequence += 1
+        return {
+            "seq": self.sequence,
+            "account": account,
+            "riskScore": score,
+            "class": self.classify(score),
+            "scoreModel": SCORE_MODEL,
+            "totalAmount": round(amount_cents / 100, 2),
+            "txCount": count,
+            "avgBalanceDiff": round(diff_cents / 100 / count, 2),
+            "zeroBalanceCount": zero,
+            "newAccount": old is None
+        }
+
+    def score(self, transactions):
+        """Apply and score transactions in order; all are validated before any is applied."""
+        parsed = [parse_transaction(tx) for tx in transactions]
+        results = []
+        with self._lock:
+            for tx, (account, amount_cents, diff_cents, zero) in zip(transactions, parsed):
+                result = self._update(account, amount_cents, diff_cents, zero)
+                results.append(result)
+                self.recent.append(dict(
+                    result,
+                    amount=round(amount_cents / 100, 2),
+                    nameDest=_text(tx, "nameDest"),
+                    type=_text(tx, "type"),
+                    step=int(_number(tx, "step")),
+                    scoredAt=time.time()
+                ))
+        return results
+
+    def recent_since(self, seq=0, limit=RECENT_SIZE):
+        with self._lock:
+            items = [r for r in self.recent if r["seq"] > seq]
+        return items[-limit:]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "scoreModel": SCORE_MODEL,
+                "accounts": len(self.accounts),
+                "transactions": self.transactions,
+                "sequence": self.sequence,
+                "moments": {
+                    "n": self.moments.n,
+                    "mean": dict(zip(self.score_features, self.moments.mean)),
+                    "std": dict(zip(self.score_features, self.moments.std()))
+                },
+                "rawRange": [self.raw_min, self.raw_max],
+                "lastCheckpoint": self.last_checkpoint
+            }
+
+    # --------------------------------------------------
+    # CHECKPOINTS
+    # --------------------------------------------------
+    def _write(self, out_dir):
+        with self._lock:
+            snapshot = {
+                "source": self.source,
+                "accounts": self.accounts.copy(),
+                "moments": [self.moments.n, list(self.moments.mean), list(self.moments.m2)],
+                "baseline": self.baseline,
+                "rawRange": [self.raw_min, self.raw_max],
+                "transactions": self.transactions,
+                "sequence": self.sequence
+            }
+        # Serialized outside the lock so scoring is not held up by the write
+        path = os.path.join(out_dir, STATE_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def checkpoint(self, out_dir):
+        """Write the state (a consistent snapshot) to out_dir; returns the path."""
+        with self._checkpoint_lock:
+            self.last_checkpoint = time.time()
+            return self._write(out_dir)
+
+    def maybe_checkpoint(self, out_dir, interval=CHECKPOINT_SECONDS):
+        """Start a background checkpoint when one is due; never blocks scoring."""
+        if interval <= 0:
+            return False
+        now = time.time()
+        if self.last_checkpoint is not None and now - self.last_checkpoint < interval:
+            return False
+        if not self._checkpoint_lock.acquire(blocking=False):
+            return False
+        self.last_checkpoint = now
+
+        def run():
+            try:
+                self._write(out_dir)
+            except OSError as e:
+                print(f"⚠️ Online state checkpoint failed: {str(e)}")
+            finally:
+                self._checkpoint_lock.release()
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def load(self, out_dir):
+        """Restore a checkpoint seeded from the same outputs; False if there is none."""
+        try:
+            with open(os.path.join(out_dir, STATE_NAME), encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # Checkpoints without a frozen baseline scored on a drifting scale
+        if snapshot.get("source") != self.source or "baseline" not in snapshot:
+            return False
+
+        n, mean, m2 = snapshot["moments"]
+        with self._lock:
+            self.accounts = {k: tuple(v) for k, v in snapshot["accounts"].items()}
+            self.moments = RunningMoments(len(self.score_features), n, mean, m2)
+            self.baseline = snapshot["baseline"]
+            self.raw_min, self.raw_max = snapshot["rawRange"]
+            self.transactions = snapshot["transactions"]
+            self.sequence = snapshot["sequence"]
+        self.last_checkpoint = time.time()
+        return True
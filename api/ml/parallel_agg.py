@@ -0,0 +1,159 @@
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+try:
+    from ml.fraud_data_pipeline import (
+        read_transactions, prepare_transactions, partial_aggregates, merge_partials,
+        finalize_aggregates, account_buckets, bucket_moments, add_velocity_features,
+        score_weights, MOMENT_BUCKETS, SEED
+    )
+    from ml.velocity_features import (
+        partial_velocity, merge_velocity, partition_velocity, parse_windows, WINDOWS
+    )
+except ImportError:
+    from fraud_data_pipeline import (
+        read_transactions, prepare_transactions, partial_aggregates, merge_partials,
+        finalize_aggregates, account_buckets, bucket_moments, add_velocity_features,
+        score_weights, MOMENT_BUCKETS, SEED
+    )
+    from velocity_features import (
+        partial_velocity, merge_velocity, partition_velocity, parse_windows, WINDOWS
+    )
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Largest slice of the input CSV one task parses at a time
+BLOCK_BYTES = int(os.getenv("PIPELINE_BLOCK_BYTES", str(64 << 20)))
+
+# ======================================================
+# INPUT SPLITTING
+# ======================================================
+def split_ranges(path, n_ranges):
+    """
+    Cut the CSV body into about n_ranges byte ranges that end on line breaks.
+
+    Returns (header_bytes, [(start, end), ...]). Assumes no quoted field
+    spans a line break, which holds for PaySim-style exports.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        bounds = [body_start]
+        for i in range(1, n_ranges):
+            f.seek(body_start + (size - body_start) * i // n_ranges)
+            f.readline()  # move to the start of the next full line
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+        bounds.append(size)
+    ranges = [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+    return header, ranges
+
+# ======================================================
+# WORKER TASKS
+# ======================================================
+def aggregate_range(input_csv, header, start, end, spill_dir, task, groups, seed=SEED, precision=None):
+    """
+    Phase 1: parse one byte range, run steps 0-3 on it and spill the
+    per-account partials and velocity state, hash-partitioned by account
+    into `groups` files each.
+
+    Each worker reads its own slice straight from the file, so transaction
+    columns never cross process boundaries; only partials are handed on.
+    """
+    with open(input_csv, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    df = prepare_transactions(read_transactions(io.BytesIO(header + body)), seed=seed)
+    del body
+
+    partial = partial_aggregates(df)
+    group = account_buckets(partial.index) % groups
+    for g in range(groups):
+        partial[group == g].to_pickle(os.path.join(spill_dir, f"{task}-{g}.pkl"))
+
+    velocity = partition_velocity(partial_velocity(df, precision), groups, account_buckets)
+    for g in range(groups):
+        pd.to_pickle(velocity[g], os.path.join(spill_dir, f"{task}-{g}-velocity.pkl"))
+    return len(df)
+
+
+def merge_group(spill_dir, n_tasks, group, windows, precision=None):
+    """
+    Phase 2: merge one hash partition's partials from every range into final
+    accounts with their velocity features, plus the score moments of the
+    buckets it owns.
+
+    Partitions hold disjoint accounts and sums are exact integer cents, so
+    the result does not depend on how the input was split.
+    """
+    partials = [
+        pd.read_pickle(os.path.join(spill_dir, f"{task}-{group}.pkl"))
+        for task in range(n_tasks)
+    ]
+    accounts = finalize_aggregates(merge_partials(partials))
+    del partials
+
+    velocity = [
+        pd.read_pickle(os.path.join(spill_dir, f"{task}-{group}-velocity.pkl"))
+        for task in range(n_tasks)
+    ]
+    accounts = add_velocity_features(accounts, merge_velocity(velocity), windows, precision)
+    return accounts, bucket_moments(accounts, list(score_weights(windows)))
+
+# ======================================================
+# DRIVER
+# ======================================================
+def aggregate_parallel(input_csv, workers, report=None, seed=SEED, windows=None, precision=None):
+    """
+    Steps 0-3.5 of run_pipeline on a process pool.
+
+    Returns (accounts, moments, rows): the same accounts frame (with
+    velocity features for windows) the serial path builds, the per-bucket
+    score moments, and the transaction count.
+    """
+    report = report or (lambda stage, **detail: None)
+    windows = windows or parse_windows(WINDOWS)
+
+    n_ranges = max(workers, -(-os.path.getsize(input_csv) // BLOCK_BYTES))
+    header, ranges = split_ranges(input_csv, n_ranges)
+    groups = min(workers, MOMENT_BUCKETS)
+
+    # spawn, as for pipeline jobs: workers must not inherit server threads
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        with tempfile.TemporaryDirectory(prefix="nexus_agg_") as spill_dir:
+            report("load", workers=workers, ranges=len(ranges))
+            futures = [
+                pool.submit(aggregate_range, input_csv, header, start, end, spill_dir, task, groups,
+                            seed, precision)
+                for task, (start, end) in enumerate(ranges)
+            ]
+            rows = 0
+            for done, future in enumerate(futures, 1):
+                rows += future.result()
+                report("aggregate", rows=rows, ranges=done)
+
+            report("velocity", workers=workers)
+            merged = list(pool.map(
+                merge_group, [spill_dir] * groups, [len(ranges)] * groups, range(groups),
+                [windows] * groups, [precision] * groups
+            ))
+    finally:
+        # A failed range or a cancelled job drops the queued tasks
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    # Serial groupby emits accounts sorted by id; restore that order
+    accounts = pd.concat([a for a, _ in merged], ignore_index=True)
+    accounts = accounts.sort_values("account_id", kind="stable").reset_index(drop=True)
+
+    # Bucket b lives only in partition b % groups
+    moments = [merged[b % groups][1][b] for b in range(MOMENT_BUCKETS)]
+    return accounts, moments, rows
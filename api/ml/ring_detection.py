@@ -0,0 +1,353 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# scipy's C implementation is used for the SCC pass when installed
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Longest ring reported (number of transfers / accounts in the cycle)
+MAX_LENGTH = int(os.getenv("PIPELINE_RING_MAX_LENGTH", "4"))
+# > 0: only rings whose transfers run in increasing step order within this
+# many steps (money going round in time); 0: any directed cycle
+WINDOW = int(os.getenv("PIPELINE_RING_WINDOW", "0"))
+# Keep at most this many rings, the riskiest (avg_risk) ones
+MAX_RINGS = int(os.getenv("PIPELINE_RING_MAX_COUNT", "10000"))
+
+# Vectorized in/out-degree peeling passes before Tarjan
+TRIM_ROUNDS = 8
+# Partial paths grown per block of starting edges
+START_BLOCK = 50_000
+
+RING_COLUMNS = [
+    "ring_id", "length", "accounts", "first_step", "last_step",
+    "total_amount", "fraud_edges", "scc_id", "scc_size", "avg_risk"
+]
+
+# ======================================================
+# STRONGLY CONNECTED COMPONENTS
+# ======================================================
+def build_adjacency(src, dst, n_nodes):
+    """CSR out-adjacency: (indptr, edge ids ordered by source)."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, order
+
+
+def trim_acyclic(src, dst, n_nodes, rounds=TRIM_ROUNDS):
+    """
+    Mask of nodes that can still be on a cycle.
+
+    Repeatedly drops nodes with no incoming or no outgoing edge among the
+    remaining ones; each pass is a vectorized O(E) bincount. On transaction
+    graphs this removes most accounts before the Python-level Tarjan pass.
+    """
+    active = np.ones(n_nodes, dtype=bool)
+    for _ in range(rounds):
+        live = active[src] & active[dst]
+        has_out = np.bincount(src[live], minlength=n_nodes) > 0
+        has_in = np.bincount(dst[live], minlength=n_nodes) > 0
+        keep = active & has_out & has_in
+        if keep.sum() == active.sum():
+            break
+        active = keep
+    return active
+
+
+def _tarjan(n_nodes, indptr, targets, active):
+    """Iterative Tarjan over the active nodes; O(V + E), no recursion limit."""
+    index = [-1] * n_nodes
+    low = [0] * n_nodes
+    on_stack = [False] * n_nodes
+    labels = [-1] * n_nodes
+    stack = []
+    counter = 0
+    n_components = 0
+
+    for root in range(n_nodes):
+        if not active[root] or index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, indptr[root])]
+
+        while work:
+            v, i = work[-1]
+            end = indptr[v + 1]
+            while i < end:
+                w = targets[i]
+                i += 1
+                if not active[w]:
+                    continue
+                if index[w] == -1:
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, indptr[w]))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        labels[w] = n_components
+                        if w == v:
+                            break
+                    n_components += 1
+
+    return np.array(labels, dtype=np.int64)
+
+
+def strongly_connected_components(src, dst, n_nodes):
+    """
+    SCC label per node; -1 for nodes that cannot be on any cycle.
+
+    Linear time: acyclic nodes are peeled off first, then Tarjan (or scipy's
+    csgraph when installed) labels the rest. Components of one node are
+    reported as -1 too, since rings need at least two accounts.
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+
+    active = trim_acyclic(src, dst, n_nodes)
+    live = active[src] & active[dst]
+
+    if HAS_SCIPY:
+        graph = csr_matrix((np.ones(live.sum()), (src[live], dst[live])), shape=(n_nodes, n_nodes))
+        _, labels = connected_components(graph, directed=True, connection="strong")
+        labels = np.where(active, labels, -1)
+    else:
+        indptr, order = build_adjacency(src[live], dst[live], n_nodes)
+        targets = dst[live][order]
+        labels = _tarjan(n_nodes, indptr.tolist(), targets.tolist(), active.tolist())
+
+    labelled = labels >= 0
+    if not labelled.any():
+        return labels
+    sizes = np.bincount(labels[labelled])
+    return np.where(labelled & (sizes[np.maximum(labels, 0)] >= 2), labels, -1)
+
+# ======================================================
+# BOUNDED CYCLE ENUMERATION
+# ======================================================
+def _fan_out(lo, hi):
+    """Flatten per-path edge ranges [lo, hi): (path row, edge id) arrays."""
+    counts = hi - lo
+    rows = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, lo[rows] + offsets
+
+
+def keep_top(cycles, max_rings):
+    """
+    The max_rings cycles with the highest score across all chunks; ties keep
+    enumeration order, so the result does not depend on when this runs.
+    """
+    scores = np.concatenate([c["score"] for c in cycles])
+    if len(scores) <= max_rings:
+        return cycles
+    keep = np.zeros(len(scores), dtype=bool)
+    keep[np.argsort(-scores, kind="stable")[:max_rings]] = True
+    kept = []
+    for c, mask in zip(cycles, np.split(keep, np.cumsum([len(c["score"]) for c in cycles])[:-1])):
+        if mask.any():
+            kept.append({k: v[mask] for k, v in c.items()})
+    return kept
+
+
+def enumerate_cycles(src, dst, step, amount, fraud, n_nodes, labels,
+                     max_length=MAX_LENGTH, window=WINDOW, max_rings=MAX_RINGS, risk=None):
+    """
+    Simple directed cycles of 2..max_length accounts inside each SCC.
+
+    Paths are grown breadth-first as whole arrays (one vectorized expansion
+    per hop) from blocks of starting edges, so work is bounded by the number
+    of short paths inside SCCs rather than a DFS from every node. Closing
+    edges back to the start are found with a hash lookup of the (src, dst)
+    pair, so the longest paths are never expanded.
+
+    window == 0: parallel transfers are collapsed per account pair and each
+    cycle is reported once, rooted at its smallest account code.
+    window > 0: transfers must have strictly increasing steps spanning at
+    most `window`; each such temporal ring is rooted at its earliest edge.
+
+    Every cycle is enumerated, but only the max_rings with the highest mean
+    risk of their accounts are kept (compacted whenever twice that many are
+    held), so the cap never depends on traversal order.
+
+    Returns (cycles, truncated); cycles is a list of dicts of per-ring arrays.
+    """
+    risk = np.zeros(n_nodes) if risk is None else np.asarray(risk, dtype=np.float64)
+    inside = (labels[src] >= 0) & (labels[src] == labels[dst]) & (src != dst)
+    edges = pd.DataFrame({
+        "src": src[inside], "dst": dst[inside], "step": step[inside],
+        "amount": amount[inside], "fraud": fraud[inside]
+    })
+    if window <= 0:
+        edges = edges.groupby(["src", "dst"], as_index=False, sort=True).agg(
+            step=("step", "min"), last_step=("step", "max"),
+            amount=("amount", "sum"), fraud=("fraud", "sum")
+        )
+    else:
+        edges = edges.sort_values(["src", "dst", "step"], kind="stable", ignore_index=True)
+        edges["last_step"] = edges["step"]
+
+    # Edges are sorted by (src, dst, step): out-edges of a node and parallel
+    # edges of a pair are contiguous ranges
+    e_src = edges["src"].to_numpy(dtype=np.int64)
+    e_dst = edges["dst"].to_numpy(dtype=np.int64)
+    e_step = edges["step"].to_numpy(dtype=np.int64)
+    e_last = edges["last_step"].to_numpy(dtype=np.int64)
+    e_amount = edges["amount"].to_numpy(dtype=np.float64)
+    e_fraud = edges["fraud"].to_numpy(dtype=np.int64)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(e_src, minlength=n_nodes), out=indptr[1:])
+
+    # Hash index of account pairs -> their contiguous range of edges
+    e_key = e_src * n_nodes + e_dst
+    pair_start = np.flatnonzero(np.diff(e_key, prepend=-1))
+    pair_end = np.append(pair_start[1:], len(e_key))
+    pairs = pd.Index(e_key[pair_start])
+
+    first = np.arange(len(e_src))
+    if window <= 0:
+        first = first[e_dst > e_src]  # root = smallest account on the cycle
+
+    # A path is its accounts and the edges between them (int32 matrices, one
+    # row per path); ring totals are only summed for paths that close
+    def extend(nodes, path_edges, rows, e):
+        return (np.concatenate([nodes[rows], e_dst[e][:, None].astype(np.int32)], axis=1),
+                np.concatenate([path_edges[rows], e[:, None].astype(np.int32)], axis=1))
+
+    def in_window(path_edges, rows, e):
+        if window <= 0:
+            return np.ones(len(e), dtype=bool)
+        return (e_step[e] > e_step[path_edges[rows, -1]]) & \
+               (e_step[e] - e_step[path_edges[rows, 0]] <= window)
+
+    cycles = []
+    found = 0
+    held = 0
+    for block_start in range(0, len(first), START_BLOCK):
+        block = first[block_start:block_start + START_BLOCK]
+        nodes = np.stack([e_src[block], e_dst[block]], axis=1).astype(np.int32)
+        path_edges = block[:, None].astype(np.int32)
+
+        for n_accounts in range(2, max_length + 1):
+            if len(nodes) == 0:
+                break
+            start, last = nodes[:, 0].astype(np.int64), nodes[:, -1].astype(np.int64)
+
+            # Close the ring: edges last -> start
+            pair = pairs.get_indexer(last * n_nodes + start)
+            has_pair = pair >= 0
+            rows, e = _fan_out(np.where(has_pair, pair_start[pair], 0),
+                               np.where(has_pair, pair_end[pair], 0))
+            keep = in_window(path_edges, rows, e)
+            if keep.any():
+                ring_edges = np.concatenate([path_edges[rows[keep]], e[keep][:, None]], axis=1)
+                ring_nodes = nodes[rows[keep]]
+                cycles.append({
+                    "nodes": ring_nodes,
+                    "score": risk[ring_nodes].mean(axis=1),
+                    "first_step": e_step[ring_edges].min(axis=1),
+                    "last_step": e_last[ring_edges].max(axis=1),
+                    "amount": e_amount[ring_edges].sum(axis=1),
+                    "fraud": e_fraud[ring_edges].sum(axis=1)
+                })
+                found += int(keep.sum())
+                held += int(keep.sum())
+                if held > 2 * max_rings:
+                    cycles = keep_top(cycles, max_rings)
+                    held = max_rings
+
+            if n_accounts == max_length:
+                break
+
+            # Grow by one account: any out-edge to an account not yet on the path
+            rows, e = _fan_out(indptr[last], indptr[last + 1])
+            v = e_dst[e]
+            keep = in_window(path_edges, rows, e) & (nodes[rows] != v[:, None]).all(axis=1)
+            if window <= 0:
+                keep &= v > start[rows]
+            if n_accounts + 1 == max_length:
+                # Last account: only worth keeping if it pays back the start
+                keep[keep] = pairs.get_indexer(v[keep] * n_nodes + start[rows[keep]]) >= 0
+            nodes, path_edges = extend(nodes, path_edges, rows[keep], e[keep])
+
+    if cycles:
+        cycles = keep_top(cycles, max_rings)
+    return cycles, found > max_rings
+
+# ======================================================
+# RING TABLE
+# ======================================================
+def detect_rings(ids, src, dst, step, amount, fraud, risk=None,
+                 max_length=MAX_LENGTH, window=WINDOW, max_rings=MAX_RINGS):
+    """
+    Fraud rings of the edge list (integer account codes into ids) as a frame
+    with RING_COLUMNS, riskiest (avg_risk) first; accounts lists the ring
+    members in transfer order, joined by ">". Returns (rings, truncated).
+    """
+    ids = np.asarray(ids, dtype=object)
+    n = len(ids)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+
+    risk = np.zeros(n) if risk is None else np.asarray(risk, dtype=np.float64)
+
+    labels = strongly_connected_components(src, dst, n)
+    cycles, truncated = enumerate_cycles(
+        src, dst, np.asarray(step, dtype=np.int64), np.asarray(amount, dtype=np.float64),
+        np.asarray(fraud, dtype=np.int64), n, labels,
+        max_length=max_length, window=window, max_rings=max_rings, risk=risk
+    )
+    if not cycles:
+        empty = pd.DataFrame(columns=RING_COLUMNS).astype("int64")
+        return empty.astype({"accounts": object, "total_amount": "float64", "avg_risk": "float64"}), truncated
+
+    sizes = np.bincount(labels[labels >= 0], minlength=labels.max() + 1)
+
+    parts = []
+    for c in cycles:
+        nodes = c["nodes"]
+        members = ids[nodes]
+        parts.append(pd.DataFrame({
+            "length": nodes.shape[1],
+            "accounts": [">".join(row) for row in members.astype(str).tolist()],
+            "first_step": c["first_step"],
+            "last_step": c["last_step"],
+            "total_amount": c["amount"].round(2),
+            "fraud_edges": c["fraud"],
+            "scc_id": labels[nodes[:, 0]],
+            "scc_size": sizes[labels[nodes[:, 0]]],
+            "avg_risk": c["score"].round(2),
+            "_score": c["score"]
+        }))
+
+    rings = pd.concat(parts, ignore_index=True)
+    rings = rings.iloc[np.argsort(-rings.pop("_score").to_numpy(), kind="stable")].reset_index(drop=True)
+    rings.insert(0, "ring_id", np.arange(len(rings)))
+    return rings[RING_COLUMNS], truncated
@@ -0,0 +1,219 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ml.table_io import read_table, columnar_path
+    from ml.graph_query import ML_CLASSES, SEARCH_SORTS
+except ImportError:
+    from table_io import read_table, columnar_path
+    from graph_query import ML_CLASSES, SEARCH_SORTS
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Accounts examined per vectorized filter pass when a filter does not
+# follow the chosen sort order
+SCAN_BLOCK = 8192
+
+SEARCH_COLUMNS = ["account_id", "riskScore", "class", "total_amount", "tx_count"]
+
+# Sort key -> output column; every order is descending, ties by account_id
+SORT_COLUMNS = {"risk": "riskScore", "amount": "total_amount", "txCount": "tx_count"}
+
+# ======================================================
+# HELPERS
+# ======================================================
+def prefix_end(prefix):
+    """Smallest string sorting after every string that starts with prefix."""
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def first_matches(order, mask_fn, count):
+    """Up to count entries of order passing mask_fn, scanned in vectorized blocks."""
+    picked = []
+    found = 0
+    pos = 0
+    block = max(SCAN_BLOCK, count)
+    while pos < len(order) and found < count:
+        chunk = order[pos:pos + block]
+        hits = chunk[mask_fn(chunk)]
+        picked.append(hits)
+        found += len(hits)
+        pos += block
+    if not picked:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(picked)[:count]
+
+# ======================================================
+# SEARCH INDEX
+# ======================================================
+class AccountSearchIndex:
+    """
+    Sorted, array-backed indexes over final_accounts for /api/search.
+
+    Accounts are stored in account_id order, so an id prefix is one
+    contiguous range found with two binary searches. riskScore, total_amount
+    and tx_count each have a descending order (ties by id), overall and per
+    class, so a top-k query whose filters follow the chosen order costs
+    O(log n + k); other filters are applied in vectorized blocks along that
+    order and stop as soon as k rows matched.
+    """
+
+    def __init__(self, accounts):
+        ids = accounts["account_id"].astype("string").reset_index(drop=True)
+        by_id = np.asarray(ids.argsort(), dtype=np.int64)
+
+        self.ids = ids.to_numpy(dtype=object)[by_id]
+        self.risk = accounts["riskScore"].to_numpy(dtype=np.float64)[by_id]
+        self.values = {
+            "risk": self.risk,
+            "amount": accounts["total_amount"].to_numpy(dtype=np.float64)[by_id],
+            "txCount": accounts["tx_count"].to_numpy(dtype=np.int64)[by_id],
+        }
+
+        self.class_names = np.array(ML_CLASSES, dtype=object)
+        class_codes = pd.Index(ML_CLASSES).get_indexer(accounts["class"])[by_id]
+        self.class_code = np.where(class_codes >= 0, class_codes, ML_CLASSES.index("NORMAL")).astype(np.int8)
+
+        # -------- SECONDARY (SORTED) INDEXES --------
+        # orders[(class, sort)]: account positions in sort order; class None = all
+        positions = np.arange(len(self.ids), dtype=np.int64)
+        self.orders = {(None, "id"): positions}
+        for sort in SORT_COLUMNS:
+            self.orders[(None, sort)] = np.argsort(-self.values[sort], kind="stable")
+        for code, name in enumerate(ML_CLASSES):
+            in_class = self.class_code == code
+            for sort in SEARCH_SORTS:
+                order = self.orders[(None, sort)]
+                self.orders[(name, sort)] = order[in_class[order]]
+
+        # Negated riskScore along each risk order (ascending), for the minRisk cut
+        self.risk_keys = {
+            cls: -self.risk[self.orders[(cls, "risk")]]
+            for cls in (None,) + tuple(ML_CLASSES)
+        }
+
+    @property
+    def n_accounts(self):
+        return len(self.ids)
+
+    # --------------------------------------------------
+    # LOOKUPS
+    # --------------------------------------------------
+    def prefix_range(self, prefix):
+        """[lo, hi) positions of the accounts whose id starts with prefix."""
+        if not prefix:
+            return 0, self.n_accounts
+        lo = int(np.searchsorted(self.ids, prefix, side="left"))
+        end = prefix_end(prefix)
+        hi = self.n_accounts if end is None else int(np.searchsorted(self.ids, end, side="left"))
+        return lo, hi
+
+    def _top(self, cls, sort, lo, hi, min_risk, count):
+        """First count positions of one class (None = all) in sort order."""
+        order = self.orders[(cls, sort)]
+        in_range = lo > 0 or hi < self.n_accounts
+
+        if sort == "id":
+            # Positions are the id order, so the prefix range is a slice
+            order = order[np.searchsorted(order, lo):np.searchsorted(order, hi)]
+            in_range = False
+        elif in_range and hi - lo <= SCAN_BLOCK:
+            # Narrow prefix: rank just its accounts instead of scanning the order
+            candidates = np.arange(lo, hi, dtype=np.int64)
+            if cls is not None:
+                candidates = candidates[self.class_code[candidates] == ML_CLASSES.index(cls)]
+            order = candidates[np.argsort(-self.values[sort][candidates], kind="stable")]
+            in_range = False
+        elif sort == "risk" and min_risk is not None:
+            # Descending riskScore: accounts at or above minRisk are a prefix
+            order = order[:np.searchsorted(self.risk_keys[cls], -min_risk, side="right")]
+            min_risk = None
+
+        if not in_range and min_risk is None:
+            return order[:count]
+
+        def mask(chunk):
+            keep = np.ones(len(chunk), dtype=bool)
+            if in_range:
+                keep &= (chunk >= lo) & (chunk < hi)
+            if min_risk is not None:
+                keep &= self.risk[chunk] >= min_risk
+            return keep
+
+        return first_matches(order, mask, count)
+
+    def search(self, params):
+        """
+        /api/search payload: top accounts matching the id prefix and filters,
+        limit per page plus whether more exist.
+        """
+        limit = params["limit"]
+        sort = params["sort"]
+        lo, hi = self.prefix_range(params["q"])
+
+        classes = params["classes"] or [None]
+        picked = [self._top(cls, sort, lo, hi, params["minRisk"], limit + 1) for cls in classes]
+        positions = np.concatenate(picked)
+        if len(classes) > 1:
+            # Merge the per-class top-k lists into one order
+            if sort == "id":
+                positions = np.sort(positions)
+            else:
+                positions = positions[np.lexsort((positions, -self.values[sort][positions]))]
+
+        more = len(positions) > limit
+        return {
+            "results": self.result_dicts(positions[:limit]),
+            "more": bool(more),
+            "q": params["q"],
+            "sort": sort,
+            "limit": limit
+        }
+
+    def result_dicts(self, positions):
+        return [
+            {
+                "id": i,
+                "riskScore": round(r, 2),
+                "class": c,
+                "totalAmount": round(a, 2),
+                "txCount": t
+            }
+            for i, r, c, a, t in zip(
+                self.ids[positions].tolist(),
+                self.risk[positions].tolist(),
+                self.class_names[self.class_code[positions]].tolist(),
+                self.values["amount"][positions].tolist(),
+                self.values["txCount"][positions].tolist()
+            )
+        ]
+
+# ======================================================
+# LOADED-ONCE CACHE
+# ======================================================
+_index_lock = threading.Lock()
+_index_cache = {"signature": None, "index": None}
+
+
+def _signature(path):
+    resolved = columnar_path(path) or path
+    return resolved, os.path.getmtime(resolved)
+
+
+def load_search_index(accounts_path):
+    """Return the shared index, rebuilding it only when the accounts output changed."""
+    signature = _signature(accounts_path)
+    with _index_lock:
+        if _index_cache["signature"] != signature:
+            accounts = read_table(accounts_path, columns=SEARCH_COLUMNS).fillna(0)
+            _index_cache["index"] = AccountSearchIndex(accounts)
+            _index_cache["signature"] = signature
+            print(f"🔎 Search index built: {_index_cache['index'].n_accounts:,} accounts")
+        return _index_cache["index"]
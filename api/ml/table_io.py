@@ -0,0 +1,183 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Parquet support is optional: pyarrow is large, so serverless builds can
+# leave it out and everything falls back to CSV.
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+# ======================================================
+# CONFIG
+# ======================================================
+OUTPUT_FORMATS = ("csv", "parquet", "both")
+PARQUET_COMPRESSION = "zstd"
+
+# Declared column types for pipeline outputs, applied before writing so the
+# columnar files carry real types instead of whatever pandas inferred.
+TABLE_SCHEMAS = {
+    "final_accounts": {
+        "account_id": "string",
+        "total_amount": "float64",
+        "avg_amount": "float64",
+        "tx_count": "int64",
+        "avg_balance_diff": "float64",
+        "zero_balance_count": "int64",
+        "in_count": "int64",
+        "in_degree": "int64",
+        "out_degree": "int64",
+        "riskScore": "float64",
+        "class": "string",
+        "propagatedRisk": "float64",
+    },
+    "fraud_links": {
+        "src": "string",
+        "dst": "string",
+        "amount": "float64",
+        "step": "int64",
+        "fraudEdge": "int8",
+        "key": "int64",
+        "synthetic": "int8",
+    },
+    "fraud_rings": {
+        "ring_id": "int64",
+        "length": "int64",
+        "accounts": "string",
+        "first_step": "int64",
+        "last_step": "int64",
+        "total_amount": "float64",
+        "fraud_edges": "int64",
+        "scc_id": "int64",
+        "scc_size": "int64",
+        "avg_risk": "float64",
+    },
+    "account_transactions": {
+        "key": "int64",
+        "account_id": "string",
+        "amount": "float64",
+        "balance_diff": "float64",
+        "zero_balance": "int8",
+    },
+}
+
+# Columns hashed into the edge key of links written without one (generated
+# edges, and outputs from before real edges were keyed on their input row)
+EDGE_KEY_COLUMNS = ["src", "dst", "step", "amount"]
+
+# ======================================================
+# EDGE KEYS
+# ======================================================
+def add_edge_keys(links):
+    """64-bit key per transfer; keys the pipeline already wrote are kept."""
+    if "key" in links.columns:
+        return links
+    if links.empty:
+        return links.assign(key=pd.Series(dtype="int64"))
+    hashed = pd.util.hash_pandas_object(links[EDGE_KEY_COLUMNS], index=False)
+    return links.assign(key=hashed.to_numpy().view(np.int64))
+
+# ======================================================
+# WRITE
+# ======================================================
+def resolve_output_format(output_format):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    if output_format != "csv" and not HAS_PARQUET:
+        print("⚠️ pyarrow not installed, writing CSV only")
+        return "csv"
+    return output_format
+
+
+def apply_schema(df, name):
+    schema = TABLE_SCHEMAS.get(name, {})
+    dtypes = {col: dtype for col, dtype in schema.items() if col in df.columns}
+    return df.astype(dtypes)
+
+
+def write_table(df, out_dir, name, output_format="csv"):
+    """
+    Write a pipeline output as CSV, Parquet or both.
+
+    Returns the path callers should hand to readers: the CSV path whenever a
+    CSV is written (so existing clients keep working), else the Parquet path.
+    read_table() picks up the Parquet sibling of a CSV path on its own.
+    """
+    output_format = resolve_output_format(output_format)
+
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    parquet_path = os.path.join(out_dir, f"{name}.parquet")
+
+    # CSV goes first so the Parquet copy is never older than its sibling
+    if output_format in ("csv", "both"):
+        df.to_csv(csv_path, index=False)
+    elif os.path.exists(csv_path):
+        os.remove(csv_path)
+
+    if output_format in ("parquet", "both"):
+        apply_schema(df, name).to_parquet(
+            parquet_path, index=False, compression=PARQUET_COMPRESSION
+        )
+    elif os.path.exists(parquet_path):
+        # Don't leave a stale columnar copy next to fresh CSV output
+        os.remove(parquet_path)
+
+    return csv_path if output_format != "parquet" else parquet_path
+
+# ======================================================
+# READ
+# ======================================================
+def columnar_path(path):
+    """Parquet sibling of a CSV path, if one exists and is at least as fresh."""
+    if path.endswith(".parquet"):
+        return path if os.path.exists(path) else None
+
+    root, _ = os.path.splitext(path)
+    candidate = root + ".parquet"
+    if not os.path.exists(candidate):
+        return None
+    if os.path.exists(path) and os.path.getmtime(candidate) < os.path.getmtime(path):
+        return None
+    return candidate
+
+
+def table_exists(path):
+    return os.path.exists(path) or columnar_path(path) is not None
+
+
+FILTER_OPS = {
+    "==": lambda col, v: col == v,
+    "!=": lambda col, v: col != v,
+    ">": lambda col, v: col > v,
+    ">=": lambda col, v: col >= v,
+    "<": lambda col, v: col < v,
+    "<=": lambda col, v: col <= v,
+    "in": lambda col, v: col.isin(v),
+}
+
+
+def apply_filters(df, filters):
+    """CSV-side equivalent of pyarrow's conjunctive (column, op, value) filters."""
+    if not filters:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters:
+        mask &= FILTER_OPS[op](df[col], value).to_numpy()
+    return df[mask]
+
+
+def read_table(path, columns=None, filters=None):
+    """
+    Read a pipeline output, preferring the memory-mapped Parquet copy.
+
+    filters are pushed down to the Parquet reader (row-group statistics let
+    it skip data entirely); for CSV they are applied right after parsing.
+    """
+    parquet_path = columnar_path(path) if HAS_PARQUET else None
+    if parquet_path:
+        return pd.read_parquet(parquet_path, columns=columns, filters=filters, memory_map=True)
+    return apply_filters(pd.read_csv(path, usecols=columns), filters)
@@ -0,0 +1,205 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import uuid
+
+# zstd support is optional (zstandard wheel); gzip is in the stdlib
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# What a corrupt or truncated compressed upload raises while being read
+DECOMPRESS_ERRORS = (OSError, EOFError) + ((zstandard.ZstdError,) if HAS_ZSTD else ())
+
+# ======================================================
+# CONFIG
+# ======================================================
+CHUNK_BYTES = 1 << 20
+
+UPLOAD_SUFFIXES = (".csv", ".csv.gz", ".csv.zst", ".csv.zstd")
+
+CONTENT_PATH_PATTERN = re.compile(r"^([0-9a-f]{64})\.csv$")
+
+MANIFEST_NAME = "manifest.json"
+# The published run's manifest, next to its outputs in out_dir
+CURRENT_RUN_NAME = "current_run.json"
+
+
+class UnsupportedUpload(ValueError):
+    pass
+
+# ======================================================
+# STREAMING, CONTENT-ADDRESSED UPLOADS
+# ======================================================
+def decompressing_reader(stream, filename):
+    """Wrap the upload stream so reads yield plain CSV bytes."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if name.endswith((".zst", ".zstd")):
+        if not HAS_ZSTD:
+            raise UnsupportedUpload("zstd uploads need the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return stream
+
+
+def save_upload(stream, filename, upload_dir):
+    """
+    Stream an upload to disk in CHUNK_BYTES pieces while hashing it.
+
+    Compressed uploads are decompressed on the fly, and the hash covers the
+    decompressed CSV, so the same data always lands at <sha256>.csv
+    whatever compression it was sent with.
+    """
+    if not filename.lower().endswith(UPLOAD_SUFFIXES):
+        raise UnsupportedUpload(f"Only {', '.join(UPLOAD_SUFFIXES)} files allowed")
+
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = os.path.join(upload_dir, f".upload-{uuid.uuid4().hex}.tmp")
+
+    try:
+        reader = decompressing_reader(stream, filename)
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = reader.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception as e:
+        # Never leave a partial temp file behind, whatever went wrong
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if isinstance(e, DECOMPRESS_ERRORS):
+            raise UnsupportedUpload(f"Could not decompress upload: {e}")
+        raise
+
+    content_hash = digest.hexdigest()
+    path = os.path.join(upload_dir, f"{content_hash}.csv")
+    duplicate = os.path.exists(path)
+    if duplicate:
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+    return {"path": path, "contentHash": content_hash, "bytes": size, "duplicate": duplicate}
+
+
+def file_digest(path):
+    """Content hash of a stored upload; free for content-addressed paths."""
+    match = CONTENT_PATH_PATTERN.match(os.path.basename(path))
+    if match:
+        return match.group(1)
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ======================================================
+# PIPELINE RESULT CACHE
+# ======================================================
+def run_key(content_hash, options):
+    """Cache key of one pipeline run: input content + everything shaping its output."""
+    # Imported here: the pipeline module loads pandas/numpy
+    try:
+        from ml.fraud_data_pipeline import pipeline_config
+    except ImportError:
+        from fraud_data_pipeline import pipeline_config
+
+    config = dict(pipeline_config(options.get("config")),
+                  output_format=options.get("output_format", "csv"))
+    raw = json.dumps({"input": content_hash, "config": config}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_cached_run(run_dir):
+    """The recorded result of a finished run, if its outputs are still on disk."""
+    try:
+        with open(os.path.join(run_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    paths = [v for v in result.values() if isinstance(v, str)]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return result
+
+
+def record_run(run_dir, result):
+    path = os.path.join(run_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+
+def publish_outputs(run_dir, out_dir):
+    """
+    Make a run's outputs the current ones read by /api/graph and friends.
+
+    Files are hard-linked into out_dir and swapped in with os.replace, so
+    publishing is O(1) and readers never see a half-written file. CSVs go
+    before their Parquet siblings to keep the Parquet copy the fresher one.
+    """
+    try:
+        from ml.dashboard_stats import STATS_NAME
+    except ImportError:
+        from dashboard_stats import STATS_NAME
+
+    names = sorted(
+        (n for n in os.listdir(run_dir) if n != MANIFEST_NAME and not n.endswith(".tmp")),
+        key=lambda n: (n.endswith(".parquet"), n)
+    )
+    for name in names:
+        target = os.path.join(out_dir, name)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.link(os.path.join(run_dir, name), tmp_path)
+        os.replace(tmp_path, target)
+
+    # The run record goes last: its thresholds describe the outputs above
+    manifest = os.path.join(run_dir, MANIFEST_NAME)
+    if os.path.exists(manifest):
+        target = os.path.join(out_dir, CURRENT_RUN_NAME)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.link(manifest, tmp_path)
+        os.replace(tmp_path, target)
+
+    # Drop current outputs of a format this run did not produce
+    for name in ("final_accounts", "fraud_links", "fraud_rings", "account_transactions"):
+        for ext in (".csv", ".parquet"):
+            if name + ext not in names and os.path.exists(os.path.join(out_dir, name + ext)):
+                os.remove(os.path.join(out_dir, name + ext))
+
+    return {
+        "accounts": _primary(out_dir, "final_accounts", names),
+        "links": _primary(out_dir, "fraud_links", names),
+        "rings": _primary(out_dir, "fraud_rings", names),
+        "transactions": _primary(out_dir, "account_transactions", names),
+        "stats": os.path.join(out_dir, STATS_NAME)
+    }
+
+
+def load_current_run(out_dir):
+    """Run record of the published outputs in out_dir, or None."""
+    try:
+        with open(os.path.join(out_dir, CURRENT_RUN_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _primary(out_dir, name, names):
+    ext = ".csv" if f"{name}.csv" in names else ".parquet"
+    return os.path.join(out_dir, name + ext)
@@ -0,0 +1,303 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Rolling windows in input steps (PaySim: one step = one hour)
+WINDOWS = os.getenv("PIPELINE_VELOCITY_WINDOWS", "1,24")
+
+# "exact" keeps every distinct (sender, receiver) pair until the end of the
+# aggregation; "sketch" keeps a sparse HyperLogLog sketch per account
+# instead (approximate counts). A sketch never grows past 2 ** precision
+# registers, so it only saves memory on inputs whose hubs have many more
+# counterparties than that; for PaySim-like degrees exact is smaller.
+DISTINCT_MODES = ("exact", "sketch")
+DISTINCT_MODE = os.getenv("PIPELINE_DISTINCT_COUNTING", "exact")
+# 2 ** precision registers per account; relative error ~1.04 / sqrt(registers)
+SKETCH_PRECISION = int(os.getenv("PIPELINE_SKETCH_PRECISION", "8"))
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+# Weights in run_pipeline's composite z-score. A velocity weight is split
+# evenly across the windows, so adding windows does not shift the balance
+# against the other features.
+VELOCITY_WEIGHTS = {"velocity_count": 0.3, "velocity_amount": 0.2}
+FAN_WEIGHTS = {"in_count": 0.1, "in_degree": 0.3, "out_degree": 0.2}
+
+# Most hash bits used for the HyperLogLog rank (exact in float64 for frexp)
+RANK_BITS = 52
+
+def parse_windows(value):
+    """Sorted distinct window sizes from "1,24" or a list; ValueError if invalid."""
+    parts = value.split(",") if isinstance(value, str) else list(value)
+    try:
+        windows = sorted({int(str(p).strip()) for p in parts if str(p).strip()})
+    except ValueError:
+        raise ValueError(f"Invalid velocity windows: {value}")
+    if not windows or windows[0] < 1:
+        raise ValueError("velocity_windows needs at least one window of >= 1 step")
+    return windows
+
+def feature_weights(windows):
+    """Composite weight of every windowed / fan feature, in column order."""
+    weights = {}
+    for kind, weight in VELOCITY_WEIGHTS.items():
+        for w in windows:
+            weights[f"{kind}_{w}"] = weight / len(windows)
+    weights.update(FAN_WEIGHTS)
+    return weights
+
+# ======================================================
+# PARTIAL STATE (MERGEABLE)
+# ======================================================
+# A state holds "ids" (the account ids it has seen) plus frames whose
+# account / counterparty columns are positions in ids, so all grouping runs
+# on integers and each id string is hashed once per partial. Counts and
+# cents are integers and sketches merge by register maximum, so merged
+# states do not depend on how the input was split.
+#   name: (key columns, value columns, merge)
+STATE_FRAMES = {
+    # transfers sent per (sender, step)
+    "steps": (["account", "step"], ["tx_count", "amount_cents"], np.add),
+    # transfers received per receiver
+    "in_count": (["account"], ["in_count"], np.add),
+    # transfers per (sender, receiver)                              (exact)
+    "pairs": (["account", "counterparty"], ["transfers"], np.add),
+    # sender -> max HyperLogLog rank of its receivers' hashes       (sketch)
+    "out_sketch": (["account", "register"], ["rank"], np.maximum),
+    # receiver -> max HyperLogLog rank of its senders' hashes       (sketch)
+    "in_sketch": (["account", "register"], ["rank"], np.maximum),
+}
+ID_COLUMNS = ["account", "counterparty"]
+
+def reduce_rows(frame, name):
+    """
+    One row per key of a STATE_FRAMES frame, sorted by key: a single argsort
+    of the keys packed into one int64, then a reduceat over each run.
+    """
+    keys, values, ufunc = STATE_FRAMES[name]
+    if len(frame) == 0:
+        return frame[keys + values].reset_index(drop=True)
+
+    columns = [frame[k].to_numpy(dtype=np.int64) for k in keys]
+    packed = np.zeros(len(frame), dtype=np.int64)
+    for col in columns:
+        low = col.min()
+        packed = packed * (int(col.max() - low) + 1) + (col - low)
+    # Sums and maxima of integers do not depend on the order within a run
+    order = np.argsort(packed)
+    packed = packed[order]
+    starts = np.flatnonzero(np.concatenate([[True], packed[1:] != packed[:-1]]))
+
+    out = {k: col[order][starts] for k, col in zip(keys, columns)}
+    for v in values:
+        out[v] = ufunc.reduceat(frame[v].to_numpy()[order], starts)
+    return pd.DataFrame(out)
+
+def hll_registers(owners, hashes, precision):
+    """
+    Sparse HyperLogLog registers: (owner, register) -> max rank of the
+    members' 64-bit hashes. Only touched registers are kept, so an account
+    with few counterparties costs a few rows, never more than 2 ** precision.
+    """
+    register = (hashes & np.uint64((1 << precision) - 1)).astype(np.int64)
+    rank_bits = min(RANK_BITS, 64 - precision)
+    rest = (hashes >> np.uint64(precision)) & np.uint64((1 << rank_bits) - 1)
+    # frexp's exponent is the bit length; rank = leading zeros + 1
+    _, bits = np.frexp(rest.astype(np.float64))
+    rank = (rank_bits + 1 - bits).astype(np.int8)
+    return reduce_rows(pd.DataFrame({"account": owners, "register": register, "rank": rank}), "out_sketch")
+
+def partial_velocity(df, precision=None):
+    """
+    Velocity / fan state of one prepared frame (nameOrig, nameDest, step,
+    amount). precision None counts distinct counterparties exactly,
+    otherwise with 2 ** precision HyperLogLog registers per account.
+    """
+    n = len(df)
+    codes, ids = pd.factorize(pd.concat([df["nameOrig"], df["nameDest"]], ignore_index=True))
+    orig, dest = codes[:n], codes[n:]
+    ones = np.ones(n, dtype=np.int64)
+    received = np.bincount(dest, minlength=len(ids))
+    receivers = np.flatnonzero(received)
+
+    state = {
+        "ids": pd.Series(ids),
+        "steps": reduce_rows(pd.DataFrame({
+            "account": orig,
+            "step": df["step"].to_numpy(dtype=np.int64),
+            "tx_count": ones,
+            "amount_cents": np.round(df["amount"].to_numpy(dtype=np.float64) * 100).astype(np.int64)
+        }), "steps"),
+        "in_count": pd.DataFrame({"account": receivers, "in_count": received[receivers]})
+    }
+    if precision is None:
+        state["pairs"] = reduce_rows(
+            pd.DataFrame({"account": orig, "counterparty": dest, "transfers": ones}), "pairs"
+        )
+    else:
+        hashes = pd.util.hash_pandas_object(state["ids"], index=False).to_numpy()
+        state["out_sketch"] = hll_registers(orig, hashes[dest], precision)
+        state["in_sketch"] = hll_registers(dest, hashes[orig], precision)
+    return state
+
+def _recode(frame, mapping):
+    return frame.assign(**{c: mapping[frame[c].to_numpy()] for c in ID_COLUMNS if c in frame})
+
+def merge_velocity(partials):
+    if len(partials) == 1:
+        return partials[0]
+    # One factorize over every partial's ids maps them all to merged positions
+    codes, ids = pd.factorize(pd.concat([p["ids"] for p in partials], ignore_index=True))
+    bounds = np.cumsum([0] + [len(p["ids"]) for p in partials])
+
+    merged = {"ids": pd.Series(ids)}
+    for name in partials[0]:
+        if name == "ids":
+            continue
+        merged[name] = reduce_rows(pd.concat([
+            _recode(p[name], codes[bounds[i]:bounds[i + 1]]) for i, p in enumerate(partials)
+        ], ignore_index=True), name)
+    return merged
+
+def partition_velocity(state, groups, buckets):
+    """
+    Split a state into hash partitions of account ids, as parallel_agg
+    spills the account partials (buckets(ids) -> bucket number per id).
+    A pair goes to the partitions of both its sender and its receiver;
+    each partition keeps only the ids it refers to.
+    """
+    group = buckets(state["ids"]) % groups
+    parts = []
+    for g in range(groups):
+        part = {}
+        for name, frame in state.items():
+            if name == "ids":
+                continue
+            mask = group[frame["account"].to_numpy()] == g
+            if "counterparty" in frame:
+                mask |= group[frame["counterparty"].to_numpy()] == g
+            part[name] = frame[mask]
+
+        used = np.unique(np.concatenate(
+            [f[c].to_numpy() for f in part.values() for c in ID_COLUMNS if c in f]
+        ))
+        mapping = np.full(len(group), -1, dtype=np.int64)
+        mapping[used] = np.arange(len(used))
+        part = {name: _recode(frame, mapping).reset_index(drop=True) for name, frame in part.items()}
+        part["ids"] = state["ids"].iloc[used].reset_index(drop=True)
+        parts.append(part)
+    return parts
+
+# ======================================================
+# FEATURES
+# ======================================================
+def id_positions(account_ids, ids):
+    """
+    Position of each of ids in the unique account_ids (-1 if absent), from
+    one factorize over both: accounts come first, so their codes are their
+    positions.
+    """
+    accounts = pd.Series(account_ids).reset_index(drop=True)
+    codes, _ = pd.factorize(pd.concat([accounts, ids], ignore_index=True))
+    positions = codes[len(accounts):]
+    return np.where(positions < len(accounts), positions, -1)
+
+def window_peaks(acc, step, columns, windows, n):
+    """
+    Per value column, account and window w, the largest sum over w
+    consecutive steps (rows are unique (account, step) pairs, any order).
+    One sort of a packed (account, step) key, then one binary search per
+    window, so the cost is O(rows log rows) whatever the account sizes.
+    Returns an array (window, account) per column.
+    """
+    peaks = [np.zeros((len(windows), n), dtype=np.int64) for _ in columns]
+    if len(acc) == 0:
+        return peaks
+    step = step - step.min()
+    # Gap between accounts wider than any window keeps windows inside one account
+    span = int(step.max()) + max(windows) + 1
+    key = acc * span + step
+    order = np.argsort(key)
+    key, acc = key[order], acc[order]
+    starts = np.flatnonzero(np.concatenate([[True], acc[1:] != acc[:-1]]))
+    end = np.arange(1, len(key) + 1)
+    cumsums = [np.concatenate([[0], np.cumsum(col[order])]) for col in columns]
+
+    for i, w in enumerate(windows):
+        # Sum over steps (s - w, s] ending at each observed step; a window's
+        # maximum is always reached at one ending on a transaction
+        left = np.searchsorted(key, key - (w - 1), side="left")
+        for peak, cumsum in zip(peaks, cumsums):
+            peak[i, acc[starts]] = np.maximum.reduceat(cumsum[end] - cumsum[left], starts)
+    return peaks
+
+def hll_estimate(sketch, positions, n, precision):
+    """Distinct-count estimate per account from sparse registers."""
+    m = 1 << precision
+    pos = positions[sketch["account"].to_numpy()]
+    known = pos >= 0
+    pos = pos[known]
+    rank = sketch["rank"].to_numpy(dtype=np.float64)[known]
+
+    present = np.bincount(pos, minlength=n)
+    zeros = m - present
+    harmonic = np.bincount(pos, weights=2.0 ** -rank, minlength=n) + zeros
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / harmonic
+    # Linear counting while registers are still empty (small accounts)
+    small = (raw <= 2.5 * m) & (zeros > 0)
+    estimate = np.where(small, m * np.log(m / np.maximum(zeros, 1)), raw)
+    return np.where(present > 0, np.round(estimate), 0).astype(np.int64)
+
+def velocity_features(state, account_ids, windows, precision=None):
+    """
+    Windowed velocity and fan-in / fan-out features for account_ids (unique),
+    one row per id in the same order:
+      velocity_count_<w> / velocity_amount_<w>  peak transfers / amount sent
+                                                in any w consecutive steps
+      in_count                                  transfers received
+      in_degree / out_degree                    distinct senders / receivers
+    Transfers sent (fan-out count) are the lifetime tx_count aggregate.
+    state None (no transactions) gives all-zero features.
+    """
+    n = len(account_ids)
+    if state is None:
+        return pd.DataFrame({name: np.zeros(n, dtype=np.int64) for name in feature_weights(windows)})
+    positions = id_positions(account_ids, state["ids"])
+    features = {}
+
+    steps = state["steps"]
+    acc = positions[steps["account"].to_numpy()]
+    known = acc >= 0
+    acc = acc[known]
+    counts, cents = window_peaks(
+        acc, steps["step"].to_numpy(dtype=np.int64)[known],
+        [steps[c].to_numpy(dtype=np.int64)[known] for c in ("tx_count", "amount_cents")],
+        windows, n
+    )
+    for i, w in enumerate(windows):
+        features[f"velocity_count_{w}"] = counts[i]
+    for i, w in enumerate(windows):
+        features[f"velocity_amount_{w}"] = cents[i] / 100
+
+    received = state["in_count"]
+    receiver = positions[received["account"].to_numpy()]
+    features["in_count"] = np.bincount(
+        receiver[receiver >= 0], weights=received["in_count"].to_numpy()[receiver >= 0], minlength=n
+    ).astype(np.int64)
+
+    if precision is None:
+        pairs = state["pairs"]
+        sender = positions[pairs["account"].to_numpy()]
+        receiver = positions[pairs["counterparty"].to_numpy()]
+        features["in_degree"] = np.bincount(receiver[receiver >= 0], minlength=n)
+        features["out_degree"] = np.bincount(sender[sender >= 0], minlength=n)
+    else:
+        features["in_degree"] = hll_estimate(state["in_sketch"], positions, n, precision)
+        features["out_degree"] = hll_estimate(state["out_sketch"], positions, n, precision)
+
+    return pd.DataFrame(features)
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+# Never reach the Neo4j instance configured in api/.env from the test suite;
+# app.py's load_dotenv() does not override variables that are already set
+os.environ["NEO4J_URI"] = "bolt://127.0.0.1:1"
+# app.py keeps uploads, runs and published outputs under the temp dir
+os.environ["TMPDIR"] = tempfile.mkdtemp(prefix="nexus-tests-")
+tempfile.tempdir = None
+
+FIXTURE_CSV = os.path.join(API_DIR, "uploads", "transactions_small.csv")
+
+PAYSIM_COLUMNS = [
+    "step", "type", "amount", "nameOrig", "oldbalanceOrg", "newbalanceOrig",
+    "nameDest", "oldbalanceDest", "newbalanceDest", "isFraud", "isFlaggedFraud"
+]
+
+
+def make_transactions(n_rows, n_accounts=60, seed=0):
+    """PaySim-style transfers between a small account population, so real edges exist."""
+    rng = np.random.default_rng(seed)
+    old_balance = rng.uniform(0, 5e4, n_rows).round(2)
+    amount = rng.lognormal(6, 1.5, n_rows).round(2)
+    return pd.DataFrame({
+        "step": rng.integers(1, 200, n_rows),
+        "type": rng.choice(["TRANSFER", "CASH_OUT", "PAYMENT"], n_rows),
+        "amount": amount,
+        "nameOrig": [f"C{i}" for i in rng.integers(0, n_accounts, n_rows)],
+        "oldbalanceOrg": old_balance,
+        "newbalanceOrig": np.maximum(old_balance - amount, 0).round(2),
+        "nameDest": [f"C{i}" for i in rng.integers(0, n_accounts, n_rows)],
+        "oldbalanceDest": 0.0,
+        "newbalanceDest": 0.0,
+        "isFraud": (rng.random(n_rows) < 0.05).astype(int),
+        "isFlaggedFraud": 0
+    }, columns=PAYSIM_COLUMNS)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Flask test client; app.py is imported only by the tests that need it."""
+    import app as nexus_app
+    nexus_app.app.config["TESTING"] = True
+    return nexus_app.app.test_client()
+
+
+@pytest.fixture
+def fixture_csv():
+    return FIXTURE_CSV
+
+
+@pytest.fixture
+def transactions_csv(tmp_path):
+    """Write make_transactions() output to a CSV under tmp_path and return its path."""
+    def write(df, name="transactions.csv"):
+        path = str(tmp_path / name)
+        df.to_csv(path, index=False)
+        return path
+    return write
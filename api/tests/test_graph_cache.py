@@ -0,0 +1,145 @@
+import gzip
+import json
+
+import pytest
+
+from ml import graph_cache
+from ml.graph_cache import GraphVersion, ResponseCache, make_etag
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(graph_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_hit_miss_and_version_keyed_invalidation(clock):
+    cache = ResponseCache(max_entries=8, ttl=30)
+    assert cache.get(1, "limit=5") is None
+
+    entry = cache.put(1, "limit=5", b'{"a":1}')
+    assert entry["etag"] == make_etag(b'{"a":1}')
+    assert cache.get(1, "limit=5") is entry
+    # A new graph version never sees entries cached for the old one
+    assert cache.get(2, "limit=5") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hitRatio"] == round(1 / 3, 4)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_entries=8, ttl=30)
+    cache.put(1, "k", b"body")
+    clock.now += 30
+    assert cache.get(1, "k") is not None
+    clock.now += 0.5
+    assert cache.get(1, "k") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2, ttl=30)
+    cache.put(1, "a", b"a")
+    cache.put(1, "b", b"b")
+    cache.get(1, "a")
+    cache.put(1, "c", b"c")
+
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "a") is not None
+    assert cache.get(1, "c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_graph_version_bump_is_persisted(tmp_path):
+    version = GraphVersion(str(tmp_path))
+    assert version.current() == 0
+    assert version.bump() == 1
+    assert version.bump() == 2
+    # Other workers read the same file
+    assert GraphVersion(str(tmp_path)).current() == 2
+
+# ======================================================
+# /api/graph CONDITIONAL RESPONSES
+# ======================================================
+@pytest.fixture
+def graph_app(monkeypatch, tmp_path, client):
+    """app.py with a private version file, an empty cache and a canned graph payload."""
+    import app as nexus_app
+
+    calls = []
+
+    def build_graph_payload(params):
+        calls.append(params)
+        nodes = [{"id": f"C{i}", "riskScore": 50.0, "mlClass": "NORMAL"} for i in range(100)]
+        links = [{"source": f"C{i}", "target": f"C{i + 1}", "amount": 10.0, "step": i, "fraud": 0}
+                 for i in range(99)]
+        return {"nodes": nodes, "links": links, "nextCursor": None, "build": len(calls)}, 200
+
+    monkeypatch.setattr(nexus_app, "build_graph_payload", build_graph_payload)
+    monkeypatch.setattr(nexus_app, "graph_version", GraphVersion(str(tmp_path)))
+    monkeypatch.setattr(nexus_app, "graph_cache", ResponseCache(max_entries=8, ttl=300))
+    return nexus_app, calls
+
+
+def test_unchanged_graph_revalidates_with_304(client, graph_app):
+    nexus_app, calls = graph_app
+    first = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert "Accept-Encoding" in first.headers["Vary"]
+    etag = first.headers["ETag"].strip('"')
+    assert etag == make_etag(first.data)
+
+    again = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "identity", "If-None-Match": f'"{etag}"'})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert len(calls) == 1
+    assert nexus_app.graph_cache.stats()["notModified"] == 1
+
+    stale = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert stale.status_code == 200
+    assert stale.data == first.data
+
+
+def test_each_encoding_has_its_own_etag(client, graph_app):
+    _, calls = graph_app
+    plain = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "gzip"})
+
+    assert zipped.status_code == 200
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.data) == plain.data
+    assert zipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert len(calls) == 1
+
+    # A gzip ETag does not validate an identity response, and vice versa
+    crossed = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "identity", "If-None-Match": zipped.headers["ETag"]})
+    assert crossed.status_code == 200
+    matched = client.get("/api/graph?limit=5", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]})
+    assert matched.status_code == 304
+
+
+def test_version_bump_invalidates_cached_graph(client, graph_app):
+    nexus_app, calls = graph_app
+    headers = {"Accept-Encoding": "identity"}
+    first = client.get("/api/graph?limit=5", headers=headers)
+    assert json.loads(first.data)["build"] == 1
+
+    nexus_app.graph_version.bump()
+    after = client.get("/api/graph?limit=5", headers=dict(headers, **{"If-None-Match": first.headers["ETag"]}))
+    assert after.status_code == 200
+    assert json.loads(after.data)["build"] == 2
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert len(calls) == 2
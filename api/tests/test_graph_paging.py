@@ -0,0 +1,85 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import graph_index
+from ml.graph_index import GraphStore
+from ml.graph_query import ML_CLASSES, parse_graph_params
+
+
+def make_store(n_accounts=400, n_links=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    ids = [f"C{i}" for i in range(n_accounts)]
+    accounts = pd.DataFrame({
+        "account_id": ids,
+        "riskScore": rng.uniform(0, 100, n_accounts).round(2),
+        "class": rng.choice(ML_CLASSES, n_accounts)
+    })
+    links = pd.DataFrame({
+        "src": rng.choice(ids, n_links),
+        "dst": rng.choice(ids, n_links),
+        "amount": rng.uniform(1, 1000, n_links).round(2),
+        # Few distinct steps, so many pages break inside a run of equal steps
+        "step": rng.integers(1, 20, n_links),
+        "fraudEdge": (rng.random(n_links) < 0.2).astype(int)
+    }).drop_duplicates(["src", "dst", "amount", "step"])
+    return accounts, links, GraphStore(accounts, links)
+
+
+def expected_edges(accounts, links, args):
+    """The filtered edge multiset, computed with pandas rather than the store."""
+    node = accounts.set_index("account_id")
+    src, dst = node.loc[links["src"]], node.loc[links["dst"]]
+    keep = np.ones(len(links), dtype=bool)
+    if args.get("fraudOnly"):
+        keep &= links["fraudEdge"].to_numpy() == 1
+    if "stepMin" in args:
+        keep &= links["step"].to_numpy() >= args["stepMin"]
+    if "stepMax" in args:
+        keep &= links["step"].to_numpy() <= args["stepMax"]
+    if "amountMin" in args:
+        keep &= links["amount"].to_numpy() >= args["amountMin"]
+    if "minRisk" in args:
+        keep &= (src["riskScore"].to_numpy() >= args["minRisk"]) | (dst["riskScore"].to_numpy() >= args["minRisk"])
+    if "mlClass" in args:
+        wanted = args["mlClass"].split(",")
+        keep &= src["class"].isin(wanted).to_numpy() | dst["class"].isin(wanted).to_numpy()
+    rows = links[keep]
+    return Counter(zip(rows["src"], rows["dst"], rows["amount"], rows["step"], rows["fraudEdge"]))
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"fraudOnly": "true"},
+    {"stepMin": 4, "stepMax": 11},
+    {"minRisk": 60, "amountMin": 250},
+    {"mlClass": "FRAUD,AT_RISK", "stepMin": 3},
+])
+@pytest.mark.parametrize("limit", [1, 37, 500])
+def test_cursor_walk_visits_each_edge_once(monkeypatch, args, limit):
+    # Small scan blocks so pages also end at block boundaries
+    monkeypatch.setattr(graph_index, "SCAN_BLOCK", 64)
+    accounts, links, store = make_store()
+
+    seen = Counter()
+    cursor = None
+    pages = 0
+    while True:
+        query = dict(args, limit=limit)
+        if cursor:
+            query["cursor"] = cursor
+        page = store.graph_page(parse_graph_params(query))
+        assert len(page["links"]) <= limit
+        seen.update((l["source"], l["target"], l["amount"], l["step"], l["fraud"]) for l in page["links"])
+        pages += 1
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+        assert pages <= len(links)
+
+    expected = expected_edges(accounts, links, args)
+    assert expected
+    assert seen == expected
+    assert max(seen.values(), default=1) == 1
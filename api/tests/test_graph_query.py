@@ -0,0 +1,42 @@
+import pytest
+
+from ml.graph_query import (
+    GraphQueryError, parse_graph_params, parse_neighborhood_params,
+    parse_ring_params, parse_search_params,
+    DEFAULT_LIMIT, MAX_LIMIT, DEFAULT_HOPS, MAX_HOPS, DEFAULT_RING_LIMIT, DEFAULT_SEARCH_LIMIT
+)
+
+
+@pytest.mark.parametrize("parse, args", [
+    (parse_graph_params, {"limit": "0"}),
+    (parse_graph_params, {"limit": "-5"}),
+    (parse_neighborhood_params, {"hops": "0"}),
+    (parse_neighborhood_params, {"limit": "0"}),
+    (parse_ring_params, {"limit": "0"}),
+    (parse_ring_params, {"offset": "-1"}),
+    (parse_search_params, {"limit": "0"}),
+    (parse_search_params, {"limit": "ten"}),
+])
+def test_explicit_bad_counts_are_rejected(parse, args):
+    with pytest.raises(GraphQueryError):
+        parse(args)
+
+
+def test_absent_counts_use_defaults_and_large_ones_clamp():
+    assert parse_graph_params({})["limit"] == DEFAULT_LIMIT
+    assert parse_graph_params({"limit": str(MAX_LIMIT * 10)})["limit"] == MAX_LIMIT
+    assert parse_neighborhood_params({})["hops"] == DEFAULT_HOPS
+    assert parse_neighborhood_params({"hops": "99"})["hops"] == MAX_HOPS
+    assert parse_ring_params({})["limit"] == DEFAULT_RING_LIMIT
+    assert parse_ring_params({"offset": "0"})["offset"] == 0
+    assert parse_search_params({})["limit"] == DEFAULT_SEARCH_LIMIT
+
+
+@pytest.mark.parametrize("url", [
+    "/api/graph?limit=0",
+    "/api/rings?limit=0",
+    "/api/search?limit=0",
+    "/api/account/C1/neighborhood?hops=0",
+])
+def test_routes_answer_400(client, url):
+    assert client.get(url).status_code == 400
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.graph_codec import to_columnar
+from ml.graph_index import GraphStore
+from ml.graph_query import parse_graph_params
+from test_graph_paging import make_store
+
+
+def tiny_store():
+    accounts = pd.DataFrame({
+        "account_id": ["A", "B", "C", "D"],
+        "riskScore": [90.0, 10.0, 20.0, 75.0],
+        "class": ["FRAUD", "NORMAL", "NORMAL", "AT_RISK"]
+    })
+    links = pd.DataFrame({
+        "src": ["A", "B", "C", "B"],
+        "dst": ["B", "C", "D", "B"],
+        "amount": [100.0, 200.0, 300.0, 50.0],
+        "step": [1, 2, 3, 4],
+        "fraudEdge": [1, 0, 0, 0]
+    })
+    return GraphStore(accounts, links)
+
+
+def page_pairs(store, args):
+    page = store.graph_page(parse_graph_params(dict(args, limit=100)))
+    return [(l["source"], l["target"]) for l in page["links"]]
+
+
+@pytest.mark.parametrize("args, expected", [
+    # A->B qualifies through its source, C->D through its target
+    ({"minRisk": 70}, [("A", "B"), ("C", "D")]),
+    ({"minRisk": 95}, []),
+    ({"mlClass": "FRAUD"}, [("A", "B")]),
+    ({"mlClass": "AT_RISK,FRAUD"}, [("A", "B"), ("C", "D")]),
+    ({"mlClass": "NORMAL"}, [("A", "B"), ("B", "C"), ("C", "D"), ("B", "B")]),
+    ({"minRisk": 15, "mlClass": "NORMAL"}, [("A", "B"), ("B", "C"), ("C", "D")]),
+])
+def test_node_filters_match_either_end(args, expected):
+    assert page_pairs(tiny_store(), args) == expected
+
+
+def test_links_to_accounts_outside_the_table_default_to_normal():
+    accounts = pd.DataFrame({"account_id": ["A"], "riskScore": [80.0], "class": ["FRAUD"]})
+    links = pd.DataFrame({"src": ["X"], "dst": ["Y"], "amount": [5.0], "step": [1], "fraudEdge": [0]})
+    store = GraphStore(accounts, links)
+
+    assert page_pairs(store, {"mlClass": "NORMAL"}) == [("X", "Y")]
+    assert page_pairs(store, {"minRisk": 1}) == []
+    assert store.account(store.code("X")) is None
+
+
+@pytest.mark.parametrize("args", [
+    {"limit": 50},
+    {"limit": 500, "minRisk": 40},
+    {"limit": 20, "mlClass": "FRAUD", "fraudOnly": "true"},
+    {"limit": 10, "stepMin": 30},
+])
+def test_columnar_page_matches_object_page(args):
+    _, _, store = make_store()
+    objects = store.graph_page(parse_graph_params(args))
+    columnar = store.graph_page(parse_graph_params(dict(args, format="columnar")))
+
+    assert columnar["format"] == "columnar"
+    assert columnar["nextCursor"] == objects["nextCursor"]
+    expected = to_columnar(objects)
+    for part in ("nodes", "links"):
+        assert set(columnar[part]) == set(expected[part])
+        for field, values in expected[part].items():
+            assert np.asarray(columnar[part][field]).tolist() == values, (part, field)
+
+
+def test_columnar_links_index_into_nodes():
+    _, links, store = make_store()
+    page = store.graph_page(parse_graph_params({"limit": 300, "format": "columnar"}))
+    ids = np.asarray(page["nodes"]["id"])
+    source = np.asarray(page["links"]["source"])
+    target = np.asarray(page["links"]["target"])
+
+    # Each endpoint is listed once and every link resolves to one of them
+    assert len(set(ids.tolist())) == len(ids)
+    assert len(source) == len(target) == 300
+    assert source.min() >= 0 and target.min() >= 0
+    assert max(source.max(), target.max()) == len(ids) - 1
+    assert set(ids[source].tolist()) | set(ids[target].tolist()) == set(ids.tolist())
+    pairs = set(zip(links["src"], links["dst"]))
+    assert all(p in pairs for p in zip(ids[source].tolist(), ids[target].tolist()))
+
+
+def test_neighborhood_depths_and_edge_cap():
+    store = tiny_store()
+    hood = store.neighborhood("A", hops=2, limit=100, fanout=10)
+    assert hood["account"]["account_id"] == "A"
+    assert {n["id"]: n["depth"] for n in hood["nodes"]} == {"A": 0, "B": 1, "C": 2}
+    assert not hood["truncated"]
+
+    capped = store.neighborhood("A", hops=3, limit=2, fanout=10)
+    assert len(capped["links"]) == 2
+    assert capped["truncated"]
+    assert store.neighborhood("missing", hops=1, limit=10, fanout=10) is None
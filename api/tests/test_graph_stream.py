@@ -0,0 +1,8 @@
+import app as nexus_app
+
+
+def test_stream_disabled_returns_204(client, monkeypatch):
+    monkeypatch.setattr(nexus_app, "GRAPH_STREAM_ENABLED", False)
+    response = client.get("/api/graph/stream")
+    assert response.status_code == 204
+    assert response.data == b""
@@ -0,0 +1,151 @@
+import filecmp
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_transactions
+from ml.fraud_data_pipeline import (
+    run_pipeline, prepare_transactions, transaction_keys, OccurrenceCounter
+)
+from ml.table_io import read_table
+
+FULL = {"sample_mode": "full"}
+
+
+def run(csv_path, out_dir):
+    result = run_pipeline(csv_path, out_dir=str(out_dir), config=FULL)
+    return read_table(result["links"]), read_table(result["transactions"]), read_table(result["accounts"])
+
+
+def test_transaction_keys_ignore_row_position():
+    df = prepare_transactions(make_transactions(300))
+    keys = pd.Series(transaction_keys(df), index=df.index)
+
+    shuffled = df.sample(frac=1, random_state=1)
+    assert (transaction_keys(shuffled) == keys[shuffled.index].to_numpy()).all()
+    assert (transaction_keys(df.iloc[100:]) == keys.iloc[100:].to_numpy()).all()
+
+
+def test_overlapping_uploads_keep_real_edge_and_ledger_keys(tmp_path, transactions_csv):
+    df = make_transactions(2000)
+    first = transactions_csv(df.iloc[:1200], "first.csv")
+    both = transactions_csv(df, "both.csv")
+
+    links_a, ledger_a, _ = run(first, tmp_path / "a")
+    links_ab, ledger_ab, accounts_ab = run(both, tmp_path / "ab")
+
+    real_a = links_a[links_a["synthetic"] == 0]
+    real_ab = links_ab[links_ab["synthetic"] == 0]
+    assert len(real_a) > 0
+    # Step is the per-run edge counter and differs between the runs; the key does not
+    assert set(real_a["key"]) <= set(real_ab["key"])
+    assert set(ledger_a["key"]) <= set(ledger_ab["key"])
+
+    # Rows of the second upload not in the first are exactly the new tail
+    new_rows = ledger_ab[~ledger_ab["key"].isin(ledger_a["key"])]
+    assert len(new_rows) == len(ledger_ab) - len(ledger_a)
+    assert len(ledger_ab) == len(df)
+    assert accounts_ab["tx_count"].sum() == len(ledger_ab)
+
+    synthetic = links_ab[links_ab["synthetic"] == 1]
+    assert len(synthetic) > 0
+    assert not synthetic["key"].isin(real_ab["key"]).any()
+
+
+def test_occurrence_counter_matches_a_single_pass():
+    rng = np.random.default_rng(5)
+    hashes = rng.integers(0, 50, 3000).astype(np.int64)
+    counter = OccurrenceCounter()
+    totals = []
+    for part in np.array_split(hashes, 37):
+        # Earlier chunks from the counter plus the ordinal within this chunk
+        totals.append(counter.seen(part) + pd.Series(part).groupby(part).cumcount().to_numpy())
+        counter.add(part)
+
+    expected = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    assert (np.concatenate(totals) == expected).all()
+    assert len(counter.runs) <= 2 * int(np.log2(37) + 1)
+
+
+def with_repeats(df):
+    """df with some rows repeated verbatim, one copy far from the original."""
+    return pd.concat([df, df.iloc[[3, 3, 10, 400]]], ignore_index=True)
+
+
+def test_repeated_rows_get_distinct_keys_in_every_mode(tmp_path, transactions_csv):
+    df = with_repeats(make_transactions(1500))
+    path = transactions_csv(df)
+
+    in_memory = run_pipeline(path, out_dir=str(tmp_path / "mem"), config=FULL, output_format="csv")
+    chunked = run_pipeline(path, out_dir=str(tmp_path / "chunk"), config=FULL, output_format="csv",
+                           chunksize=100)
+    for name in ("transactions", "links"):
+        assert filecmp.cmp(in_memory[name], chunked[name], shallow=False), name
+
+    ledger = read_table(in_memory["transactions"])
+    accounts = read_table(in_memory["accounts"])
+    # Every repeated row is its own ledger entry, as the aggregates count it
+    assert ledger["key"].is_unique
+    assert len(ledger) == accounts["tx_count"].sum() == len(df)
+
+
+def test_repeats_match_across_overlapping_uploads(tmp_path, transactions_csv):
+    df = make_transactions(1200)
+    first = transactions_csv(pd.concat([df, df.iloc[[7]]], ignore_index=True), "first.csv")
+    both = transactions_csv(pd.concat([df, df.iloc[[7, 7]]], ignore_index=True), "both.csv")
+
+    _, ledger_a, _ = run(first, tmp_path / "a")
+    _, ledger_ab, _ = run(both, tmp_path / "ab")
+    # The second upload holds one more copy of row 7: exactly one new key
+    assert set(ledger_a["key"]) <= set(ledger_ab["key"])
+    assert len(set(ledger_ab["key"]) - set(ledger_a["key"])) == 1
+
+
+# ======================================================
+# NEO4J (opt-in)
+# ======================================================
+# Runs against a scratch database only: the graph is wiped first.
+NEO4J_TEST_URI = os.getenv("NEO4J_TEST_URI")
+
+
+@pytest.mark.skipif(not NEO4J_TEST_URI, reason="NEO4J_TEST_URI not set")
+def test_overlapping_incremental_ingests_count_each_transfer_once(tmp_path, transactions_csv):
+    from neo4j import GraphDatabase
+    from ml.neo4j_loader import bulk_load, reset_graph
+
+    database = os.getenv("NEO4J_TEST_DB", "neo4j")
+    driver = GraphDatabase.driver(
+        NEO4J_TEST_URI,
+        auth=(os.getenv("NEO4J_TEST_USER", "neo4j"), os.getenv("NEO4J_TEST_PASSWORD", ""))
+    )
+
+    df = make_transactions(2000)
+    uploads = [
+        transactions_csv(df.iloc[:1200], "first.csv"),
+        transactions_csv(df.iloc[800:], "second.csv"),
+    ]
+
+    try:
+        reset_graph(driver, database)
+        real_keys = set()
+        for i, path in enumerate(uploads):
+            links, ledger, accounts = run(path, tmp_path / str(i))
+            real_keys |= set(links.loc[links["synthetic"] == 0, "key"])
+            # Sent twice: the second attempt must be a no-op for aggregates
+            for _ in range(2):
+                bulk_load(driver, database, accounts.fillna(0), links.fillna(0),
+                          mode="incremental", transactions=ledger)
+
+        with driver.session(database=database) as session:
+            tx_count = session.run("MATCH (a:Account) RETURN sum(a.tx_count) AS n").single()["n"]
+            edges = session.run("MATCH ()-[t:TRANSFERRED_TO]->() RETURN count(t) AS n").single()["n"]
+            total = session.run("MATCH (a:Account) RETURN sum(a.total_amount) AS s").single()["s"]
+
+        assert tx_count == len(df)
+        assert edges == len(real_keys)
+        assert total == pytest.approx(df["amount"].sum(), rel=1e-9)
+    finally:
+        reset_graph(driver, database)
+        driver.close()
@@ -0,0 +1,99 @@
+import os
+
+from ml.fraud_data_pipeline import run_pipeline, FRAUD_THRESHOLD
+from ml.online_scoring import OnlineScorer, SCORE_MODEL
+from ml.table_io import read_table
+from ml.uploads import record_run, publish_outputs, load_current_run
+
+SCORE_ACCOUNT_COLUMNS = ["account_id", "total_amount", "tx_count", "avg_balance_diff", "zero_balance_count"]
+
+
+def seeded_scorer(fixture_csv, out_dir):
+    result = run_pipeline(fixture_csv, out_dir=str(out_dir), config={"sample_mode": "full"})
+    accounts = read_table(result["accounts"], columns=SCORE_ACCOUNT_COLUMNS).fillna(0)
+    scorer = OnlineScorer(80, 40)
+    scorer.bootstrap(accounts.to_dict("records"))
+    return scorer
+
+
+def transfer(account, amount):
+    return {"nameOrig": account, "amount": amount, "oldbalanceOrg": 5000, "newbalanceOrig": 5000 - amount}
+
+
+def test_repeat_sender_is_not_an_outlier(fixture_csv, tmp_path):
+    # Every fixture account sent once, so tx_count has std 0 at bootstrap
+    scorer = seeded_scorer(fixture_csv, tmp_path)
+    assert scorer.baseline[1][scorer.score_features.index("tx_count")] == 0
+
+    before = scorer.raw_score(scorer.features(scorer.accounts["C330337392"]))
+    result = scorer.score([transfer("C330337392", 1000)])[0]
+    assert result["txCount"] == 2
+    assert result["class"] == "NORMAL"
+    assert abs(result["riskScore"] - scorer.risk_score(before)) < 5
+
+    new = scorer.score([transfer("X1", 5), transfer("X1", 7)])
+    assert [r["class"] for r in new] == ["NORMAL", "NORMAL"]
+
+
+def test_scale_is_frozen_and_clamped(fixture_csv, tmp_path):
+    scorer = seeded_scorer(fixture_csv, tmp_path)
+    raw_range = (scorer.raw_min, scorer.raw_max)
+    probe = scorer.accounts["C330337392"]
+    baseline_score = scorer.risk_score(scorer.raw_score(scorer.features(probe)))
+
+    huge = scorer.score([transfer("WHALE", 1e9)] * 3)
+    assert all(0 <= r["riskScore"] <= 100 for r in huge)
+    assert huge[-1]["riskScore"] == 100
+    assert (scorer.raw_min, scorer.raw_max) == raw_range
+    # Other accounts keep their score whatever traffic came in
+    assert scorer.risk_score(scorer.raw_score(scorer.features(probe))) == baseline_score
+
+    # The frozen scale survives a checkpoint round trip
+    scorer.source = "outputs"
+    scorer.checkpoint(str(tmp_path))
+    restored = OnlineScorer(80, 40, source="outputs")
+    assert restored.load(str(tmp_path))
+    assert (restored.score([transfer("X2", 50)])[0]["riskScore"]
+            == scorer.score([transfer("X2", 50)])[0]["riskScore"])
+
+
+def test_published_run_records_thresholds(fixture_csv, tmp_path):
+    run_dir = tmp_path / "run"
+    out_dir = tmp_path / "out"
+    os.makedirs(out_dir)
+    result = run_pipeline(fixture_csv, out_dir=str(run_dir), config={"fraud_threshold": 90})
+    result.pop("profile")
+    record_run(str(run_dir), result)
+    publish_outputs(str(run_dir), str(out_dir))
+
+    thresholds = load_current_run(str(out_dir))["thresholds"]
+    assert thresholds["fraud"] == 90 != FRAUD_THRESHOLD
+
+
+def test_scores_name_their_model(fixture_csv, tmp_path):
+    scorer = seeded_scorer(fixture_csv, tmp_path)
+    assert scorer.score([transfer("X3", 10)])[0]["scoreModel"] == SCORE_MODEL
+    assert scorer.stats()["scoreModel"] == SCORE_MODEL
+
+
+def test_unseeded_scorer_refuses_to_score(client, monkeypatch):
+    import app as nexus_app
+    scorer = OnlineScorer(80, 40)
+    scorer.bootstrap([])
+    assert not scorer.ready
+    monkeypatch.setattr(nexus_app, "get_online_scorer", lambda: scorer)
+
+    response = client.post("/api/score", json=transfer("X1", 5))
+    assert response.status_code == 409
+    assert scorer.transactions == 0 and not scorer.recent
+
+
+def test_recent_limit_is_validated_and_clamped(client, monkeypatch):
+    import app as nexus_app
+    scorer = OnlineScorer(80, 40)
+    monkeypatch.setattr(nexus_app, "get_online_scorer", lambda: scorer)
+
+    assert client.get("/api/score/recent?limit=0").status_code == 400
+    assert client.get("/api/score/recent?since=-1").status_code == 400
+    assert client.get("/api/score/recent?limit=abc").status_code == 400
+    assert client.get(f"/api/score/recent?limit={10**12}").status_code == 200
@@ -0,0 +1,37 @@
+import pytest
+
+from ml.fraud_data_pipeline import pipeline_config
+
+
+@pytest.mark.parametrize("overrides", [
+    ["sample_mode", "full"],
+    "sample_mode=full",
+    {"fraud_threshold": "nan"},
+    {"at_risk_threshold": float("-inf")},
+    {"propagation_tol": "inf"},
+    {"seed": float("nan")},
+    {"seed": "inf"},
+    {"seed": float("inf")},
+    {"no_such_option": 1},
+])
+def test_invalid_overrides_raise_value_error(overrides):
+    with pytest.raises(ValueError):
+        pipeline_config(overrides)
+
+
+def test_valid_overrides_are_coerced():
+    config = pipeline_config({"fraud_threshold": "90", "seed": 7.0})
+    assert config["fraud_threshold"] == 90.0 and config["seed"] == 7
+
+
+@pytest.mark.parametrize("body", [
+    {"config": ["sample_mode", "full"]},
+    {"config": "full"},
+    {"config": {"fraud_threshold": "nan"}},
+    {"config": {"seed": "inf"}},
+    {"outputFormat": "xlsx"},
+])
+def test_process_ml_rejects_bad_config(client, fixture_csv, body):
+    response = client.post("/api/process-ml", json=dict(body, filePath=fixture_csv))
+    assert response.status_code == 400
+    assert response.get_json()["error"]
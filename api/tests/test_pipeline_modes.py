@@ -0,0 +1,18 @@
+import filecmp
+
+import pytest
+
+from ml.fraud_data_pipeline import run_pipeline
+
+OUTPUTS = ["final_accounts.csv", "fraud_links.csv", "fraud_rings.csv"]
+
+
+@pytest.mark.parametrize("chunksize", [700, 5000])
+def test_chunked_outputs_match_in_memory(fixture_csv, tmp_path, chunksize):
+    in_memory = tmp_path / "in_memory"
+    chunked = tmp_path / "chunked"
+    run_pipeline(fixture_csv, out_dir=str(in_memory), output_format="csv")
+    run_pipeline(fixture_csv, out_dir=str(chunked), output_format="csv", chunksize=chunksize)
+
+    for name in OUTPUTS:
+        assert filecmp.cmp(in_memory / name, chunked / name, shallow=False), name
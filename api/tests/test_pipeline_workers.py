@@ -0,0 +1,39 @@
+import filecmp
+
+import pytest
+
+from ml.fraud_data_pipeline import run_pipeline
+
+OUTPUTS = ["final_accounts.csv", "fraud_links.csv", "fraud_rings.csv", "account_transactions.csv"]
+
+
+def test_parallel_outputs_match_serial(fixture_csv, tmp_path):
+    serial = tmp_path / "serial"
+    parallel = tmp_path / "parallel"
+    run_pipeline(fixture_csv, out_dir=str(serial), output_format="csv", workers=1)
+    run_pipeline(fixture_csv, out_dir=str(parallel), output_format="csv", workers=3)
+
+    for name in OUTPUTS:
+        assert filecmp.cmp(serial / name, parallel / name, shallow=False), name
+
+
+@pytest.mark.parametrize("options", [
+    {"workers": "two"},
+    {"workers": 0},
+    {"workers": -2},
+    {"workers": True},
+    {"workers": 1.5},
+    {"chunksize": "abc"},
+    {"chunksize": 0},
+])
+def test_process_ml_rejects_bad_options(client, fixture_csv, options):
+    response = client.post("/api/process-ml", json=dict(options, filePath=fixture_csv))
+    assert response.status_code == 400
+    assert "positive integer" in response.get_json()["error"]
+
+
+def test_numeric_strings_are_parsed(client):
+    from app import positive_int_option
+    assert positive_int_option({"workers": "2"}, "workers") == 2
+    assert positive_int_option({"chunksize": 5000.0}, "chunksize") == 5000
+    assert positive_int_option({}, "workers") is None
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from ml import ring_detection
+from ml.ring_detection import detect_rings, strongly_connected_components, trim_acyclic
+
+
+@pytest.fixture(params=[True, False], ids=["scipy", "tarjan"])
+def backend(request, monkeypatch):
+    if request.param and not ring_detection.HAS_SCIPY:
+        pytest.skip("scipy not installed")
+    monkeypatch.setattr(ring_detection, "HAS_SCIPY", request.param)
+
+
+def rings_of(edges, n_nodes, risk=None, **kwargs):
+    """detect_rings over (src, dst, step) triples between accounts A0..A{n-1}."""
+    src, dst, step = (np.array(c, dtype=np.int64) for c in zip(*edges))
+    ids = np.array([f"A{i}" for i in range(n_nodes)], dtype=object)
+    ones = np.ones(len(src))
+    return detect_rings(ids, src, dst, step, ones * 10, np.zeros(len(src), dtype=np.int64),
+                        risk=risk, **kwargs)
+
+
+# ======================================================
+# SCC
+# ======================================================
+def test_trim_peels_tails_and_sources():
+    # 0 -> 1 -> 2 -> 0 is a cycle; 3 feeds it and 4 hangs off it
+    src = np.array([0, 1, 2, 3, 2])
+    dst = np.array([1, 2, 0, 0, 4])
+    assert trim_acyclic(src, dst, 5).tolist() == [True, True, True, False, False]
+
+
+def test_scc_labels(backend):
+    # Two cycles joined by a one-way bridge, a self-loop and a lone node
+    src = np.array([0, 1, 2, 3, 4, 2, 5])
+    dst = np.array([1, 2, 0, 4, 3, 3, 5])
+    labels = strongly_connected_components(src, dst, 7)
+
+    assert labels[0] == labels[1] == labels[2] >= 0
+    assert labels[3] == labels[4] >= 0
+    assert labels[0] != labels[3]
+    # Self-loops and single accounts are never rings
+    assert labels[5] == -1 and labels[6] == -1
+
+# ======================================================
+# CYCLES
+# ======================================================
+def test_each_cycle_reported_once_rooted_at_smallest_account(backend):
+    # Triangle 2 -> 0 -> 1 -> 2 with parallel transfers, plus a 2-cycle
+    edges = [(2, 0, 1), (0, 1, 2), (1, 2, 3), (0, 1, 9), (3, 4, 1), (4, 3, 2)]
+    rings, truncated = rings_of(edges, 5)
+
+    assert not truncated
+    assert sorted(rings["accounts"]) == ["A0>A1>A2", "A3>A4"]
+    triangle = rings[rings["length"] == 3].iloc[0]
+    # Parallel transfers of a pair are collapsed into one ring edge
+    assert triangle["total_amount"] == 40
+    assert (triangle["first_step"], triangle["last_step"]) == (1, 9)
+
+
+def test_length_cap(backend):
+    square = [(0, 1, 1), (1, 2, 2), (2, 3, 3), (3, 0, 4)]
+    assert len(rings_of(square, 4, max_length=3)[0]) == 0
+    assert rings_of(square, 4, max_length=4)[0]["accounts"].tolist() == ["A0>A1>A2>A3"]
+
+
+def test_window_needs_increasing_steps_within_window(backend):
+    in_time = [(0, 1, 1), (1, 2, 2), (2, 0, 3)]
+    rings, _ = rings_of(in_time, 3, window=5)
+    # Temporal rings start at their earliest transfer
+    assert rings["accounts"].tolist() == ["A0>A1>A2"]
+
+    too_slow = [(0, 1, 1), (1, 2, 2), (2, 0, 30)]
+    assert len(rings_of(too_slow, 3, window=5)[0]) == 0
+
+    # No rotation of these transfers runs forward in time
+    out_of_order = [(0, 1, 5), (1, 2, 2), (2, 0, 1)]
+    assert len(rings_of(out_of_order, 3, window=5)[0]) == 0
+    # Without a window the same transfers are a ring
+    assert len(rings_of(out_of_order, 3, window=0)[0]) == 1
+
+# ======================================================
+# TRUNCATION
+# ======================================================
+def test_cap_keeps_the_riskiest_rings(backend):
+    # Ten disjoint 2-cycles; risk rises with the account code, so the last
+    # rings enumerated are the riskiest
+    edges = []
+    for r in range(10):
+        a, b = 2 * r, 2 * r + 1
+        edges += [(a, b, 1), (b, a, 2)]
+    risk = np.arange(20, dtype=np.float64)
+
+    rings, truncated = rings_of(edges, 20, risk=risk, max_rings=3)
+    assert truncated
+    assert rings["accounts"].tolist() == ["A18>A19", "A16>A17", "A14>A15"]
+    assert rings["ring_id"].tolist() == [0, 1, 2]
+
+    full, truncated = rings_of(edges, 20, risk=risk)
+    assert not truncated
+    assert full.head(3)["accounts"].tolist() == rings["accounts"].tolist()
+
+
+def test_cap_is_independent_of_compaction(backend, monkeypatch):
+    # A dense SCC: with max_rings=5 compaction runs many times mid-enumeration
+    rng = np.random.default_rng(3)
+    n = 12
+    edges = [(a, b, 1) for a in range(n) for b in range(n) if a != b and rng.random() < 0.6]
+    risk = rng.uniform(0, 100, n)
+
+    full, _ = rings_of(edges, n, risk=risk, max_rings=10**6)
+    capped, truncated = rings_of(edges, n, risk=risk, max_rings=5)
+    assert truncated
+    assert capped["accounts"].tolist() == full.head(5)["accounts"].tolist()
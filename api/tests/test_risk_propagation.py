@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from ml import risk_propagation
+from ml.risk_propagation import propagate_risk
+
+
+@pytest.fixture(params=[True, False], ids=["scipy", "bincount"])
+def backend(request, monkeypatch):
+    if request.param and not risk_propagation.HAS_SCIPY:
+        pytest.skip("scipy not installed")
+    monkeypatch.setattr(risk_propagation, "HAS_SCIPY", request.param)
+
+
+def test_zero_amount_edge_stays_finite(backend):
+    scores, iterations, converged = propagate_risk(
+        src=[0, 1, 3], dst=[1, 2, 4], weight=[0, 5, 3], seed=[1, 0, 0, 1, 0]
+    )
+    assert converged
+    assert np.isfinite(scores).all()
+    assert scores.sum() == pytest.approx(1.0)
+    # Node 0's only edge moves no money: its mass restarts at the seeds
+    # instead of flowing to node 1, which no seed reaches
+    assert scores[1] == 0 and scores[2] == 0
+    assert scores[4] > 0
+
+
+def test_scores_sum_to_one_and_follow_weights(backend):
+    scores, _, converged = propagate_risk(
+        src=[0, 0, 1], dst=[1, 2, 3], weight=[9.0, 1.0, 4.0], seed=[1, 0, 0, 0]
+    )
+    assert converged
+    assert scores.sum() == pytest.approx(1.0)
+    assert scores[1] > scores[2]
+
+
+def test_no_seed_mass_returns_zeros():
+    scores, iterations, converged = propagate_risk([0], [1], [1.0], [0, 0])
+    assert (scores == 0).all() and iterations == 0 and converged
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_non_finite_weights_raise(backend):
+    with pytest.raises(FloatingPointError):
+        propagate_risk([0, 1], [1, 2], [np.inf, 1.0], [1, 0, 0])
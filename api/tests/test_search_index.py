@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import search_index
+from ml.graph_query import ML_CLASSES, parse_search_params
+from ml.search_index import AccountSearchIndex, prefix_end
+
+SORT_COLUMNS = {"risk": "riskScore", "amount": "total_amount", "txCount": "tx_count"}
+
+
+def make_accounts(n_accounts=600, seed=11):
+    rng = np.random.default_rng(seed)
+    ids = [f"C{i}" for i in range(n_accounts)] + ["M1", "M10", "Mz", "m1"]
+    n = len(ids)
+    # Coarse values so every sort has plenty of ties
+    accounts = pd.DataFrame({
+        "account_id": ids,
+        "riskScore": rng.integers(0, 20, n) * 5.0,
+        "class": rng.choice(ML_CLASSES, n),
+        "total_amount": rng.integers(1, 50, n) * 100.0,
+        "tx_count": rng.integers(1, 8, n)
+    })
+    # Shuffled, so the index cannot rely on the input order
+    return accounts.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def reference(accounts, args):
+    """The expected page, computed with pandas rather than the index."""
+    rows = accounts
+    if args.get("q"):
+        rows = rows[rows["account_id"].str.startswith(args["q"])]
+    if "class" in args:
+        rows = rows[rows["class"].isin(args["class"].split(","))]
+    if "minRisk" in args:
+        rows = rows[rows["riskScore"] >= args["minRisk"]]
+    sort = args.get("sort", "risk")
+    if sort == "id":
+        rows = rows.sort_values("account_id")
+    else:
+        rows = rows.sort_values([SORT_COLUMNS[sort], "account_id"], ascending=[False, True])
+    return rows["account_id"].head(args["limit"]).tolist(), len(rows) > args["limit"]
+
+
+@pytest.mark.parametrize("prefix", ["", "C", "C1", "C12", "C599", "M1", "M", "m", "C6", "Z", "M1\U0010FFFF"])
+def test_prefix_range_matches_startswith(prefix):
+    accounts = make_accounts()
+    index = AccountSearchIndex(accounts)
+    lo, hi = index.prefix_range(prefix)
+    expected = sorted(a for a in accounts["account_id"] if a.startswith(prefix))
+    assert index.ids[lo:hi].tolist() == expected
+
+
+def test_prefix_end():
+    assert prefix_end("C1") == "C2"
+    assert prefix_end("a\U0010FFFF") == "b"
+    assert prefix_end("\U0010FFFF") is None
+
+
+@pytest.mark.parametrize("args", [
+    {},
+    {"q": "C1"},
+    {"q": "C12"},
+    {"q": "M"},
+    {"minRisk": 60},
+    {"q": "C", "minRisk": 45},
+    {"class": "FRAUD"},
+    {"class": "FRAUD,NORMAL", "minRisk": 30},
+    {"class": "AT_RISK,FRAUD,NORMAL"},
+    {"q": "C3", "class": "AT_RISK,NORMAL"},
+    {"q": "nothing"},
+])
+@pytest.mark.parametrize("sort", ["risk", "amount", "txCount", "id"])
+@pytest.mark.parametrize("limit", [1, 7, 200])
+def test_search_matches_pandas_reference(monkeypatch, args, sort, limit):
+    # Small scan blocks: "C1" takes the block scan, "C12" the narrow-prefix path
+    monkeypatch.setattr(search_index, "SCAN_BLOCK", 16)
+    accounts = make_accounts()
+    index = AccountSearchIndex(accounts)
+
+    query = dict(args, sort=sort, limit=limit)
+    page = index.search(parse_search_params(query))
+    expected, more = reference(accounts, query)
+
+    assert [r["id"] for r in page["results"]] == expected
+    assert page["more"] == more
+    assert page["sort"] == sort and page["limit"] == limit
+
+
+def test_result_fields_come_from_the_same_account():
+    accounts = make_accounts()
+    index = AccountSearchIndex(accounts)
+    page = index.search(parse_search_params({"q": "C4", "limit": 50}))
+    by_id = accounts.set_index("account_id")
+
+    assert page["results"]
+    for r in page["results"]:
+        row = by_id.loc[r["id"]]
+        assert (r["riskScore"], r["class"], r["totalAmount"], r["txCount"]) == \
+               (row["riskScore"], row["class"], row["total_amount"], row["tx_count"])
+
+
+def test_unknown_class_counts_as_normal():
+    accounts = pd.DataFrame({
+        "account_id": ["A", "B"],
+        "riskScore": [10.0, 20.0],
+        "class": ["NORMAL", "LEGACY"],
+        "total_amount": [1.0, 2.0],
+        "tx_count": [1, 1]
+    })
+    page = AccountSearchIndex(accounts).search(parse_search_params({"class": "NORMAL"}))
+    assert [(r["id"], r["class"]) for r in page["results"]] == [("B", "NORMAL"), ("A", "NORMAL")]
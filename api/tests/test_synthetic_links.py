@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from ml.fraud_data_pipeline import (
+    MAX_LINKS_PER_NODE, MIN_LINKS_PER_NODE, generate_synthetic_links, sample_distinct_targets
+)
+from ml.graph_query import ML_CLASSES
+
+
+def check_sample(owner, degree, pool_size, rows, dst):
+    owner = np.asarray(owner)
+    available = np.where(owner >= 0, pool_size - 1, pool_size)
+
+    assert np.all(np.diff(rows) >= 0), "not sorted by source"
+    assert np.all((dst >= 0) & (dst < pool_size))
+    # No source draws its own pool position
+    assert not np.any((owner[rows] >= 0) & (dst == owner[rows]))
+    # Targets are distinct per source
+    pairs = rows * pool_size + dst
+    assert len(np.unique(pairs)) == len(pairs)
+    # Every source gets its degree, capped at the targets it can reach
+    counts = np.bincount(rows, minlength=len(owner))
+    assert np.array_equal(counts, np.minimum(degree, available))
+
+
+@pytest.mark.parametrize("n", [2, 3, 10, 500])
+def test_dense_graph_sampling(n):
+    rng = np.random.default_rng(n)
+    degree = rng.integers(MIN_LINKS_PER_NODE, MAX_LINKS_PER_NODE + 6, n)
+    rows, dst = sample_distinct_targets(np.arange(n), degree, n, rng)
+    check_sample(np.arange(n), degree, n, rows, dst)
+
+
+def test_owned_positions_anywhere_in_the_pool():
+    rng = np.random.default_rng(3)
+    owner = rng.permutation(200)[:50]
+    degree = rng.integers(1, 40, 50)
+    rows, dst = sample_distinct_targets(owner, degree, 200, rng)
+    check_sample(owner, degree, 200, rows, dst)
+
+
+def test_unowned_sources_may_draw_the_whole_pool():
+    rng = np.random.default_rng(4)
+    owner = np.full(30, -1)
+    # Asking for more than the pool holds takes every target once
+    degree = np.array([5, 0, 7] * 10)
+    rows, dst = sample_distinct_targets(owner, degree, 6, rng)
+    check_sample(owner, degree, 6, rows, dst)
+    assert np.array_equal(np.bincount(rows, minlength=30), np.array([5, 0, 6] * 10))
+
+
+def test_no_sources():
+    rows, dst = sample_distinct_targets(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), 5,
+                                        np.random.default_rng(0))
+    assert len(rows) == len(dst) == 0
+
+
+def test_synthetic_links_stay_within_bounds():
+    rng = np.random.default_rng(9)
+    n = 300
+    ids = np.array([f"C{i}" for i in range(n)], dtype=object)
+    classes = rng.choice(ML_CLASSES, n, p=[0.1, 0.2, 0.7])
+
+    links, next_step = generate_synthetic_links(ids, classes, 100, np.random.default_rng(1))
+    again, _ = generate_synthetic_links(ids, classes, 100, np.random.default_rng(1))
+
+    assert links.equals(again)
+    assert not (links["src"] == links["dst"]).any()
+    assert links["src"].isin(ids).all() and links["dst"].isin(ids).all()
+    assert links["step"].min() >= 100 and links["step"].max() < next_step
+
+    # The dense stage alone sets the lower bound; later stages only add edges
+    out_degree = links["src"].value_counts().reindex(ids, fill_value=0)
+    assert out_degree.min() >= MIN_LINKS_PER_NODE
+    normal = out_degree[classes == "NORMAL"]
+    assert normal.max() <= MAX_LINKS_PER_NODE
+    # Fraud accounts: higher dense degree, 3+ ring peers, 1+ mules and 1+ suspects
+    fraud = out_degree[classes == "FRAUD"]
+    assert fraud.min() >= MIN_LINKS_PER_NODE + 3 + 3 + 1 + 1
@@ -0,0 +1,97 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from ml.uploads import (
+    HAS_ZSTD, UnsupportedUpload, save_upload, file_digest,
+    record_run, load_cached_run, publish_outputs
+)
+
+CSV = b"step,amount,nameOrig,nameDest\n1,10.5,C1,C2\n2,3.0,C2,C1\n"
+
+
+def leftovers(upload_dir):
+    return [n for n in os.listdir(upload_dir) if n.endswith(".tmp")]
+
+# ======================================================
+# UPLOADS
+# ======================================================
+def test_same_content_dedupes_across_compression(tmp_path):
+    plain = save_upload(io.BytesIO(CSV), "tx.csv", str(tmp_path))
+    packed = save_upload(io.BytesIO(gzip.compress(CSV)), "tx.csv.gz", str(tmp_path))
+
+    assert not plain["duplicate"] and packed["duplicate"]
+    assert packed["path"] == plain["path"]
+    assert packed["bytes"] == len(CSV)
+    with open(plain["path"], "rb") as f:
+        assert f.read() == CSV
+    assert file_digest(plain["path"]) == plain["contentHash"]
+    assert leftovers(tmp_path) == []
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstandard not installed")
+def test_zstd_upload_is_decompressed(tmp_path):
+    import zstandard
+    saved = save_upload(io.BytesIO(zstandard.ZstdCompressor().compress(CSV)), "tx.csv.zst", str(tmp_path))
+    with open(saved["path"], "rb") as f:
+        assert f.read() == CSV
+
+
+@pytest.mark.parametrize("name, body", [
+    ("tx.csv.gz", gzip.compress(CSV)[:-12]),
+    ("tx.csv.gz", b"not gzip at all"),
+    pytest.param("tx.csv.zst", b"\x28\xb5\x2f\xfd corrupt frame", marks=pytest.mark.skipif(
+        not HAS_ZSTD, reason="zstandard not installed")),
+])
+def test_corrupt_upload_is_rejected_without_leftovers(tmp_path, name, body):
+    with pytest.raises(UnsupportedUpload):
+        save_upload(io.BytesIO(body), name, str(tmp_path))
+    assert leftovers(tmp_path) == []
+
+
+def test_unsupported_suffix(tmp_path):
+    with pytest.raises(UnsupportedUpload):
+        save_upload(io.BytesIO(CSV), "tx.xlsx", str(tmp_path))
+
+# ======================================================
+# RUN CACHE + PUBLISHING
+# ======================================================
+def write_run(run_dir, names):
+    os.makedirs(run_dir, exist_ok=True)
+    result = {}
+    for name in names:
+        path = os.path.join(run_dir, name)
+        with open(path, "w") as f:
+            f.write(name)
+        result[name.split(".")[0]] = path
+    result["thresholds"] = {"fraud": 80, "atRisk": 40}
+    record_run(run_dir, result)
+    return result
+
+
+def test_cached_run_needs_its_outputs(tmp_path):
+    run_dir = str(tmp_path / "run")
+    result = write_run(run_dir, ["final_accounts.csv", "fraud_links.csv"])
+
+    assert load_cached_run(run_dir) == result
+    os.remove(result["fraud_links"])
+    assert load_cached_run(run_dir) is None
+    assert load_cached_run(str(tmp_path / "missing")) is None
+
+
+def test_publish_hard_links_and_drops_stale_formats(tmp_path):
+    out_dir = str(tmp_path / "out")
+    os.makedirs(out_dir)
+    old = write_run(str(tmp_path / "old"), ["final_accounts.csv", "final_accounts.parquet", "fraud_links.csv"])
+    publish_outputs(os.path.dirname(old["fraud_links"]), out_dir)
+    assert os.path.exists(os.path.join(out_dir, "final_accounts.parquet"))
+
+    new = write_run(str(tmp_path / "new"), ["final_accounts.csv", "fraud_links.csv"])
+    published = publish_outputs(os.path.dirname(new["fraud_links"]), out_dir)
+
+    # Same inode as the run's file: publishing copies nothing
+    assert os.stat(published["accounts"]).st_ino == os.stat(new["final_accounts"]).st_ino
+    assert not os.path.exists(os.path.join(out_dir, "final_accounts.parquet"))
+    assert leftovers(out_dir) == []
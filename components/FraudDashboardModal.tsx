@@ -1,8 +1,8 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { X, Calendar, Download, BarChart3, PieChart, TrendingUp, ShieldAlert, ShieldCheck, Activity, Users } from 'lucide-react';
 import { AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, BarChart, Bar, PieChart as RePieChart, Pie, Cell, Legend } from 'recharts';
 
-import { Account } from '../types';
+import { Account, DashboardStats } from '../types';
 import { formatCurrency } from '../utils';
 
 interface FraudDashboardModalProps {
@@ -13,8 +13,40 @@ interface FraudDashboardModalProps {
 const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, currency }) => {
     const [timeRange, setTimeRange] = useState<'24h' | '7d' | '30d'>('24h');
     const [riskThreshold, setRiskThreshold] = useState(80);
-
-    const filteredAccounts = accounts
+    const [stats, setStats] = useState<DashboardStats | null>(null);
+
+    // Summary pre-aggregated by the backend at write time; polling it costs a
+    // 304 while the graph is unchanged, whatever the graph size
+    useEffect(() => {
+        const API_BASE_URL = (import.meta as any).env.VITE_API_URL || '/api';
+        const fetchStats = async () => {
+            try {
+                const response = await fetch(`${API_BASE_URL}/stats`);
+                if (response.ok) setStats(await response.json());
+            } catch (error) {
+                console.error("Failed to fetch dashboard stats:", error);
+            }
+        };
+
+        fetchStats();
+        const intervalId = setInterval(fetchStats, 3000);
+        return () => clearInterval(intervalId);
+    }, []);
+
+    // Threat feed rows: top accounts by risk from the summary, else the loaded graph
+    const threatRows: Pick<Account, 'id' | 'name' | 'riskScore' | 'entity' | 'userId' | 'ipAddress' | 'volumeValue'>[] = stats
+        ? stats.topRisk.map(a => ({
+            id: a.id,
+            name: a.id,
+            riskScore: a.riskScore,
+            entity: a.id.startsWith('M') ? 'Merchant' : 'Customer',
+            userId: `USR-${a.id}`,
+            ipAddress: `192.168.1.${a.id.split('').reduce((acc, char) => acc + char.charCodeAt(0), 0) % 255}`,
+            volumeValue: a.totalAmount * 1000
+        }))
+        : accounts;
+
+    const filteredAccounts = threatRows
         .filter(a => a.riskScore >= riskThreshold)
         .sort((a, b) => b.riskScore - a.riskScore);
 
@@ -25,12 +57,20 @@ const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, cur
     // Here we will sum up amounts for "Fraud" (high risk accounts) vs "Normal".
 
     const generateActivityData = () => {
+        const points = timeRange === '24h' ? 24 : timeRange === '7d' ? 7 : 30;
+
+        if (stats) {
+            // Latest step buckets, oldest -> newest
+            return stats.amountByStep.slice(-points).map((b, i, arr) => ({
+                name: `T-${arr.length - i}`,
+                fraud: b.fraudAmount * 1000,
+                notFraud: (b.amount - b.fraudAmount) * 1000
+            }));
+        }
+
         // Map of index -> { name, fraud, notFraud }
         const dataMap: Record<number, { name: string; fraud: number; notFraud: number }> = {};
 
-        // Dynamic points based on time range
-        const points = timeRange === '24h' ? 24 : timeRange === '7d' ? 7 : 30;
-
         for (let i = 0; i < points; i++) {
             dataMap[i] = {
                 name: `T-${points - i}`,
@@ -70,10 +110,14 @@ const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, cur
     const activityData = generateActivityData();
 
     // Risk Severity Categories for Pie Chart
-    const criticalCount = accounts.filter(a => a.riskScore > 90).length;
-    const highCount = accounts.filter(a => a.riskScore > 70 && a.riskScore <= 90).length;
-    const mediumCount = accounts.filter(a => a.riskScore > 40 && a.riskScore <= 70).length;
-    const lowCount = accounts.filter(a => a.riskScore <= 40).length;
+    const criticalCount = stats ? stats.riskBands.critical : accounts.filter(a => a.riskScore > 90).length;
+    const highCount = stats ? stats.riskBands.high : accounts.filter(a => a.riskScore > 70 && a.riskScore <= 90).length;
+    const mediumCount = stats ? stats.riskBands.medium : accounts.filter(a => a.riskScore > 40 && a.riskScore <= 70).length;
+    const lowCount = stats ? stats.riskBands.low : accounts.filter(a => a.riskScore <= 40).length;
+
+    const totalVolume = stats ? stats.totalVolume * 1000 : accounts.reduce((acc, curr) => acc + curr.volumeValue, 0);
+    const entityCount = stats ? stats.accounts : accounts.length;
+    const avgRisk = stats ? stats.avgRisk : accounts.reduce((acc, curr) => acc + curr.riskScore, 0) / (accounts.length || 1);
 
     const riskPieData = [
         { name: 'Critical (>90)', value: criticalCount, color: '#f43f5e' }, // Rose-500
@@ -131,7 +175,7 @@ const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, cur
                         <div>
                             <p className="text-xs text-slate-500 dark:text-slate-400 font-bold uppercase tracking-wider">Total Volume</p>
                             <p className="text-2xl font-black text-slate-900 dark:text-white mt-1">
-                                {formatCurrency(accounts.reduce((acc, curr) => acc + curr.volumeValue, 0), currency)}
+                                {formatCurrency(totalVolume, currency)}
                             </p>
                         </div>
                     </div>
@@ -143,7 +187,7 @@ const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, cur
                         <div>
                             <p className="text-xs text-slate-500 dark:text-slate-400 font-bold uppercase tracking-wider">Active Entities</p>
                             <p className="text-2xl font-black text-slate-900 dark:text-white mt-1">
-                                {accounts.length}
+                                {entityCount}
                             </p>
                         </div>
                     </div>
@@ -155,7 +199,7 @@ const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, cur
                         <div>
                             <p className="text-xs text-slate-500 dark:text-slate-400 font-bold uppercase tracking-wider">High Risk (&gt;70)</p>
                             <p className="text-2xl font-black text-slate-900 dark:text-white mt-1">
-                                {accounts.filter(a => a.riskScore > 70).length}
+                                {criticalCount + highCount}
                             </p>
                         </div>
                     </div>
@@ -167,7 +211,7 @@ const FraudDashboardModal: React.FC<FraudDashboardModalProps> = ({ accounts, cur
                         <div>
                             <p className="text-xs text-slate-500 dark:text-slate-400 font-bold uppercase tracking-wider">Avg Risk Score</p>
                             <p className="text-2xl font-black text-slate-900 dark:text-white mt-1">
-                                {(accounts.reduce((acc, curr) => acc + curr.riskScore, 0) / (accounts.length || 1)).toFixed(1)}
+                                {avgRisk.toFixed(1)}
                             </p>
                         </div>
                     </div>
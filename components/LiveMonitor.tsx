@@ -30,6 +30,54 @@ const LiveMonitor: React.FC<{ currency: string }> = ({ currency }) => {
   const [selectedEntity, setSelectedEntity] = useState<string | null>(null);
   const frameRef = useRef<number>(0);
   const lastSpawnTime = useRef<number>(0);
+  // Last /api/score/recent sequence seen; once real scores arrive the
+  // simulated events stop
+  const lastSeq = useRef<number>(0);
+  const liveFeed = useRef<boolean>(false);
+
+  // Live feed: transactions scored by /api/score that came out FRAUD / AT_RISK
+  useEffect(() => {
+    const API_BASE_URL = (import.meta as any).env.VITE_API_URL || '/api';
+    const poll = async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/score/recent?since=${lastSeq.current}&limit=200`);
+        if (!response.ok) return;
+        const data = await response.json();
+        if (data.transactions.length === 0) return;
+        lastSeq.current = data.transactions[data.transactions.length - 1].seq;
+
+        const flagged = data.transactions.filter((t: any) => t.class !== 'NORMAL');
+        if (flagged.length === 0) return;
+        liveFeed.current = true;
+
+        const maxRisk = Math.max(...flagged.map((t: any) => t.riskScore));
+        const newEvent: TimelineEvent = {
+          id: `LIVE-${lastSeq.current}`,
+          x: 100,
+          y: 15 + (maxRisk / 100) * 55, // Deflection grows with the worst score
+          direction: flagged.some((t: any) => t.class === 'FRAUD') ? 'up' : 'down',
+          timestamp: Date.now(),
+          fraudIds: Array.from(new Set<string>(flagged.map((t: any) => t.account))).slice(0, 4),
+          transactions: flagged.slice(-6).map((t: any) => ({
+            id: `TXN-${t.seq}`,
+            time: new Date(t.scoredAt * 1000).toISOString().split('T')[1].slice(0, 8),
+            amount: Number(t.amount).toFixed(2),
+            sender: t.account,
+            receiver: t.nameDest || 'Unknown',
+            type: t.type === 'TRANSFER' ? 'Wire' : t.type === 'CASH_OUT' ? 'Off-Shore' : 'Crypto',
+            status: 'Flagged'
+          }))
+        };
+        setEvents(prev => [...prev, newEvent]);
+      } catch (error) {
+        // Backend unreachable: keep the simulated feed
+      }
+    };
+
+    poll();
+    const intervalId = setInterval(poll, 1500);
+    return () => clearInterval(intervalId);
+  }, []);
 
   // Helper: Generate realistic fraud transactions
   const generateTransactions = (accounts: string[]): Transaction[] => {
@@ -63,7 +111,7 @@ const LiveMonitor: React.FC<{ currency: string }> = ({ currency }) => {
 
       // 2. Spawn new "Nexus Events" (Deflections)
       // Spawn rate: Random check every frame, but limited by time
-      if (time - lastSpawnTime.current > 1500) {
+      if (!liveFeed.current && time - lastSpawnTime.current > 1500) {
         if (Math.random() > 0.4) { // 60% chance to spawn every 1.5s
           const isUp = Math.random() > 0.5;
           const fraudAccounts = INITIAL_ACCOUNTS
@@ -101,7 +101,33 @@ const ProjectWorkflowPage: React.FC<ProjectWorkflowPageProps> = ({ onNavigate })
             const err = await res.json().catch(() => ({}));
             throw new Error(err.error || err.message || `ML Analysis failed: ${res.statusText}`);
         }
-        return res.json();
+        const body = await res.json();
+        // 202 = queued as a background job; poll until it finishes
+        return body.jobId ? waitForJob(body.jobId) : body;
+    };
+
+    // Give up polling a background job after this long (the job keeps running server-side)
+    const JOB_POLL_TIMEOUT_MS = 15 * 60 * 1000;
+
+    const waitForJob = async (jobId: string) => {
+        const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+        while (Date.now() < deadline) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+
+            const res = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+            if (!res.ok) {
+                const err = await res.json().catch(() => ({}));
+                throw new Error(err.error || err.message || `ML Analysis failed: ${res.statusText}`);
+            }
+
+            const job = await res.json();
+            if (job.status === 'succeeded') return { status: "success", data: job.result };
+            if (job.status === 'failed' || job.status === 'cancelled') {
+                throw new Error(job.error || `ML Analysis ${job.status}`);
+            }
+            updateStep(1, 'processing', Math.max(10, job.progress));
+        }
+        throw new Error(`ML Analysis timed out after ${JOB_POLL_TIMEOUT_MS / 60000} minutes (job ${jobId})`);
     };
 
     const ingestNeo4j = async (accounts: string, links: string) => {
@@ -207,7 +233,7 @@ const ProjectWorkflowPage: React.FC<ProjectWorkflowPageProps> = ({ onNavigate })
                 <input
                     ref={fileInputRef}
                     type="file"
-                    accept=".csv"
+                    accept=".csv,.gz,.zst,.zstd"
                     hidden
                     onChange={e => {
                         const f = e.target.files?.[0];
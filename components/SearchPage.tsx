@@ -1,5 +1,5 @@
-import React, { useState, useMemo } from 'react';
-import { Account } from '../types';
+import React, { useState, useMemo, useEffect } from 'react';
+import { Account, StatsAccount } from '../types';
 import { Search as SearchIcon, ShieldAlert, ShieldCheck, Snowflake, ArrowUpRight, ArrowDownLeft, Activity, CreditCard, Calendar } from 'lucide-react';
 import { formatCurrency } from '../utils';
 
@@ -18,15 +18,77 @@ const SearchPage: React.FC<SearchPageProps> = ({ accounts, currency, initialQuer
         return null;
     });
 
+    // Matches from /api/search (whole dataset, id prefix); null until the
+    // backend answers or when it is unreachable
+    const [results, setResults] = useState<StatsAccount[] | null>(null);
+
+    useEffect(() => {
+        if (!query.trim()) {
+            setResults(null);
+            return;
+        }
+        const API_BASE_URL = (import.meta as any).env.VITE_API_URL || '/api';
+        const controller = new AbortController();
+        // Debounced, so typing doesn't send a request per keystroke
+        const timer = setTimeout(async () => {
+            try {
+                const response = await fetch(
+                    `${API_BASE_URL}/search?q=${encodeURIComponent(query.trim())}&limit=10`,
+                    { signal: controller.signal }
+                );
+                setResults(response.ok ? (await response.json()).results : null);
+            } catch (error) {
+                if (!controller.signal.aborted) setResults(null);
+            }
+        }, 200);
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [query]);
+
+    // Search hits may be outside the loaded graph; show what the summary knows
+    const fromSearchResult = (r: StatsAccount): Account => {
+        const volumeValue = r.totalAmount * 1000;
+        return {
+            id: r.id,
+            userId: `USR-${r.id}`,
+            transactionId: `TXN-${r.id.substring(0, 8)}`,
+            ipAddress: `192.168.1.${r.id.split('').reduce((acc, char) => acc + char.charCodeAt(0), 0) % 255}`,
+            name: r.id,
+            entity: r.id.startsWith('M') ? 'Merchant' : 'Customer',
+            type: r.id.startsWith('M') ? 'Corporate' : 'Individual',
+            riskScore: r.riskScore,
+            status: r.riskScore > 80 || r.class === 'AT_RISK' || r.class === 'FRAUD' ? 'Flagged' : 'Safe',
+            volume: formatCurrency(volumeValue, currency),
+            volumeValue,
+            flagCount: 0,
+            lastActive: 'N/A',
+            x: 0,
+            y: 0,
+            isRingMember: r.class === 'AT_RISK' || r.class === 'FRAUD',
+            connections: [],
+            history: []
+        };
+    };
+
     const filteredAccounts = useMemo(() => {
         if (!query) return [];
+        if (results) {
+            // Prefer the graph's copy, which carries transaction history
+            return results.map(r => ({
+                account: accounts.find(a => a.id === r.id) || fromSearchResult(r),
+                txCount: r.txCount
+            }));
+        }
+        // Backend search unavailable: filter the loaded graph
         const lower = query.toLowerCase();
         return accounts.filter(a =>
             a.name.toLowerCase().includes(lower) ||
             a.id.toLowerCase().includes(lower) ||
             a.entity.toLowerCase().includes(lower)
-        ).slice(0, 10);
-    }, [accounts, query]);
+        ).slice(0, 10).map(a => ({ account: a, txCount: a.history.length }));
+    }, [accounts, query, results, currency]);
 
 
 
@@ -76,7 +138,7 @@ const SearchPage: React.FC<SearchPageProps> = ({ accounts, currency, initialQuer
                     {query && (
                         <div className="absolute top-full left-0 right-0 mt-2 bg-white/90 dark:bg-[#0a0a0a]/95 backdrop-blur-xl border border-slate-200 dark:border-white/10 rounded-2xl shadow-2xl overflow-hidden z-20 max-h-[60vh] overflow-y-auto">
                             {filteredAccounts.length > 0 ? (
-                                filteredAccounts.map(acc => (
+                                filteredAccounts.map(({ account: acc, txCount }) => (
                                     <div
                                         key={acc.id}
                                         onClick={() => { setSelectedAccount(acc); setQuery(''); }}
@@ -105,7 +167,7 @@ const SearchPage: React.FC<SearchPageProps> = ({ accounts, currency, initialQuer
                                                 {formatCurrency(acc.volumeValue, currency)}
                                             </div>
                                             <div className="text-[9px] md:text-[10px] text-slate-400 uppercase tracking-wide">
-                                                {acc.history.length} Txns
+                                                {txCount} Txns
                                             </div>
                                         </div>
                                     </div>
@@ -41,4 +41,39 @@ export interface Account {
 export interface ChartDataPoint {
   name: string;
   value: number;
-}
\ No newline at end of file
+}
+
+// Pre-aggregated summary served by /api/stats
+export interface StatsAccount {
+  id: string;
+  riskScore: number;
+  class: string;
+  totalAmount: number;
+  txCount: number;
+}
+
+export interface StepBucket {
+  stepStart: number;
+  stepEnd: number;
+  count: number;
+  amount: number;
+  fraudCount: number;
+  fraudAmount: number;
+}
+
+export interface DashboardStats {
+  source: 'pipeline' | 'neo4j';
+  graphVersion: number;
+  accounts: number;
+  links: number;
+  fraudLinks: number;
+  fraudLinkRatio: number;
+  totalVolume: number;
+  avgRisk: number;
+  classCounts: Record<string, number>;
+  riskBands: { critical: number; high: number; medium: number; low: number };
+  riskHistogram: { edges: number[]; counts: number[] };
+  amountByStep: StepBucket[];
+  topRisk: StatsAccount[];
+  topVolume: StatsAccount[];
+}